@@ -6,7 +6,7 @@ import uuid
 from dataclasses import dataclass, field
 from typing import Generator
 
-from tool_registry import get_tool_schemas
+from tool_selection import select_tool_schemas
 from tools import execute_tool
 import tools as _tools_init  # ensure built-in tools are registered on import
 from providers import stream, AssistantTurn, TextChunk, ThinkingChunk, detect_provider
@@ -95,7 +95,7 @@ def run(
             model=config["model"],
             system=system_prompt,
             messages=state.messages,
-            tool_schemas=get_tool_schemas(),
+            tool_schemas=select_tool_schemas(state.messages, config),
             config=config,
         ):
             if isinstance(event, (TextChunk, ThinkingChunk)):
@@ -169,6 +169,8 @@ def _check_permission(tc: dict, config: dict) -> bool:
     """Return True if operation is auto-approved (no need to ask user)."""
     perm_mode = config.get("permission_mode", "auto")
     name = tc["name"]
+    if not isinstance(tc["input"], dict):
+        tc = {**tc, "input": {}}   # malformed input; rejected by tool input validation
 
     # Plan mode tools are always auto-approved
     if name in ("EnterPlanMode", "ExitPlanMode"):
@@ -188,17 +190,24 @@ def _check_permission(tc: dict, config: dict) -> bool:
                os.path.normpath(target) == os.path.normpath(plan_file):
                 return True
             return False
+        if name == "MultiEdit":
+            plan_file = config.get("_plan_file", "")
+            targets = [e.get("file_path", "") for e in tc["input"].get("edits") or []
+                       if isinstance(e, dict)]
+            return bool(plan_file and targets) and all(
+                os.path.normpath(t) == os.path.normpath(plan_file) for t in targets)
         if name == "NotebookEdit":
             return False
-        if name == "Bash":
+        if name in ("Bash", "BashBackground"):
             from tools import _is_safe_bash
             return _is_safe_bash(tc["input"].get("command", ""))
         return True  # reads are fine
 
     # "auto" mode: only ask for writes and non-safe bash
-    if name in ("Read", "Glob", "Grep", "WebFetch", "WebSearch"):
+    if name in ("Read", "Glob", "Grep", "WebFetch", "WebSearch", "ToolResult", "BashOutput", "BashKill",
+                "FindSymbol", "FindReferences", "SearchCode", "ToolSearch"):
         return True
-    if name == "Bash":
+    if name in ("Bash", "BashBackground"):
         from tools import _is_safe_bash
         return _is_safe_bash(tc["input"].get("command", ""))
     return False   # Write, Edit → ask
@@ -206,8 +215,12 @@ def _check_permission(tc: dict, config: dict) -> bool:
 
 def _permission_desc(tc: dict) -> str:
     name = tc["name"]
-    inp  = tc["input"]
+    inp  = tc["input"] if isinstance(tc["input"], dict) else {}
     if name == "Bash":   return f"Run: {inp.get('command', '')}"
+    if name == "BashBackground": return f"Run in background: {inp.get('command', '')}"
     if name == "Write":  return f"Write to: {inp.get('file_path', '')}"
     if name == "Edit":   return f"Edit: {inp.get('file_path', '')}"
+    if name == "MultiEdit":
+        files = dict.fromkeys(e.get("file_path", "") for e in inp.get("edits") or [] if isinstance(e, dict))
+        return f"Edit ({len(inp.get('edits') or [])} changes): {', '.join(files)}"
     return f"{name}({list(inp.values())[:1]})"
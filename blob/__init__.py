@@ -0,0 +1,15 @@
+"""Blob store for large tool outputs (spill to disk, retrieve with ToolResult)."""
+from .store import (
+    spill_tool_result,
+    save_blob,
+    read_blob,
+    blob_exists,
+    format_preview,
+    delete_session_blobs,
+    cleanup_old_blobs,
+)
+
+__all__ = [
+    "spill_tool_result", "save_blob", "read_blob", "blob_exists", "format_preview",
+    "delete_session_blobs", "cleanup_old_blobs",
+]
@@ -0,0 +1,223 @@
+"""Blob store: spill large tool results to disk and page through them on demand.
+
+Directory layout:
+    ~/.dev-council/blobs/<session_id>/
+        <handle>.txt         # full tool output, utf-8
+        <handle>.json        # metadata (tool name, size, line count, created)
+
+Only a head/tail preview plus the handle stays in the conversation; the
+ToolResult tool reads the stored output back by line range or regex.
+"""
+from __future__ import annotations
+
+import json
+import re
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+from config import CONFIG_DIR
+from tool_output import important_lines
+
+# Preview sizing for spilled results
+PREVIEW_HEAD_LINES = 40
+PREVIEW_TAIL_LINES = 20
+PREVIEW_HEAD_CHARS = 2000
+PREVIEW_TAIL_CHARS = 1000
+PREVIEW_ERROR_LINES = 15        # error/failure lines carried over from the omitted middle
+
+# Upper bound for a single ToolResult page
+MAX_PAGE_CHARS = 20000
+
+# Tools whose output is never spilled (ToolResult would spill its own pages)
+NEVER_SPILL = {"ToolResult"}
+
+
+def _blobs_root() -> Path:
+    return CONFIG_DIR / "blobs"
+
+
+def _session_dir(session_id: str) -> Path:
+    d = _blobs_root() / (session_id or "default")
+    d.mkdir(parents=True, exist_ok=True)
+    return d
+
+
+def _blob_path(session_id: str, handle: str) -> Path:
+    # Handles are generated by us; reject anything that could escape the dir.
+    if not re.fullmatch(r"[A-Za-z0-9_-]+", handle or ""):
+        raise ValueError(f"invalid handle: {handle!r}")
+    return _session_dir(session_id) / f"{handle}.txt"
+
+
+def _clip(text: str, max_chars: int, from_end: bool = False) -> str:
+    if len(text) <= max_chars:
+        return text
+    return text[-max_chars:] if from_end else text[:max_chars]
+
+
+# ── Write ────────────────────────────────────────────────────────────────────
+
+def save_blob(session_id: str, tool_name: str, content: str) -> str:
+    """Persist *content* and return its handle."""
+    handle = f"r{uuid.uuid4().hex[:10]}"
+    path = _blob_path(session_id, handle)
+    path.write_text(content, encoding="utf-8")
+    meta = {
+        "handle": handle,
+        "tool": tool_name,
+        "chars": len(content),
+        "lines": content.count("\n") + (1 if content and not content.endswith("\n") else 0),
+        "created": time.time(),
+    }
+    path.with_suffix(".json").write_text(json.dumps(meta), encoding="utf-8")
+    return handle
+
+
+def format_preview(handle: str, tool_name: str, content: str) -> str:
+    """Build the head/tail preview that replaces a spilled result in messages."""
+    lines = content.splitlines()
+    total = len(lines)
+    header = (
+        f"[{tool_name} output stored as handle={handle}: "
+        f"{len(content):,} chars, {total:,} lines. "
+        f"Use ToolResult(handle=\"{handle}\", offset, limit) or pattern=... to see more.]"
+    )
+    if total <= PREVIEW_HEAD_LINES + PREVIEW_TAIL_LINES:
+        # Few but very long lines: fall back to character slicing
+        head = _clip(content, PREVIEW_HEAD_CHARS)
+        tail = _clip(content[len(head):], PREVIEW_TAIL_CHARS, from_end=True)
+        omitted = len(content) - len(head) - len(tail)
+        middle = f"\n[... {omitted:,} chars omitted ...]\n" if omitted > 0 else ""
+        return f"{header}\n{head}{middle}{tail}"
+
+    head = _clip("\n".join(lines[:PREVIEW_HEAD_LINES]), PREVIEW_HEAD_CHARS)
+    tail = _clip("\n".join(lines[-PREVIEW_TAIL_LINES:]), PREVIEW_TAIL_CHARS, from_end=True)
+    omitted = total - PREVIEW_HEAD_LINES - PREVIEW_TAIL_LINES
+    middle = lines[PREVIEW_HEAD_LINES:total - PREVIEW_TAIL_LINES]
+    span = f"{omitted:,} lines omitted (lines {PREVIEW_HEAD_LINES}-{total - PREVIEW_TAIL_LINES - 1}, 0-indexed)"
+    errors = [f"  {PREVIEW_HEAD_LINES + i}: {middle[i][:200]}"
+              for i in important_lines(middle, PREVIEW_ERROR_LINES)]
+    if errors:
+        marker = f"[... {span}; error/failure lines among them:\n" + "\n".join(errors) + "\n...]"
+    else:
+        marker = f"[... {span} ...]"
+    return f"{header}\n{head}\n{marker}\n{tail}"
+
+
+def spill_tool_result(session_id: str, tool_name: str, content: str, threshold: int) -> str:
+    """Return *content* unchanged when small, otherwise store it and return a preview.
+
+    Args:
+        session_id: current session id (blobs are grouped per session)
+        tool_name: tool that produced the output
+        content: full tool output
+        threshold: spill when len(content) exceeds this; <= 0 disables spilling
+    """
+    if threshold <= 0 or len(content) <= threshold or tool_name in NEVER_SPILL:
+        return content
+    try:
+        handle = save_blob(session_id, tool_name, content)
+    except OSError:
+        return content   # disk trouble: fall back to normal truncation
+    return format_preview(handle, tool_name, content)
+
+
+# ── Read ─────────────────────────────────────────────────────────────────────
+
+def blob_exists(session_id: str, handle: str) -> bool:
+    try:
+        return _blob_path(session_id, handle).exists()
+    except ValueError:
+        return False
+
+
+def read_blob(
+    session_id: str,
+    handle: str,
+    offset: int = 0,
+    limit: int = 200,
+    pattern: str = "",
+    case_insensitive: bool = False,
+) -> str:
+    """Return a numbered page of a stored result, or the lines matching *pattern*."""
+    try:
+        path = _blob_path(session_id, handle)
+    except ValueError as e:
+        return f"Error: {e}"
+    if not path.exists():
+        return f"Error: no stored output with handle '{handle}' in this session"
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    out: list[str] = []
+    used = 0
+
+    if pattern:
+        try:
+            rx = re.compile(pattern, re.IGNORECASE if case_insensitive else 0)
+        except re.error as e:
+            return f"Error: invalid regex: {e}"
+        matches = 0
+        for i, line in enumerate(lines[offset:], start=offset):
+            if not rx.search(line):
+                continue
+            matches += 1
+            if limit and matches > limit:
+                out.append("[... more matches; narrow the pattern or raise limit ...]")
+                break
+            row = f"{i:6}\t{line}"
+            used += len(row) + 1
+            if used > MAX_PAGE_CHARS:
+                out.append(f"[... page limit of {MAX_PAGE_CHARS:,} chars reached ...]")
+                break
+            out.append(row)
+        return "\n".join(out) if out else "No matching lines"
+
+    start = max(0, offset)
+    end = len(lines) if not limit else min(len(lines), start + limit)
+    if start >= len(lines):
+        return f"(offset {start} is past the end: {len(lines)} lines)"
+    for i in range(start, end):
+        row = f"{i:6}\t{lines[i]}"
+        used += len(row) + 1
+        if used > MAX_PAGE_CHARS:
+            out.append(f"[... page limit of {MAX_PAGE_CHARS:,} chars reached; continue with offset={i} ...]")
+            break
+        out.append(row)
+    else:
+        if end < len(lines):
+            out.append(f"[... {len(lines) - end} more lines; continue with offset={end} ...]")
+    return "\n".join(out)
+
+
+# ── Cleanup ──────────────────────────────────────────────────────────────────
+
+def delete_session_blobs(session_id: str) -> bool:
+    """Delete all stored outputs for a session."""
+    d = _blobs_root() / (session_id or "default")
+    if d.exists():
+        shutil.rmtree(str(d), ignore_errors=True)
+        return True
+    return False
+
+
+def cleanup_old_blobs(max_age_days: int = 7) -> int:
+    """Remove blob sessions older than max_age_days. Returns count removed."""
+    root = _blobs_root()
+    if not root.exists():
+        return 0
+    cutoff = time.time() - (max_age_days * 86400)
+    removed = 0
+    try:
+        for d in root.iterdir():
+            if d.is_dir():
+                try:
+                    if d.stat().st_mtime < cutoff:
+                        shutil.rmtree(str(d), ignore_errors=True)
+                        removed += 1
+                except OSError:
+                    pass
+    except OSError:
+        pass
+    return removed
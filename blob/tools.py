@@ -0,0 +1,47 @@
+"""ToolResult tool: page through tool outputs spilled to the blob store.
+
+Importing this module registers the tool into the central registry.
+"""
+from __future__ import annotations
+
+from tool_registry import ToolDef, register_tool
+from .store import read_blob
+
+
+def _tool_result(params: dict, config: dict) -> str:
+    return read_blob(
+        config.get("_session_id", "default"),
+        params["handle"],
+        offset=int(params.get("offset") or 0),
+        limit=int(params.get("limit") or 200),
+        pattern=params.get("pattern") or "",
+        case_insensitive=bool(params.get("case_insensitive", False)),
+    )
+
+
+register_tool(ToolDef(
+    name="ToolResult",
+    schema={
+        "name": "ToolResult",
+        "description": (
+            "Retrieve a large tool output that was stored instead of being shown in full. "
+            "Pass the handle from the '[... stored as handle=...]' notice. "
+            "Page by line range with offset/limit, or pass a regex pattern to get only matching lines. "
+            "Avoids re-running expensive commands."
+        ),
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "handle": {"type": "string", "description": "Handle from the stored-output notice"},
+                "offset": {"type": "integer", "description": "First line to return (0-indexed, default 0)"},
+                "limit":  {"type": "integer", "description": "Max lines (or matches) to return (default 200)"},
+                "pattern": {"type": "string", "description": "Regex; return only matching lines"},
+                "case_insensitive": {"type": "boolean"},
+            },
+            "required": ["handle"],
+        },
+    },
+    func=_tool_result,
+    read_only=True,
+    concurrent_safe=True,
+))
@@ -1,6 +1,6 @@
-"""Checkpoint hooks: intercept Write/Edit/NotebookEdit to back up files before modification.
+"""Checkpoint hooks: intercept Write/Edit/MultiEdit/NotebookEdit to back up files before modification.
 
-Import this module after tools are registered to install the hooks.
+``install_hooks`` adds a tool-registry middleware; calling it again is harmless.
 """
 from __future__ import annotations
 
@@ -44,47 +44,30 @@ def _backup_before_write(file_path: str) -> None:
 
 # ── Hook installation ───────────────────────────────────────────────────────
 
-_hooks_installed = False
+def _backup_targets(name: str, params: dict) -> list[str]:
+    """Files a write tool call is about to modify."""
+    if name in ("Write", "Edit"):
+        return [params.get("file_path", "")]
+    if name == "MultiEdit":
+        edits = params.get("edits")
+        if isinstance(edits, list):
+            # One backup per distinct file
+            return list(dict.fromkeys(e.get("file_path", "") for e in edits if isinstance(e, dict)))
+    if name == "NotebookEdit":
+        return [params.get("notebook_path", "")]
+    return []
+
+
+def checkpoint_middleware(call, next_) -> str:
+    """Registry middleware: back up target files before a write tool runs."""
+    for fp in _backup_targets(call.name, call.params):
+        if fp:
+            _backup_before_write(fp)
+    return next_(call)
 
 
 def install_hooks() -> None:
-    """Wrap Write/Edit/NotebookEdit tool functions to call backup before execution."""
-    global _hooks_installed
-    if _hooks_installed:
-        return
-    _hooks_installed = True
-
-    from tool_registry import get_tool
-
-    # Hook Write
-    write_tool = get_tool("Write")
-    if write_tool:
-        original_write = write_tool.func
-        def hooked_write(params, config):
-            fp = params.get("file_path", "")
-            if fp:
-                _backup_before_write(fp)
-            return original_write(params, config)
-        write_tool.func = hooked_write
-
-    # Hook Edit
-    edit_tool = get_tool("Edit")
-    if edit_tool:
-        original_edit = edit_tool.func
-        def hooked_edit(params, config):
-            fp = params.get("file_path", "")
-            if fp:
-                _backup_before_write(fp)
-            return original_edit(params, config)
-        edit_tool.func = hooked_edit
-
-    # Hook NotebookEdit
-    nb_tool = get_tool("NotebookEdit")
-    if nb_tool:
-        original_nb = nb_tool.func
-        def hooked_nb(params, config):
-            fp = params.get("notebook_path", "")
-            if fp:
-                _backup_before_write(fp)
-            return original_nb(params, config)
-        nb_tool.func = hooked_nb
+    """Install the checkpoint middleware (innermost, so only calls that actually run back up)."""
+    from tool_registry import add_middleware
+
+    add_middleware("checkpoint", checkpoint_middleware, order=50)
@@ -1,6 +1,9 @@
 """Context window management: two-layer compression for long conversations."""
 from __future__ import annotations
 
+import json
+import re
+
 import providers
 
 
@@ -107,7 +110,7 @@ def find_split_point(messages: list, keep_ratio: float = 0.3) -> int:
     return 0
 
 
-def compact_messages(messages: list, config: dict, focus: str = "") -> list:
+def compact_messages(messages: list, config: dict, focus: str = "", keep_ratio: float = 0.3) -> list:
     """Compress old messages into a summary via LLM call.
 
     Splits at find_split_point, summarizes old portion, returns
@@ -117,10 +120,11 @@ def compact_messages(messages: list, config: dict, focus: str = "") -> list:
         messages: full message list
         config: agent config dict (must contain "model")
         focus: optional focus instructions for the summarizer
+        keep_ratio: fraction of tokens kept verbatim in the recent portion
     Returns:
         new compacted message list
     """
-    split = find_split_point(messages)
+    split = find_split_point(messages, keep_ratio)
     if split <= 0:
         return messages
 
@@ -169,6 +173,228 @@ def compact_messages(messages: list, config: dict, focus: str = "") -> list:
     return [summary_msg, ack_msg, *recent]
 
 
+# ── Layer 2 (alternative): Extractive compaction, no LLM call ─────────────
+
+_KEY_LINE_RE = re.compile(
+    r"error|exception|traceback|fail|warning|assert|passed|created|updated|"
+    r"changes applied|no changes|denied|not found|timed out",
+    re.IGNORECASE,
+)
+_FILE_TOOLS = ("Read", "Write", "Edit", "NotebookEdit")
+
+
+def _one_line(text: str, max_chars: int = 160) -> str:
+    flat = " ".join(str(text).split())
+    return flat if len(flat) <= max_chars else flat[: max_chars - 3] + "..."
+
+
+def _tool_target(inputs: dict) -> str:
+    return str(
+        inputs.get("file_path") or inputs.get("notebook_path")
+        or inputs.get("path") or ""
+    )
+
+
+def _format_args(name: str, inputs: dict) -> str:
+    """Compact argument rendering: target first, long string values elided."""
+    if not isinstance(inputs, dict):
+        return _one_line(inputs, 80)
+    parts = []
+    target = _tool_target(inputs)
+    if target:
+        parts.append(target)
+    edits = inputs.get("edits")
+    if name == "MultiEdit" and isinstance(edits, list):
+        files = dict.fromkeys(str(e.get("file_path", "")) for e in edits if isinstance(e, dict))
+        parts.append(f"{', '.join(files)}; {len(edits)} edits")
+    for key, value in inputs.items():
+        if key in ("file_path", "notebook_path", "path", "content", "old_string",
+                   "new_string", "new_source", "edits"):
+            continue
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value, ensure_ascii=False)
+        parts.append(f"{key}={_one_line(value, 80)}")
+    return ", ".join(parts)
+
+
+def _tool_status(content: str) -> str:
+    head = content.lstrip()[:80].lower()
+    if head.startswith(("error", "denied")) or "timed out" in head:
+        return "error"
+    return "ok"
+
+
+def _key_lines(content: str, max_lines: int = 3) -> list[str]:
+    """Pick the most informative lines: errors/results first, else the first line."""
+    lines = [l.strip() for l in content.splitlines() if l.strip()]
+    picked = [l for l in lines if _KEY_LINE_RE.search(l)][:max_lines]
+    if not picked and lines:
+        picked = lines[:1]
+    return [_one_line(l, 200) for l in picked]
+
+
+def _clip_block(text: str, max_lines: int = 20, max_chars: int = 1200) -> str:
+    lines = text.splitlines()
+    clipped = "\n".join(lines[:max_lines])[:max_chars]
+    hidden = len(lines) - len(clipped.splitlines())
+    if hidden > 0:
+        clipped += f"\n[... {hidden} more lines ...]"
+    return clipped
+
+
+def _superseded_calls(messages: list) -> set[str]:
+    """Return tool_call ids whose file content is made stale by a later call.
+
+    - a Read is superseded by any later Read/Write/Edit of the same file
+    - a Write is superseded by a later Write of the same file
+    - an Edit is superseded by a later Write of the same file, or by a later
+      Edit whose old_string covers this edit's new_string (same region)
+    """
+    calls: list[tuple[str, str, dict]] = []
+    for m in messages:
+        if m.get("role") != "assistant":
+            continue
+        for tc in m.get("tool_calls") or []:
+            name = tc.get("name", "")
+            inputs = tc.get("input") or {}
+            if name in _FILE_TOOLS and isinstance(inputs, dict):
+                calls.append((tc.get("id", ""), name, inputs))
+
+    superseded: set[str] = set()
+    for i, (cid, name, inputs) in enumerate(calls):
+        target = _tool_target(inputs)
+        for _, later_name, later in calls[i + 1:]:
+            if _tool_target(later) != target:
+                continue
+            if name == "Read":
+                superseded.add(cid)
+                break
+            if later_name == "Write":
+                superseded.add(cid)
+                break
+            if name == "Edit" and later_name == "Edit":
+                region = (inputs.get("new_string") or "").strip()
+                if region and region in (later.get("old_string") or ""):
+                    superseded.add(cid)
+                    break
+    return superseded
+
+
+def extractive_summary(messages: list, following: list | None = None) -> str:
+    """Deterministically fold *messages* into a compact text record.
+
+    User messages are kept verbatim, assistant text is shortened to one line,
+    and each tool call/result pair becomes a single record
+    ``- Tool(args) -> status: key lines``. Stale file reads are dropped and
+    only the latest content of each edited region is kept.
+
+    Args:
+        messages: the messages to fold
+        following: messages kept after the summary; file calls there also
+                   supersede older reads/edits
+    """
+    results = {
+        m.get("tool_call_id"): m for m in messages
+        if m.get("role") == "tool" and m.get("tool_call_id")
+    }
+    consumed: set[str] = set()
+    superseded = _superseded_calls(messages + list(following or []))
+    out: list[str] = []
+
+    for m in messages:
+        role = m.get("role")
+        content = m.get("content", "")
+        if role == "user":
+            if isinstance(content, str):
+                out.append(f"[user]: {content.strip()}")
+            else:
+                out.append("[user]: (structured content)")
+        elif role == "assistant":
+            if isinstance(content, str) and content.strip():
+                out.append(f"[assistant]: {_one_line(content, 300)}")
+            for tc in m.get("tool_calls") or []:
+                cid = tc.get("id", "")
+                name = tc.get("name", "?")
+                inputs = tc.get("input") or {}
+                result_msg = results.get(cid)
+                if result_msg is not None:
+                    consumed.add(cid)
+                if cid in superseded and name == "Read":
+                    continue   # a later read/write has the fresher view of this file
+                result = result_msg.get("content", "") if result_msg else ""
+                result = result if isinstance(result, str) else ""
+                status = _tool_status(result) if result_msg else "no result"
+                record = f"- {name}({_format_args(name, inputs)}) -> {status}"
+                keys = _key_lines(result) if name != "Read" else []
+                if name == "Read" and result:
+                    record += f": {len(result.splitlines())} lines read"
+                elif keys:
+                    record += ": " + " | ".join(keys)
+                out.append(record)
+                if cid in superseded or status == "error" or not isinstance(inputs, dict):
+                    continue
+                if name == "Edit" and inputs.get("new_string"):
+                    out.append("  latest edit:\n" + _clip_block(inputs["new_string"]))
+                elif name == "Write" and inputs.get("content"):
+                    out.append("  written content:\n" + _clip_block(inputs["content"], 40, 2000))
+        elif role == "tool":
+            cid = m.get("tool_call_id")
+            if cid in consumed:
+                continue
+            text = content if isinstance(content, str) else ""
+            keys = _key_lines(text)
+            out.append(
+                f"- {m.get('name', 'tool')} result -> {_tool_status(text)}"
+                + (": " + " | ".join(keys) if keys else "")
+            )
+    return "\n".join(out)
+
+
+def extractive_compact(messages: list, keep_ratio: float = 0.3) -> list:
+    """Compress old messages into a deterministic extractive record (no LLM call).
+
+    Uses the same split as compact_messages, but never starts the recent
+    portion on a tool result so call/result pairs stay together.
+
+    Returns:
+        [summary_msg, ack_msg, *recent_messages], or messages unchanged
+    """
+    split = find_split_point(messages, keep_ratio)
+    while 0 < split < len(messages) and messages[split].get("role") == "tool":
+        split -= 1
+    if split <= 0:
+        return messages
+
+    summary_msg = {
+        "role": "user",
+        "content": (
+            "[Previous conversation summary]\n"
+            "(extractive record: user messages verbatim, one line per tool call)\n"
+            + extractive_summary(messages[:split], following=messages[split:])
+        ),
+    }
+    ack_msg = {
+        "role": "assistant",
+        "content": "Understood. I have the context from the previous conversation. Let's continue.",
+    }
+    return [summary_msg, ack_msg, *messages[split:]]
+
+
+def _compact_layer2(messages: list, config: dict, focus: str = "", threshold: float = 0) -> list:
+    """Run the configured layer-2 strategy.
+
+    compaction_mode "llm" (default) summarises with the model. "extractive"
+    folds the history locally; the LLM summary is layered on top only when
+    the extractive result is still above *threshold* (0 = never).
+    """
+    if config.get("compaction_mode", "llm") != "extractive":
+        return compact_messages(messages, config, focus=focus)
+    compacted = extractive_compact(messages)
+    if threshold and estimate_tokens(compacted) > threshold:
+        compacted = compact_messages(compacted, config, focus=focus)
+    return compacted
+
+
 # ── Main entry ────────────────────────────────────────────────────────────
 
 def maybe_compact(state, config: dict) -> bool:
@@ -200,7 +426,7 @@ def maybe_compact(state, config: dict) -> bool:
         return True
 
     # Layer 2: auto-compact
-    state.messages = compact_messages(state.messages, config)
+    state.messages = _compact_layer2(state.messages, config, threshold=threshold)
     state.messages.extend(_restore_plan_context(config))
     return True
 
@@ -237,7 +463,7 @@ def manual_compact(state, config: dict, focus: str = "") -> tuple[bool, str]:
 
     before = estimate_tokens(state.messages)
     snip_old_tool_results(state.messages)
-    state.messages = compact_messages(state.messages, config, focus=focus)
+    state.messages = _compact_layer2(state.messages, config, focus=focus)
     state.messages.extend(_restore_plan_context(config))
     after = estimate_tokens(state.messages)
     saved = before - after
@@ -40,6 +40,14 @@ DEFAULTS = {
     "thinking": False,
     "thinking_budget": 8000,
     "max_tool_output": 32000,
+    "tool_spill_threshold": 8000,
+    "compaction_mode": "llm",
+    "bash_persistent": False,
+    "repo_map_tokens": 0,
+    "tool_selection": "auto",
+    "tool_timeout": 120,
+    "tool_isolation": True,
+    "tool_memory_limit_mb": 2048,
     "session_daily_limit": 10,
     "session_history_limit": 200,
     "ollama_local_base_url": "http://localhost:11434",
@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import platform
 import subprocess
+import time
 from datetime import datetime
 from pathlib import Path
 
@@ -36,16 +37,23 @@ IMPORTANT: Tool names are case-sensitive. Use the exact capitalisation shown bel
 For example, the shell tool is "Bash" (capital B), NOT "bash".
 
 ## File and Shell
-- **Read** — read a file's contents (file_path, limit, offset)
+- **Read** — read a file's contents (file_path, limit, offset); since_last_read=true returns only the diff against your previous Read
 - **Write** — create or overwrite a file (file_path, content)
 - **Edit** — search-and-replace in a file (file_path, old_string, new_string)
+- **MultiEdit** — several search-and-replace edits, across files, in one atomic call (edits)
 - **Bash** — run a shell command (command, timeout). Tool name MUST be "Bash", not "bash".
+- **BashBackground** — start a long-running command (server, build, tests) and get a job id; **BashOutput** reads new output, **BashKill** stops it
 - **Glob** — find files by pattern (pattern, path)
 - **Grep** — search file contents (pattern, path)
+- **FindSymbol** — jump to a definition: file:line span and signature (name, kind, path)
+- **FindReferences** — every line using an identifier, definitions marked (name, path)
+- **SearchCode** — BM25-ranked function/class snippets for a natural-language or identifier query (query, limit, path)
 - **WebFetch** — fetch a URL (url)
 - **WebSearch** — search the web (query)
 - **NotebookEdit** — edit Jupyter notebooks
-- **GetDiagnostics** — run linters/type-checkers
+- **GetDiagnostics** — run linters/type-checkers (file_path, or file_paths to check an edit batch at once)
+- **ToolSearch** — find and enable tools that are not in your current tool list, e.g. MCP tools (query)
+- **ToolResult** — page through a large stored tool output (handle, offset, limit, pattern)
 
 ## Memory
 - MemorySave, MemoryDelete, MemorySearch, MemoryList
@@ -80,25 +88,126 @@ When asked to BUILD or IMPLEMENT code:
 {platform_hints}{git_info}{claude_md}"""
 
 
-def get_git_info() -> str:
+# ── Git probe ─────────────────────────────────────────────────────────────
+# The branch comes straight from .git/HEAD (no subprocess). Status uses one
+# porcelain-v2 call with a timeout; repositories where it is too slow are
+# remembered and degrade to branch-only so prompt latency never depends on
+# repository size. --no-optional-locks stops status from rewriting the index,
+# which would otherwise invalidate the index-mtime cache key on every call.
+
+GIT_STATUS_TIMEOUT = 2.0
+GIT_STATUS_PREVIEW = 10
+
+_slow_status_repos: set[str] = set()
+
+
+def find_git_dir(start: Path | None = None) -> Path | None:
+    """Return the .git directory for *start* (default cwd), following worktree files."""
+    probe = (start or Path.cwd()).resolve()
+    while True:
+        candidate = probe / ".git"
+        if candidate.is_dir():
+            return candidate
+        if candidate.is_file():
+            try:
+                text = candidate.read_text(encoding="utf-8").strip()
+            except OSError:
+                return None
+            if text.startswith("gitdir:"):
+                gitdir = Path(text[len("gitdir:"):].strip())
+                return gitdir if gitdir.is_absolute() else (probe / gitdir).resolve()
+            return None
+        if probe.parent == probe:
+            return None
+        probe = probe.parent
+
+
+def read_git_branch(git_dir: Path) -> str:
+    """Return the current branch name (or a detached-HEAD label) from .git/HEAD."""
     try:
-        branch = subprocess.check_output(
-            ["git", "rev-parse", "--abbrev-ref", "HEAD"],
-            stderr=subprocess.DEVNULL,
-            text=True,
-        ).strip()
-        status = subprocess.check_output(
-            ["git", "status", "--short"],
-            stderr=subprocess.DEVNULL,
-            text=True,
-        ).strip()
-        parts = [f"\n- Git branch: {branch}"]
-        if status:
-            preview = "\n".join(f"  {line}" for line in status.splitlines()[:10])
-            parts.append(f"- Git status:\n{preview}")
-        return "\n".join(parts) + "\n"
-    except Exception:
+        head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+    except OSError:
+        return ""
+    if head.startswith("ref:"):
+        ref = head[len("ref:"):].strip()
+        return ref[len("refs/heads/"):] if ref.startswith("refs/heads/") else ref
+    return f"HEAD (detached at {head[:7]})" if head else ""
+
+
+def _parse_porcelain_v2(output: str) -> list[str]:
+    """Convert porcelain-v2 records to short-format ``XY path`` lines."""
+    lines: list[str] = []
+    for record in output.splitlines():
+        if not record:
+            continue
+        kind = record[0]
+        if kind == "1":
+            fields = record.split(" ", 8)
+            if len(fields) == 9:
+                lines.append(f"{fields[1].replace('.', ' ')} {fields[8]}")
+        elif kind == "2":
+            fields = record.split(" ", 9)
+            if len(fields) == 10:
+                path, _, orig = fields[9].partition("\t")
+                lines.append(f"{fields[1].replace('.', ' ')} {orig} -> {path}")
+        elif kind == "u":
+            fields = record.split(" ", 10)
+            if len(fields) == 11:
+                lines.append(f"{fields[1]} {fields[10]}")
+        elif kind == "?":
+            lines.append(f"?? {record[2:]}")
+    return lines
+
+
+def probe_git_status(cwd: Path, timeout: float = GIT_STATUS_TIMEOUT) -> list[str] | None:
+    """Run a single porcelain-v2 status call.
+
+    Returns short-format lines, an empty list when git is unavailable or
+    fails, or None when the call exceeded *timeout*.
+    """
+    try:
+        r = subprocess.run(
+            ["git", "--no-optional-locks", "-c", "core.untrackedCache=true", "status",
+             "--porcelain=v2", "--untracked-files=normal", "--ignore-submodules=dirty"],
+            cwd=str(cwd), capture_output=True, text=True, timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        return None
+    except (OSError, ValueError):
+        return []
+    if r.returncode != 0:
+        return []
+    return _parse_porcelain_v2(r.stdout)
+
+
+def get_git_info() -> str:
+    git_dir = find_git_dir()
+    if git_dir is None:
         return ""
+    branch = read_git_branch(git_dir)
+    if not branch:
+        return ""
+    parts = [f"\n- Git branch: {branch}"]
+
+    repo_key = str(git_dir)
+    if repo_key in _slow_status_repos:
+        parts.append("- Git status: skipped (too slow on this repository)")
+        return "\n".join(parts) + "\n"
+
+    status = probe_git_status(Path.cwd())
+    if status is None:
+        _slow_status_repos.add(repo_key)
+        parts.append(f"- Git status: skipped (took over {GIT_STATUS_TIMEOUT:g}s)")
+        return "\n".join(parts) + "\n"
+    if status:
+        tracked = [line for line in status if not line.startswith("??")]
+        untracked = [line for line in status if line.startswith("??")]
+        shown = (tracked + untracked)[:GIT_STATUS_PREVIEW]
+        preview = "\n".join(f"  {line}" for line in shown)
+        if len(status) > len(shown):
+            preview += f"\n  ... and {len(status) - len(shown)} more ({len(untracked)} untracked)"
+        parts.append(f"- Git status:\n{preview}")
+    return "\n".join(parts) + "\n"
 
 
 def get_project_guidance() -> str:
@@ -166,26 +275,162 @@ def get_platform_hints() -> str:
     )
 
 
+# ── Section cache ─────────────────────────────────────────────────────────
+# build_system_prompt runs for every query. Each expensive section is cached
+# with a cheap invalidation key (file mtimes), so repeated queries skip the
+# git subprocesses, the guidance walk, the memory index reads and skill
+# parsing unless something relevant actually changed.
+
+_section_cache: dict[str, tuple[object, str]] = {}
+_section_stats: dict[str, dict[str, int]] = {}
+_prompt_cache: tuple[tuple, str] | None = None
+_prompt_stats = {"builds": 0, "reuses": 0, "last_ms": 0.0, "total_ms": 0.0}
+
+
+def _mtime(path: Path) -> int | None:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _cached_section(name: str, key: object, builder) -> str:
+    stats = _section_stats.setdefault(name, {"hits": 0, "misses": 0})
+    cached = _section_cache.get(name)
+    if cached is not None and cached[0] == key:
+        stats["hits"] += 1
+        return cached[1]
+    stats["misses"] += 1
+    value = builder()
+    _section_cache[name] = (key, value)
+    return value
+
+
+def _git_key() -> tuple:
+    git_dir = find_git_dir()
+    if git_dir is None:
+        return (str(Path.cwd()), None)
+    return (str(Path.cwd()), str(git_dir), _mtime(git_dir / "HEAD"), _mtime(git_dir / "index"))
+
+
+def _guidance_key() -> tuple:
+    paths = [CONFIG_DIR / "GUIDANCE.md"]
+    probe = Path.cwd()
+    for _ in range(10):
+        paths.extend(probe / name for name in ("GUIDANCE.md", "CLAUDE.md"))
+        if probe.parent == probe:
+            break
+        probe = probe.parent
+    return tuple((str(p), _mtime(p)) for p in paths)
+
+
+def _memory_key() -> tuple:
+    from memory.store import INDEX_FILENAME, get_memory_dir
+    return tuple(
+        (str(get_memory_dir(scope)), _mtime(get_memory_dir(scope) / INDEX_FILENAME))
+        for scope in ("user", "project")
+    )
+
+
+def _skills_key() -> tuple:
+    try:
+        from skill.loader import _BUILTIN_SKILLS, _get_skill_paths, _iter_skill_files
+    except Exception:
+        return ()
+    parts: list = [len(_BUILTIN_SKILLS)]
+    for skill_dir in _get_skill_paths():
+        dir_mtime = _mtime(skill_dir)
+        parts.append((str(skill_dir), dir_mtime))
+        if dir_mtime is not None:
+            # In-place edits to a skill file do not touch the directory mtime.
+            parts.extend((str(f), _mtime(f)) for f in _iter_skill_files(skill_dir))
+    return tuple(parts)
+
+
+def get_prompt_cache_stats() -> dict:
+    """Return build timings and per-section cache hit counts (for /doctor)."""
+    sections = {}
+    for name, stats in _section_stats.items():
+        total = stats["hits"] + stats["misses"]
+        sections[name] = {**stats, "hit_rate": (stats["hits"] / total) if total else 0.0}
+    calls = _prompt_stats["builds"] + _prompt_stats["reuses"]
+    return {
+        "builds": _prompt_stats["builds"],
+        "reuses": _prompt_stats["reuses"],
+        "last_ms": _prompt_stats["last_ms"],
+        "avg_ms": (_prompt_stats["total_ms"] / calls) if calls else 0.0,
+        "sections": sections,
+    }
+
+
+def clear_prompt_cache() -> None:
+    """Drop all cached sections and statistics."""
+    global _prompt_cache
+    _section_cache.clear()
+    _section_stats.clear()
+    _prompt_cache = None
+    _prompt_stats.update(builds=0, reuses=0, last_ms=0.0, total_ms=0.0)
+
+
 def build_system_prompt(config: dict | None = None) -> str:
+    global _prompt_cache
+    started = time.perf_counter()
+
+    git_info = _cached_section("git", _git_key(), get_git_info)
+    guidance = _cached_section("guidance", _guidance_key(), get_project_guidance)
+    memory_context = _cached_section("memory", _memory_key(), get_memory_context)
+    skill_metadata = _cached_section("skills", _skills_key(), get_skill_metadata)
+
+    plan_file = ""
+    if config and config.get("permission_mode") == "plan":
+        plan_file = config.get("_plan_file", "")
+    key = (
+        datetime.now().strftime("%Y-%m-%d %A"), str(Path.cwd()), platform.system(),
+        git_info, guidance, memory_context, skill_metadata,
+        bool(config and config.get("permission_mode") == "plan"), plan_file,
+    )
+    if _prompt_cache is not None and _prompt_cache[0] == key:
+        prompt = _prompt_cache[1]
+        _prompt_stats["reuses"] += 1
+    else:
+        prompt = _assemble_prompt(key[0], key[1], key[2], git_info, guidance,
+                                  memory_context, skill_metadata, key[7], plan_file)
+        _prompt_cache = (key, prompt)
+        _prompt_stats["builds"] += 1
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    _prompt_stats["last_ms"] = elapsed_ms
+    _prompt_stats["total_ms"] += elapsed_ms
+    return prompt
+
+
+def _assemble_prompt(
+    date: str,
+    cwd: str,
+    system: str,
+    git_info: str,
+    guidance: str,
+    memory_context: str,
+    skill_metadata: str,
+    plan_mode: bool,
+    plan_file: str,
+) -> str:
     prompt = SYSTEM_PROMPT_TEMPLATE.format(
-        date=datetime.now().strftime("%Y-%m-%d %A"),
-        cwd=str(Path.cwd()),
-        platform=platform.system(),
+        date=date,
+        cwd=cwd,
+        platform=system,
         platform_hints=get_platform_hints(),
-        git_info=get_git_info(),
-        claude_md=get_project_guidance(),
+        git_info=git_info,
+        claude_md=guidance,
     )
 
-    memory_context = get_memory_context()
     if memory_context:
         prompt += f"\n\n# Memory\n{memory_context}\n"
 
-    skill_metadata = get_skill_metadata()
     if skill_metadata:
         prompt += skill_metadata
 
-    if config and config.get("permission_mode") == "plan":
-        plan_file = config.get("_plan_file", "")
+    if plan_mode:
         prompt += (
             "\n\n# Plan Mode\n"
             "- You are in plan mode.\n"
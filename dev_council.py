@@ -18,6 +18,7 @@ from datetime import datetime
 from pathlib import Path
 
 import checkpoint as ckpt
+from blob import cleanup_old_blobs
 from agent import (
     AgentState,
     PermissionRequest,
@@ -40,7 +41,7 @@ from config import (
     load_config,
     save_config,
 )
-from context import build_system_prompt
+from context import build_system_prompt, get_prompt_cache_stats
 from memory import load_index, search_memory
 from mcp import (
     add_server_to_user_config,
@@ -68,7 +69,12 @@ from task import (
     list_tasks,
     update_task,
 )
+from tool_output import get_output_stats
+from tool_registry import get_tool_input_stats, get_tool_metrics
 from tools import ask_input_interactive
+from shell import describe_job, list_jobs
+from workspace import build_repo_map, project_snapshot, relevant_code
+from workspace.repomap import CHARS_PER_TOKEN
 
 
 VERSION = "2.7.0"
@@ -656,16 +662,34 @@ def _render_stage_prompt(template: str, context: str) -> str:
     return template.replace("{context}", context)
 
 
-def _project_snapshot(limit: int = 200) -> str:
-    files: list[str] = []
-    for path in sorted(Path.cwd().rglob("*")):
-        if ".git" in path.parts or "__pycache__" in path.parts:
-            continue
-        if path.is_file():
-            files.append(str(path.relative_to(Path.cwd())))
-        if len(files) >= limit:
-            break
-    return "\n".join(files)
+REPO_MAP_MIN_TOKENS = 1024
+REPO_MAP_MAX_TOKENS = 8192
+
+
+def _repo_map(task_text: str, config: dict, models: list | None = None) -> str:
+    """Task-ranked repository map sized for the smallest context among *models*.
+
+    ``repo_map_tokens`` in the config overrides the budget; otherwise it is
+    1/32 of the context window, clamped to [1024, 8192] tokens. When the map
+    cannot be built or comes out empty, a plain file list within the same
+    budget is used instead.
+    """
+    budget = int(config.get("repo_map_tokens") or 0)
+    if budget <= 0:
+        models = models or [config.get("model", DEFAULTS["model"])]
+        window = min(get_context_limit(m) for m in models)
+        budget = max(REPO_MAP_MIN_TOKENS, min(REPO_MAP_MAX_TOKENS, window // 32))
+    try:
+        repo_map = build_repo_map(task_text, budget, Path.cwd())
+    except Exception:
+        repo_map = ""
+    if repo_map:
+        return repo_map
+    listing = project_snapshot(Path.cwd())
+    max_chars = int(budget * CHARS_PER_TOKEN)
+    if len(listing) > max_chars:
+        listing = listing[:max_chars].rsplit("\n", 1)[0]
+    return listing or "(empty repository)"
 
 
 def _stage_context(extra: str = "") -> str:
@@ -1187,19 +1211,19 @@ def _run_council(task_text: str, state: AgentState, config: dict) -> None:
     council_root = _council_dir() / datetime.now().strftime("%Y%m%d_%H%M%S")
     council_root.mkdir(parents=True, exist_ok=True)
 
-    snapshot = _project_snapshot()
     proposals: list[tuple[str, str]] = []
 
     for index, model_name in enumerate(selected_models, 1):
         info(f"Collecting proposal {index}/{len(selected_models)} from {model_name}")
+        repo_map = _repo_map(task_text, config, [model_name])
         proposal_prompt = textwrap.dedent(
             f"""
             You are one model in a coding council for the following task:
 
             {task_text}
 
-            Project file snapshot:
-            {snapshot}
+            Repository map (files most relevant to the task carry their signatures):
+            {repo_map}
 
             Existing SDLC context:
             {_stage_context()}
@@ -1460,6 +1484,9 @@ def _run_full_SDLC_cycle(
 
     # ── Stage: Code (implementation) ────────────────────────────────────
     if "code" not in completed:
+        map_models = config.get("consensus_models") if config.get("llm_mode") == "consensus" else None
+        repo_map = _repo_map(query, config, map_models)
+        existing_code = relevant_code(query, Path.cwd()) or "(no matching code yet)"
         implementation_prompt = textwrap.dedent(
             f"""
             BUILD the requested product NOW by creating actual files in this repository.
@@ -1470,6 +1497,12 @@ def _run_full_SDLC_cycle(
             SDLC planning context:
             {_stage_context(query)}
 
+            Existing repository map:
+            {repo_map}
+
+            Existing code most relevant to the request (BM25-ranked):
+            {existing_code}
+
             CRITICAL INSTRUCTIONS — you MUST follow these:
             1. Use the Write tool to create each source file. Do NOT describe code — write it to files.
             2. Use the Bash tool to run shell commands (e.g. npm init, pip install, mkdir).
@@ -2176,6 +2209,34 @@ def cmd_status(_args: str, state: AgentState, config: dict) -> bool:
     print(f"Messages: {len(state.messages)}")
     print(f"Tokens in/out: {state.total_input_tokens}/{state.total_output_tokens}")
     print(f"Plan mode: {config.get('permission_mode') == 'plan'}")
+    jobs = list_jobs()
+    if jobs:
+        print(f"Background jobs ({sum(1 for j in jobs if j.status == 'running')} running):")
+        for job in jobs:
+            print(f"  {describe_job(job)}")
+    metrics = get_tool_metrics()
+    if metrics:
+        print("Tool latency (p50/p95/max):")
+        for name, m in list(metrics.items())[:10]:
+            extra = "".join([
+                f", {m['errors']} errors" if m["errors"] else "",
+                f", {m['cached']} cached" if m["cached"] else "",
+                f", {m['timeouts']} timed out" if m["timeouts"] else "",
+            ])
+            print(f"  {name}: {m['calls']} calls, {m['p50_ms']:.0f}/{m['p95_ms']:.0f}/{m['max_ms']:.0f} ms{extra}")
+    input_stats = get_tool_input_stats()
+    if input_stats:
+        print("Tool inputs by model:")
+        for model, s in input_stats.items():
+            print(
+                f"  {model or '(unknown)'}: {s['calls']} calls, {s['repaired']} repaired, "
+                f"{s['rejected']} rejected, {s['errors']} failed (retry rate {s['retry_rate']:.0%})"
+            )
+    output_stats = get_output_stats()
+    before = sum(s["tokens_before"] for s in output_stats.values())
+    after = sum(s["tokens_after"] for s in output_stats.values())
+    if before:
+        print(f"Tool output: ~{before:,} -> ~{after:,} tokens ({1 - after / before:.0%} saved by normalising/truncating)")
     return True
 
 
@@ -2192,6 +2253,14 @@ def cmd_doctor(_args: str, _state: AgentState, config: dict) -> bool:
             err(f"{endpoint}: unreachable or no models at {base_url}/api/tags")
     info(f"Skills: {len(load_skills())}")
     info(f"MCP configs: {len(load_mcp_configs())}")
+    build_system_prompt(config)
+    stats = get_prompt_cache_stats()
+    info(
+        f"System prompt: last build {stats['last_ms']:.1f} ms, avg {stats['avg_ms']:.1f} ms "
+        f"({stats['builds']} rebuilt, {stats['reuses']} reused)"
+    )
+    for name, section in stats["sections"].items():
+        info(f"  {name}: {section['hit_rate']:.0%} cache hits ({section['hits']}/{section['hits'] + section['misses']})")
     return True
 
 
@@ -2336,6 +2405,7 @@ def main() -> int:
     config["_session_id"] = session_id
     ckpt.set_session(session_id)
     ckpt.make_snapshot(session_id, state, config, "(initial state)")
+    cleanup_old_blobs()
 
     global _active_state, _active_config
     _active_state = state
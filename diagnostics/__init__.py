@@ -0,0 +1,22 @@
+"""Cached, batched diagnostics for the GetDiagnostics tool."""
+from .service import (
+    CHECKERS,
+    Checker,
+    clear_diagnostics_cache,
+    detect_language,
+    diagnose,
+    get_diagnostics_stats,
+    has_command,
+    select_checker,
+)
+
+__all__ = [
+    "CHECKERS",
+    "Checker",
+    "clear_diagnostics_cache",
+    "detect_language",
+    "diagnose",
+    "get_diagnostics_stats",
+    "has_command",
+    "select_checker",
+]
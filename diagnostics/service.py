@@ -0,0 +1,355 @@
+"""Diagnostics service behind the GetDiagnostics tool.
+
+- Checker availability is probed once per process (``shutil.which``), so a
+  missing pyright no longer costs a failed spawn on every call.
+- Results are cached per file, keyed on the checker, the file's content hash
+  and the mtimes of the project's checker config files; unchanged files are
+  answered without running anything.
+- All uncached files of one language are checked in a single invocation and
+  the output is split back per file, matching absolute and cwd-relative
+  paths. Output that matches no file is returned as-is and not cached.
+- Daemon front-ends are used when installed: ``dmypy`` instead of ``mypy``
+  and ``eslint_d`` instead of ``eslint``. (pyright's ``--watch`` mode has no
+  request/response interface, so pyright runs as a batch.)
+"""
+from __future__ import annotations
+
+import atexit
+import functools
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+MAX_OUTPUT_PER_FILE = 3000
+MAX_ISSUES_PER_FILE = 50
+CHECK_TIMEOUT = 120
+CACHE_SIZE = 512
+UNATTRIBUTED = "(output not matched to a file)"
+_SUMMARY_PREFIXES = ("Success:", "Found ", "Checked ")
+
+LANGUAGES = {
+    ".py": "python",
+    ".js": "javascript", ".mjs": "javascript", ".cjs": "javascript",
+    ".ts": "typescript", ".tsx": "typescript",
+    ".sh": "shellscript", ".bash": "shellscript", ".zsh": "shellscript",
+}
+
+CONFIG_FILES = {
+    "python": ("pyproject.toml", "setup.cfg", "mypy.ini", ".mypy.ini", "pyrightconfig.json", ".flake8", "tox.ini"),
+    "javascript": ("package.json", "tsconfig.json", "jsconfig.json", ".eslintrc", ".eslintrc.js",
+                   ".eslintrc.json", ".eslintrc.cjs", "eslint.config.js", "eslint.config.mjs"),
+    "shellscript": (".shellcheckrc",),
+}
+CONFIG_FILES["typescript"] = CONFIG_FILES["javascript"]
+
+
+def detect_language(file_path: str) -> str:
+    return LANGUAGES.get(Path(file_path).suffix.lower(), "unknown")
+
+
+@functools.lru_cache(maxsize=None)
+def has_command(name: str) -> bool:
+    """Whether *name* is on PATH (probed once per process)."""
+    return shutil.which(name) is not None
+
+
+def _run(cmd: list, timeout: int = CHECK_TIMEOUT) -> tuple:
+    """Run a checker; returns (returncode, combined output). -1 = could not run."""
+    try:
+        r = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout,
+                           cwd=os.getcwd(), stdin=subprocess.DEVNULL)
+        return r.returncode, (r.stdout + ("\n" + r.stderr if r.stderr else "")).strip()
+    except FileNotFoundError:
+        return -1, f"(command not found: {cmd[0]})"
+    except subprocess.TimeoutExpired:
+        return -1, f"(timed out after {timeout}s)"
+    except Exception as e:
+        return -1, f"(error: {e})"
+
+
+def _path_forms(path: str) -> list:
+    """Spellings a checker may print for *path*: absolute, cwd-relative, ./-relative."""
+    forms = [path]
+    try:
+        rel = os.path.relpath(path)
+    except ValueError:          # other drive on Windows
+        rel = None
+    if rel and not rel.startswith(".."):
+        forms += [rel, f".{os.sep}{rel}"]
+        if os.sep != "/":
+            forms += [rel.replace(os.sep, "/"), f"./{rel.replace(os.sep, '/')}"]
+    return forms
+
+
+def _split_by_file(output: str, files: list) -> tuple:
+    """Attribute ``path:line...`` / ``path(line,col)...`` lines to the files they start with.
+
+    Returns ``({file: [lines]}, [unattributed lines])``; summary lines are dropped.
+    """
+    per_file = {f: [] for f in files}
+    prefixes = sorted(((form, f) for f in files for form in _path_forms(f)), key=lambda x: len(x[0]), reverse=True)
+    rest = []
+    for line in output.splitlines():
+        for form, f in prefixes:
+            if line.startswith(form) and line[len(form):len(form) + 1] in (":", "("):
+                per_file[f].append(line)
+                break
+        else:
+            if line.strip() and not line.startswith(_SUMMARY_PREFIXES):
+                rest.append(line)
+    return per_file, rest
+
+
+def _text_results(label: str, clean: str, output: str, files: list) -> dict:
+    """Per-file results from a batch checker's line output.
+
+    When nothing could be attributed but the checker printed something, the
+    raw output is returned (marked ``UNATTRIBUTED`` and never cached) rather
+    than a false "no diagnostics".
+    """
+    per_file, rest = _split_by_file(output, files)
+    attributed = any(per_file.values())
+    results = {}
+    for f, lines in per_file.items():
+        if lines:
+            results[f] = f"{label}:\n" + "\n".join(lines)[:MAX_OUTPUT_PER_FILE]
+        elif rest and (len(files) == 1 or not attributed):
+            results[f] = f"{label} {UNATTRIBUTED}:\n" + "\n".join(rest)[:MAX_OUTPUT_PER_FILE]
+        else:
+            results[f] = f"{label}: {clean}"
+    return results
+
+
+# ── Checkers ────────────────────────────────────────────────────────────────
+
+@dataclass
+class Checker:
+    name: str
+    command: str                         # binary probed with has_command
+    run: Callable[[list], dict]          # absolute paths -> {path: result text}
+    batch: bool = True
+
+
+def _pyright(files: list) -> dict:
+    rc, out = _run(["pyright", "--outputjson", *files])
+    try:
+        data = json.loads(out)
+    except json.JSONDecodeError:
+        # Timed out, crashed or printed no report: show why, and never cache it
+        failure = out[:MAX_OUTPUT_PER_FILE] or f"(exit code {rc}, no output)"
+        return {f: f"pyright {UNATTRIBUTED}:\n{failure}" for f in files}
+    grouped = {f: [] for f in files}
+    for d in data.get("generalDiagnostics", []):
+        target = os.path.normcase(os.path.abspath(d.get("file", "")))
+        for f in files:
+            if os.path.normcase(f) == target:
+                grouped[f].append(d)
+                break
+    results = {}
+    for f, diags in grouped.items():
+        if not diags:
+            results[f] = "pyright: no diagnostics"
+            continue
+        lines = [f"pyright ({len(diags)} issue(s)):"]
+        for d in diags[:MAX_ISSUES_PER_FILE]:
+            rng = d.get("range", {}).get("start", {})
+            rule = d.get("rule", "")
+            lines.append(f"  {rng.get('line', 0) + 1}:{rng.get('character', 0) + 1} "
+                         f"[{d.get('severity', 'error')}] {d.get('message', '')}"
+                         + (f" ({rule})" if rule else ""))
+        results[f] = "\n".join(lines)
+    return results
+
+
+_dmypy_started = False
+
+
+def _stop_dmypy() -> None:
+    if _dmypy_started:
+        _run(["dmypy", "stop"], timeout=10)
+
+
+def _mypy(files: list) -> dict:
+    global _dmypy_started
+    label = "mypy"
+    rc, out = -1, ""
+    if has_command("dmypy"):
+        rc, out = _run(["dmypy", "run", "--", "--no-error-summary", *files])
+        if rc in (0, 1):
+            if not _dmypy_started:
+                _dmypy_started = True
+                atexit.register(_stop_dmypy)
+            label = "mypy (daemon)"
+            out = "\n".join(l for l in out.splitlines() if not l.startswith(("Daemon ", "Restarting")))
+    if rc not in (0, 1):
+        rc, out = _run(["mypy", "--no-error-summary", *files])
+    return _text_results(label, "no diagnostics", out, files)
+
+
+def _flake8(files: list) -> dict:
+    _, out = _run(["flake8", *files])
+    return _text_results("flake8", "no diagnostics", out, files)
+
+
+def _py_compile(files: list) -> dict:
+    results = {}
+    for f in files:
+        _, out = _run([sys.executable, "-m", "py_compile", f])
+        results[f] = (f"py_compile (syntax check):\n{out}" if out
+                      else "py_compile: syntax OK (no further tools available)")
+    return results
+
+
+def _tsc(files: list) -> dict:
+    _, out = _run(["tsc", "--noEmit", "--strict", *files])
+    return _text_results("tsc", "no errors", out, files)
+
+
+def _eslint_with(binary: str) -> Callable[[list], dict]:
+    def run(files: list) -> dict:
+        _, out = _run([binary, "--format", "unix", *files])
+        return _text_results(binary, "no issues", out, files)
+    return run
+
+
+def _shellcheck(files: list) -> dict:
+    _, out = _run(["shellcheck", "-f", "gcc", *files])
+    return _text_results("shellcheck", "no issues", out, files)
+
+
+def _bash_n(files: list) -> dict:
+    results = {}
+    for f in files:
+        _, out = _run(["bash", "-n", f])
+        results[f] = f"bash -n (syntax check):\n{out}" if out else "bash -n: syntax OK"
+    return results
+
+
+# Preference order per language; the first installed checker is used.
+CHECKERS = {
+    "python": [
+        Checker("pyright", "pyright", _pyright),
+        Checker("mypy", "mypy", _mypy),
+        Checker("flake8", "flake8", _flake8),
+        Checker("py_compile", "", _py_compile, batch=False),
+    ],
+    "javascript": [
+        Checker("tsc", "tsc", _tsc),
+        Checker("eslint_d", "eslint_d", _eslint_with("eslint_d")),
+        Checker("eslint", "eslint", _eslint_with("eslint")),
+    ],
+    "shellscript": [
+        Checker("shellcheck", "shellcheck", _shellcheck),
+        Checker("bash -n", "bash", _bash_n, batch=False),
+    ],
+}
+CHECKERS["typescript"] = CHECKERS["javascript"]
+
+_NO_CHECKER = {
+    "javascript": "No TypeScript/JavaScript checker found (install tsc or eslint)",
+    "typescript": "No TypeScript/JavaScript checker found (install tsc or eslint)",
+}
+
+
+def select_checker(language: str) -> Optional[Checker]:
+    for checker in CHECKERS.get(language, []):
+        if not checker.command or has_command(checker.command):
+            return checker
+    return None
+
+
+# ── Cache ───────────────────────────────────────────────────────────────────
+
+_cache: "OrderedDict[tuple, str]" = OrderedDict()
+_cache_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "runs": 0}
+
+
+def _config_stamp(language: str) -> tuple:
+    root = Path.cwd()
+    stamp = []
+    for name in CONFIG_FILES.get(language, ()):
+        try:
+            stamp.append((name, (root / name).stat().st_mtime_ns))
+        except OSError:
+            continue
+    return tuple(stamp)
+
+
+def _content_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def get_diagnostics_stats() -> dict:
+    with _cache_lock:
+        return dict(_stats, cached=len(_cache))
+
+
+def clear_diagnostics_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+        _stats.update(hits=0, misses=0, runs=0)
+
+
+# ── Entry point ─────────────────────────────────────────────────────────────
+
+def diagnose(file_paths: list, language: Optional[str] = None) -> dict:
+    """Return ``{file_path: diagnostics text}`` for *file_paths* (as given)."""
+    results: dict = {}
+    groups: dict = {}
+    for fp in file_paths:
+        p = Path(fp)
+        if not p.exists():
+            results[fp] = f"Error: file not found: {fp}"
+            continue
+        lang = language or detect_language(fp)
+        groups.setdefault(lang, []).append((fp, str(p.resolve())))
+
+    for lang, items in groups.items():
+        checker = select_checker(lang)
+        if checker is None:
+            for fp, _ in items:
+                suffix = Path(fp).suffix
+                results[fp] = _NO_CHECKER.get(
+                    lang, f"No diagnostic tool available for language: {lang or 'unknown'} (ext: {suffix})")
+            continue
+        stamp = _config_stamp(lang)
+        pending = []
+        for fp, abs_path in items:
+            key = (checker.name, abs_path, _content_hash(abs_path), stamp)
+            with _cache_lock:
+                cached = _cache.get(key)
+                if cached is not None:
+                    _cache.move_to_end(key)
+                    _stats["hits"] += 1
+            if cached is not None:
+                results[fp] = cached
+            else:
+                pending.append((fp, abs_path, key))
+        if not pending:
+            continue
+        unique = list(dict.fromkeys(abs_path for _, abs_path, _ in pending))
+        with _cache_lock:
+            _stats["misses"] += len(pending)
+            _stats["runs"] += 1 if checker.batch else len(unique)
+        fresh = checker.run(unique)
+        for fp, abs_path, key in pending:
+            text = fresh.get(abs_path, f"{checker.name}: no output")
+            results[fp] = text
+            if UNATTRIBUTED in text:
+                continue    # may belong to another file or be a checker failure; rerun next time
+            with _cache_lock:
+                _cache[key] = text
+                _cache.move_to_end(key)
+                while len(_cache) > CACHE_SIZE:
+                    _cache.popitem(last=False)
+    return results
@@ -0,0 +1,16 @@
+"""File operations for the built-in tools: ranged reads, bounded diffs, atomic writes, read history."""
+from .reader import (
+    MAX_READ_BYTES,
+    read_lines,
+    get_line_index_stats,
+    clear_line_index_cache,
+)
+from .diff import unified_diff, truncate_diff
+from .atomic import atomic_write_text
+from .history import ReadSnapshot, get_read_history, clear_read_history, diff_since
+
+__all__ = [
+    "MAX_READ_BYTES", "read_lines", "get_line_index_stats", "clear_line_index_cache",
+    "unified_diff", "truncate_diff", "atomic_write_text",
+    "ReadSnapshot", "get_read_history", "clear_read_history", "diff_since",
+]
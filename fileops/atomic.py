@@ -0,0 +1,56 @@
+"""Crash-safe file writes: write a sibling temp file, fsync, then rename over the target."""
+from __future__ import annotations
+
+import os
+import stat
+from pathlib import Path
+
+_TEMP_FLAGS = (os.O_WRONLY | os.O_CREAT | os.O_EXCL
+               | getattr(os, "O_NOFOLLOW", 0) | getattr(os, "O_BINARY", 0))
+
+
+def _create_temp(target: Path) -> tuple:
+    """Create a new sibling temp file; returns ``(fd, path)``.
+
+    Created with mode 0o666 so the kernel applies the process umask; reading
+    the umask would mean briefly changing it for every thread.
+    """
+    while True:
+        tmp = target.parent / f".{target.name}.{os.urandom(6).hex()}.tmp"
+        try:
+            return os.open(tmp, _TEMP_FLAGS, 0o666), str(tmp)
+        except FileExistsError:
+            continue
+
+
+def atomic_write_text(path, content: str, encoding: str = "utf-8") -> None:
+    """Replace *path* with *content* so readers never see a partially written file.
+
+    Line endings are written exactly as given (``newline=""``). Symlinks are
+    followed so the link itself is preserved, and an existing file's
+    permission bits are carried over to the new file.
+    """
+    target = Path(path)
+    if target.is_symlink():
+        target = target.resolve()
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        mode = stat.S_IMODE(target.stat().st_mode)
+    except FileNotFoundError:
+        mode = None
+
+    fd, tmp = _create_temp(target)
+    try:
+        with os.fdopen(fd, "w", encoding=encoding, newline="") as handle:
+            handle.write(content)
+            handle.flush()
+            os.fsync(handle.fileno())
+        if mode is not None:
+            os.chmod(tmp, mode)
+        os.replace(tmp, target)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,81 @@
+"""Size-aware unified diffs for Write/Edit/MultiEdit results.
+
+``difflib`` is quadratic in the worst case and was run over the whole file on
+every write. Here the common leading and trailing lines are stripped first
+(in C, via ``os.path.commonprefix``), so a localised edit to a huge file only
+diffs the changed window. If the changed window itself is large, or the file
+is beyond ``SUMMARY_ONLY_CHARS``, only a one-line summary is produced.
+"""
+from __future__ import annotations
+
+import difflib
+import os
+import re
+
+FULL_DIFF_MAX_LINES = 5000          # changed-window size above which we only summarise
+SUMMARY_ONLY_CHARS = 8 * 1024 * 1024
+
+_HUNK_RE = re.compile(r"^@@ -(\d+)(,\d+)? \+(\d+)(,\d+)? @@", re.MULTILINE)
+
+
+def _common_suffix_len(a: list, b: list, limit: int) -> int:
+    n = len(os.path.commonprefix([a[::-1][:limit], b[::-1][:limit]]))
+    return n
+
+
+def _summary(filename: str, old_lines: int, new_lines: int, first: int = None,
+             last_old: int = None, last_new: int = None) -> str:
+    text = f"[diff omitted for {filename}: {old_lines} -> {new_lines} lines"
+    if first is not None:
+        text += f"; changes within old lines {first + 1}-{last_old}, new lines {first + 1}-{last_new}"
+    return text + "]\n"
+
+
+def unified_diff(old: str, new: str, filename: str, context_lines: int = 3, line_offset: int = 0) -> str:
+    """Unified diff of *old* -> *new*, or a summary line when too large to diff cheaply.
+
+    *line_offset* is added to hunk line numbers when the texts are a window
+    starting that many lines into the file.
+    """
+    if old == new:
+        return ""
+    if len(old) + len(new) > SUMMARY_ONLY_CHARS:
+        return _summary(filename, old.count("\n"), new.count("\n"))
+
+    a = old.splitlines(keepends=True)
+    b = new.splitlines(keepends=True)
+    prefix = len(os.path.commonprefix([a, b]))
+    suffix = _common_suffix_len(a, b, min(len(a), len(b)) - prefix)
+    a_end, b_end = len(a) - suffix, len(b) - suffix
+    if (a_end - prefix) + (b_end - prefix) > FULL_DIFF_MAX_LINES:
+        return _summary(filename, len(a), len(b), prefix, a_end, b_end)
+
+    lo = max(0, prefix - context_lines)
+    a_win = a[lo:min(len(a), a_end + context_lines)]
+    b_win = b[lo:min(len(b), b_end + context_lines)]
+    diff = "".join(difflib.unified_diff(
+        a_win, b_win, fromfile=f"a/{filename}", tofile=f"b/{filename}", n=context_lines))
+    offset = lo + line_offset
+    if not offset:
+        return diff
+
+    def shift(m):
+        # An empty range ("-N,0") names the line before the hunk; shifting is still correct.
+        return f"@@ -{int(m.group(1)) + offset}{m.group(2) or ''} +{int(m.group(3)) + offset}{m.group(4) or ''} @@"
+
+    return _HUNK_RE.sub(shift, diff)
+
+
+def truncate_diff(diff_text: str, max_lines: int = 80, max_chars: int = 12000) -> str:
+    """Bound a diff by line count and total characters."""
+    lines = diff_text.splitlines()
+    if len(lines) <= max_lines and len(diff_text) <= max_chars:
+        return diff_text
+    shown, used = [], 0
+    for line in lines[:max_lines]:
+        if used + len(line) + 1 > max_chars:
+            break
+        shown.append(line)
+        used += len(line) + 1
+    remaining = len(lines) - len(shown)
+    return "\n".join(shown) + f"\n\n[... {remaining} more lines ...]"
@@ -0,0 +1,92 @@
+"""Per-session memory of what Read returned, for ``since_last_read`` re-reads.
+
+After an Edit or a formatter run, models re-Read whole files to see the new
+state and pay again for every line they already have in context. The Read
+tool records the exact text it returned for each path (and the line window it
+covered); a later ``since_last_read`` Read of the same window returns only a
+unified diff against that text, or a one-line "no changes".
+
+Histories are bounded per session by file count and total characters and
+evicted least-recently-read first.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from .diff import unified_diff
+
+MAX_FILES_PER_SESSION = 128
+MAX_CHARS_PER_SESSION = 16 * 1024 * 1024
+
+
+@dataclass
+class ReadSnapshot:
+    text: str                   # raw lines returned, without line-number prefixes
+    start: int                  # 0-indexed first line of the window
+    limit: Optional[int]        # requested line limit (None: to end of file)
+
+
+class ReadHistory:
+    def __init__(self):
+        self._snapshots: "OrderedDict[str, ReadSnapshot]" = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> Optional[ReadSnapshot]:
+        with self._lock:
+            return self._snapshots.get(path)
+
+    def remember(self, path: str, snapshot: ReadSnapshot) -> None:
+        with self._lock:
+            old = self._snapshots.pop(path, None)
+            if old is not None:
+                self._chars -= len(old.text)
+            self._snapshots[path] = snapshot
+            self._chars += len(snapshot.text)
+            while len(self._snapshots) > 1 and (
+                len(self._snapshots) > MAX_FILES_PER_SESSION or self._chars > MAX_CHARS_PER_SESSION
+            ):
+                _, evicted = self._snapshots.popitem(last=False)
+                self._chars -= len(evicted.text)
+
+    def forget(self, path: str) -> None:
+        with self._lock:
+            old = self._snapshots.pop(path, None)
+            if old is not None:
+                self._chars -= len(old.text)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"files": len(self._snapshots), "chars": self._chars}
+
+
+_histories: Dict[str, ReadHistory] = {}
+_histories_lock = threading.Lock()
+
+
+def get_read_history(session_id: str = "default") -> ReadHistory:
+    with _histories_lock:
+        history = _histories.get(session_id)
+        if history is None:
+            history = _histories[session_id] = ReadHistory()
+        return history
+
+
+def clear_read_history(session_id: str = None) -> None:
+    with _histories_lock:
+        if session_id is None:
+            _histories.clear()
+        else:
+            _histories.pop(session_id, None)
+
+
+def diff_since(previous: ReadSnapshot, text: str, filename: str) -> str:
+    """Unified diff from the remembered window to *text*, with file line numbers.
+
+    Returns "" when unchanged; ``unified_diff``'s "[diff omitted ...]" summary
+    when the change is too large to diff cheaply.
+    """
+    return unified_diff(previous.text, text, filename, line_offset=previous.start)
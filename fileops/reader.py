@@ -0,0 +1,134 @@
+"""Ranged, memory-mapped file reads backed by a cached line-offset index.
+
+The first read of a file counts newlines chunk by chunk (``CHUNK_BYTES`` at a
+time) and records the cumulative line count at every chunk boundary. The
+index is cached on ``(path, mtime_ns, size)``, so later pages locate their
+start line with a bisect plus one split inside a single chunk and then read
+only the requested byte range from the mapping.
+
+Lines are split on ``\\n``; ``\\r`` is kept as part of the line, matching a
+``newline=""`` text read.
+"""
+from __future__ import annotations
+
+import mmap
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+CHUNK_BYTES = 64 * 1024
+MAX_READ_BYTES = 256 * 1024     # cap on the bytes returned by one Read call
+BINARY_PROBE_BYTES = 8192
+INDEX_CACHE_SIZE = 64
+
+
+@dataclass
+class LineIndex:
+    mtime_ns: int
+    size: int
+    newlines_before: array      # newlines_before[i] = count of "\n" in chunks [0, i)
+    trailing_partial: bool      # last line has no terminating "\n"
+
+    @property
+    def line_count(self) -> int:
+        return self.newlines_before[-1] + (1 if self.trailing_partial else 0)
+
+    def line_start(self, mm, line: int) -> int:
+        """Byte offset where 0-based *line* starts (``size`` if past the end)."""
+        if line <= 0:
+            return 0
+        if line > self.newlines_before[-1]:
+            return self.size
+        chunk = bisect_left(self.newlines_before, line) - 1
+        k = line - self.newlines_before[chunk]
+        lo = chunk * CHUNK_BYTES
+        data = mm[lo:min(lo + CHUNK_BYTES, self.size)]
+        rest = data.split(b"\n", k)[-1]
+        return lo + len(data) - len(rest)
+
+
+_index_cache: "OrderedDict[str, LineIndex]" = OrderedDict()
+_index_lock = threading.Lock()
+_index_stats = {"builds": 0, "hits": 0}
+
+
+def _build_index(mm, size: int, mtime_ns: int) -> LineIndex:
+    counts = array("Q", [0])
+    total = 0
+    for lo in range(0, size, CHUNK_BYTES):
+        total += mm[lo:lo + CHUNK_BYTES].count(b"\n")
+        counts.append(total)
+    trailing = size > 0 and mm[size - 1:size] != b"\n"
+    return LineIndex(mtime_ns=mtime_ns, size=size, newlines_before=counts, trailing_partial=trailing)
+
+
+def get_line_index(path: Path, mm, size: int, mtime_ns: int) -> LineIndex:
+    key = str(path)
+    with _index_lock:
+        cached = _index_cache.get(key)
+        if cached is not None and cached.mtime_ns == mtime_ns and cached.size == size:
+            _index_cache.move_to_end(key)
+            _index_stats["hits"] += 1
+            return cached
+    index = _build_index(mm, size, mtime_ns)
+    with _index_lock:
+        _index_cache[key] = index
+        _index_cache.move_to_end(key)
+        while len(_index_cache) > INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+        _index_stats["builds"] += 1
+    return index
+
+
+def get_line_index_stats() -> dict:
+    with _index_lock:
+        return dict(_index_stats, cached=len(_index_cache))
+
+
+def clear_line_index_cache() -> None:
+    with _index_lock:
+        _index_cache.clear()
+        _index_stats.update(builds=0, hits=0)
+
+
+def is_binary(sample: bytes) -> bool:
+    return b"\0" in sample
+
+
+def read_lines(path, offset: int = 0, limit: Optional[int] = None,
+               max_bytes: int = MAX_READ_BYTES) -> dict:
+    """Read lines ``[offset, offset + limit)`` of *path*.
+
+    Returns a dict with ``lines`` (decoded, line endings kept), ``start``
+    (0-based line of the first returned line), ``total`` (line count),
+    ``truncated`` (byte cap hit) and ``binary``.
+    """
+    p = Path(path)
+    st = p.stat()
+    result = {"lines": [], "start": max(0, offset or 0), "total": 0, "truncated": False, "binary": False}
+    if st.st_size == 0:
+        return result
+    with open(p, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        size = len(mm)
+        if is_binary(mm[:BINARY_PROBE_BYTES]):
+            result["binary"] = True
+            return result
+        index = get_line_index(p, mm, size, st.st_mtime_ns)
+        result["total"] = index.line_count
+        start_line = result["start"]
+        begin = index.line_start(mm, start_line)
+        end = size if not limit else index.line_start(mm, start_line + limit)
+        if end - begin > max_bytes:
+            cut = mm.rfind(b"\n", begin, begin + max_bytes)
+            # Always return at least one (possibly partial) line.
+            end = cut + 1 if cut >= begin else begin + max_bytes
+            result["truncated"] = True
+        data = mm[begin:end]
+    text = data.decode("utf-8", errors="replace")
+    parts = text.split("\n")
+    result["lines"] = [part + "\n" for part in parts[:-1]] + ([parts[-1]] if parts[-1] else [])
+    return result
@@ -103,6 +103,16 @@ def tools_to_ollama(tool_schemas: list[dict]) -> list[dict]:
     ]
 
 
+def _cached_tools_payload(tool_schemas: list[dict]) -> list[dict]:
+    """``tools_to_ollama`` built once per registry version for a given schema list."""
+    from tool_registry import cached_for_version
+
+    schemas = tuple(tool_schemas)
+    # The cached value keeps the schema objects alive, so their ids stay unique.
+    key = ("ollama-tools", tuple(id(schema) for schema in schemas))
+    return cached_for_version(key, lambda: (schemas, tools_to_ollama(list(schemas))))[1]
+
+
 def messages_to_ollama(messages: list) -> list[dict]:
     result = []
     for message in messages:
@@ -263,7 +273,7 @@ def stream_ollama(
         "options": {"num_ctx": config.get("context_limit", PROVIDERS[provider_name]["context_limit"])},
     }
     if tool_schemas and not config.get("no_tools"):
-        payload["tools"] = tools_to_ollama(tool_schemas)
+        payload["tools"] = _cached_tools_payload(tool_schemas)
 
     url = f"{base_url}/api/chat"
 
@@ -333,7 +343,7 @@ def stream_ollama(
                     {
                         "id": f"call_{len(tool_calls)}",
                         "name": function.get("name", ""),
-                        "input": function.get("arguments", {}) or {},
+                        "input": _tool_arguments(function.get("arguments")),
                     }
                 )
 
@@ -344,6 +354,16 @@ def stream_ollama(
     yield AssistantTurn(text, tool_calls, in_tokens, out_tokens)
 
 
+def _tool_arguments(arguments):
+    """Tool-call arguments as a dict; some models send them as JSON text."""
+    if isinstance(arguments, str):
+        try:
+            return json.loads(arguments)
+        except ValueError:
+            return arguments   # left for tool input validation to report
+    return arguments or {}
+
+
 def stream(
     model: str,
     system: str,
@@ -0,0 +1,11 @@
+"""Shell execution helpers for the Bash tools."""
+from .procs import kill_proc_tree, new_group_kwargs
+from .capture import BoundedCapture, run_captured
+from .session import PersistentShell, get_shell, close_shell, close_all_shells
+from .jobs import start_job, get_job, list_jobs, read_output, kill_job, describe_job
+
+__all__ = [
+    "kill_proc_tree", "new_group_kwargs", "BoundedCapture", "run_captured",
+    "PersistentShell", "get_shell", "close_shell", "close_all_shells",
+    "start_job", "get_job", "list_jobs", "read_output", "kill_job", "describe_job",
+]
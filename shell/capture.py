@@ -0,0 +1,119 @@
+"""Constant-memory capture of subprocess output.
+
+Each stream is read on its own thread into a :class:`BoundedCapture`, which
+keeps the first ``head`` bytes and a ring of the last ``tail`` bytes and only
+counts what falls in between. A command that prints hundreds of megabytes
+therefore costs a few dozen kilobytes, and when a command times out the
+output captured so far is still returned.
+"""
+from __future__ import annotations
+
+import os
+import subprocess
+import threading
+from typing import Optional
+
+from .procs import kill_proc_tree, new_group_kwargs
+
+STDOUT_HEAD = 16_000
+STDOUT_TAIL = 16_000
+STDERR_HEAD = 4_000
+STDERR_TAIL = 8_000
+READ_CHUNK = 64 * 1024
+
+
+class BoundedCapture:
+    """Head buffer + tail ring buffer with a count of the bytes dropped in between."""
+
+    def __init__(self, head: int = STDOUT_HEAD, tail: int = STDOUT_TAIL):
+        self.head_limit = head
+        self.tail_limit = tail
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.dropped = 0
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def feed(self, data: bytes) -> None:
+        with self._lock:
+            self.total += len(data)
+            room = self.head_limit - len(self.head)
+            if room > 0:
+                self.head += data[:room]
+                data = data[room:]
+            if not data:
+                return
+            self.tail += data
+            overflow = len(self.tail) - self.tail_limit
+            if overflow > 0:
+                del self.tail[:overflow]
+                self.dropped += overflow
+
+    def text(self) -> str:
+        with self._lock:
+            head = self.head.decode("utf-8", errors="replace")
+            tail = self.tail.decode("utf-8", errors="replace")
+            dropped = self.dropped
+        if not dropped:
+            return head + tail
+        return f"{head}\n\n[... {dropped:,} bytes omitted ...]\n\n{tail}"
+
+
+def pump(stream, capture: BoundedCapture) -> None:
+    """Copy *stream* into *capture* until EOF (run on a reader thread)."""
+    try:
+        while True:
+            chunk = stream.read1(READ_CHUNK) if hasattr(stream, "read1") else stream.read(READ_CHUNK)
+            if not chunk:
+                break
+            capture.feed(chunk)
+    except (OSError, ValueError):
+        pass
+    finally:
+        try:
+            stream.close()
+        except OSError:
+            pass
+
+
+def format_output(stdout: str, stderr: str) -> str:
+    out = stdout
+    if stderr:
+        out += ("\n" if out else "") + "[stderr]\n" + stderr
+    return out.strip()
+
+
+def run_captured(command: str, timeout: float, cwd: Optional[str] = None) -> tuple:
+    """Run *command* through the shell with bounded capture.
+
+    Returns ``(returncode, output)``; on timeout the process tree is killed
+    and ``(124, message + partial output)`` is returned.
+    """
+    proc = subprocess.Popen(
+        command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        stdin=subprocess.DEVNULL, cwd=cwd or os.getcwd(), **new_group_kwargs(),
+    )
+    out_cap = BoundedCapture(STDOUT_HEAD, STDOUT_TAIL)
+    err_cap = BoundedCapture(STDERR_HEAD, STDERR_TAIL)
+    readers = [
+        threading.Thread(target=pump, args=(proc.stdout, out_cap), daemon=True),
+        threading.Thread(target=pump, args=(proc.stderr, err_cap), daemon=True),
+    ]
+    for t in readers:
+        t.start()
+    try:
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        kill_proc_tree(proc.pid)
+        proc.wait()
+        for t in readers:
+            t.join(timeout=2)
+        partial = format_output(out_cap.text(), err_cap.text())
+        message = f"Error: timed out after {timeout}s (process killed)"
+        if partial:
+            message += f"\n[partial output]\n{partial}"
+        return 124, message
+    for t in readers:
+        # Grandchildren that inherited the pipes can keep them open; don't hang on them.
+        t.join(timeout=5)
+    return proc.returncode, format_output(out_cap.text(), err_cap.text()) or "(no output)"
@@ -0,0 +1,149 @@
+"""Background shell jobs (BashBackground / BashOutput / BashKill).
+
+Each job runs detached in its own process group with stdout and stderr
+appended to a log file, so the agent turn returns immediately and output is
+never held in memory. ``read_output`` returns only what was written since the
+previous poll, bounded to ``MAX_POLL_CHARS`` (the newest output wins when a
+poll would be larger).
+"""
+from __future__ import annotations
+
+import atexit
+import itertools
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from .procs import kill_proc_tree, new_group_kwargs
+
+MAX_RUNNING_JOBS = 8
+MAX_POLL_CHARS = 16_000
+
+
+@dataclass
+class Job:
+    id: str
+    command: str
+    cwd: str
+    log_path: Path
+    proc: subprocess.Popen
+    started: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+    killed: bool = False
+    read_offset: int = 0
+
+    @property
+    def returncode(self) -> Optional[int]:
+        return self.proc.poll()
+
+    @property
+    def status(self) -> str:
+        code = self.returncode
+        if code is None:
+            return "running"
+        if self.finished is None:
+            self.finished = time.time()
+        if self.killed:
+            return "killed"
+        return f"exited ({code})"
+
+    @property
+    def runtime(self) -> float:
+        return (self.finished or time.time()) - self.started
+
+
+_jobs: dict[str, Job] = {}
+_jobs_lock = threading.Lock()
+_ids = itertools.count(1)
+_log_dir: Optional[Path] = None
+
+
+def _logs() -> Path:
+    global _log_dir
+    if _log_dir is None:
+        _log_dir = Path(tempfile.mkdtemp(prefix="dc-jobs-"))
+    return _log_dir
+
+
+def start_job(command: str, cwd: Optional[str] = None) -> Job:
+    """Start *command* detached; raises RuntimeError when too many jobs are running."""
+    with _jobs_lock:
+        running = sum(1 for j in _jobs.values() if j.returncode is None)
+        if running >= MAX_RUNNING_JOBS:
+            raise RuntimeError(f"{running} background jobs already running (limit {MAX_RUNNING_JOBS}); "
+                               "kill one with BashKill first")
+        job_id = f"bg{next(_ids)}"
+        log_path = _logs() / f"{job_id}.log"
+        cwd = cwd or os.getcwd()
+        with open(log_path, "wb") as log:
+            proc = subprocess.Popen(
+                command, shell=True, stdout=log, stderr=subprocess.STDOUT,
+                stdin=subprocess.DEVNULL, cwd=cwd, **new_group_kwargs(),
+            )
+        job = Job(id=job_id, command=command, cwd=cwd, log_path=log_path, proc=proc)
+        _jobs[job_id] = job
+        return job
+
+
+def get_job(job_id: str) -> Optional[Job]:
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def list_jobs() -> list:
+    with _jobs_lock:
+        return list(_jobs.values())
+
+
+def read_output(job: Job, max_chars: int = MAX_POLL_CHARS) -> str:
+    """Output written since the last call (incremental), bounded to *max_chars*."""
+    try:
+        size = job.log_path.stat().st_size
+    except OSError:
+        return ""
+    start = job.read_offset
+    if size <= start:
+        return ""
+    skipped = 0
+    if size - start > max_chars:
+        skipped = size - start - max_chars
+        start = size - max_chars
+    with open(job.log_path, "rb") as f:
+        f.seek(start)
+        data = f.read(size - start)
+    job.read_offset = size
+    text = data.decode("utf-8", errors="replace")
+    if skipped:
+        text = f"[... {skipped:,} earlier bytes skipped ...]\n" + text
+    return text
+
+
+def kill_job(job: Job) -> None:
+    if job.returncode is None:
+        job.killed = True
+        kill_proc_tree(job.proc.pid)
+        try:
+            job.proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            pass
+
+
+def describe_job(job: Job) -> str:
+    return f"{job.id}  {job.status:<12} {job.runtime:7.1f}s  {job.command}"
+
+
+def shutdown_jobs() -> None:
+    """Kill running jobs and remove their logs (called at interpreter exit)."""
+    for job in list_jobs():
+        kill_job(job)
+    if _log_dir is not None:
+        shutil.rmtree(_log_dir, ignore_errors=True)
+
+
+atexit.register(shutdown_jobs)
@@ -0,0 +1,32 @@
+"""Process helpers shared by the shell tools: process-group spawning and tree kill."""
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+
+
+def new_group_kwargs() -> dict:
+    """Popen kwargs that put the child in its own process group / session."""
+    if sys.platform == "win32":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    # start_new_session=True is equivalent to setsid but safe in multithreaded code
+    # (preexec_fn=os.setsid can deadlock when other threads hold locks at fork time).
+    return {"start_new_session": True}
+
+
+def kill_proc_tree(pid: int) -> None:
+    """Kill a process and all its children."""
+    if sys.platform == "win32":
+        # taskkill /T kills the entire process tree on Windows
+        subprocess.run(["taskkill", "/F", "/T", "/PID", str(pid)],
+                       capture_output=True)
+    else:
+        import signal
+        try:
+            os.killpg(os.getpgid(pid), signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
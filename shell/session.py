@@ -0,0 +1,225 @@
+"""Opt-in persistent bash session (``bash_persistent`` config key).
+
+One long-lived ``bash`` per agent session keeps ``cd``, exported variables
+and activated virtualenvs between Bash calls. Each command is framed as::
+
+    { <command>
+    } < /dev/null 2> <stderr file>
+    printf '\\n<sentinel> %d %s\\n' "$?" "$PWD"
+
+and stdout is read until the sentinel line, which carries the exit code and
+the new working directory. On timeout the whole process group is killed and
+the shell is respawned lazily in the last known directory; if the command
+itself ends the shell (``exit``), it is respawned the same way.
+"""
+from __future__ import annotations
+
+import atexit
+import os
+import queue
+import secrets
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from .capture import STDERR_HEAD, STDERR_TAIL, STDOUT_HEAD, STDOUT_TAIL, BoundedCapture, format_output
+from .procs import kill_proc_tree, new_group_kwargs
+
+READ_CHUNK = 64 * 1024
+
+
+def is_available() -> bool:
+    return sys.platform != "win32" and shutil.which("bash") is not None
+
+
+def _read_stderr_file(path: Path) -> str:
+    """Bounded read of the per-command stderr file (head + tail)."""
+    cap = BoundedCapture(STDERR_HEAD, STDERR_TAIL)
+    try:
+        size = path.stat().st_size
+        with open(path, "rb") as f:
+            if size <= STDERR_HEAD + STDERR_TAIL:
+                cap.feed(f.read())
+            else:
+                cap.feed(f.read(STDERR_HEAD))
+                cap.dropped = size - STDERR_HEAD - STDERR_TAIL
+                f.seek(size - STDERR_TAIL)
+                cap.tail += f.read()
+    except OSError:
+        return ""
+    return cap.text()
+
+
+class PersistentShell:
+    def __init__(self, cwd: Optional[str] = None):
+        self.cwd = cwd or os.getcwd()
+        self.proc: Optional[subprocess.Popen] = None
+        self.restarts = 0
+        self._chunks: "queue.Queue[bytes]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._tmpdir = Path(tempfile.mkdtemp(prefix="dc-shell-"))
+
+    # ── Lifecycle ───────────────────────────────────────────────────────────
+
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def _spawn(self) -> None:
+        env = dict(os.environ, PS1="", PS2="", TERM="dumb")
+        self.proc = subprocess.Popen(
+            ["bash", "--noprofile", "--norc"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            cwd=self.cwd if os.path.isdir(self.cwd) else None, env=env,
+            **new_group_kwargs(),
+        )
+        self._chunks = queue.Queue()
+        threading.Thread(target=self._pump, args=(self.proc.stdout, self._chunks), daemon=True).start()
+
+    @staticmethod
+    def _pump(stream, chunks: "queue.Queue[bytes]") -> None:
+        try:
+            while True:
+                data = stream.read1(READ_CHUNK)
+                if not data:
+                    break
+                chunks.put(data)
+        except (OSError, ValueError):
+            pass
+        chunks.put(b"")     # EOF marker
+
+    def close(self) -> None:
+        if self.proc is not None:
+            if self.proc.poll() is None:
+                kill_proc_tree(self.proc.pid)
+            try:
+                self.proc.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                pass
+            self.proc = None
+        shutil.rmtree(self._tmpdir, ignore_errors=True)
+
+    # ── Commands ────────────────────────────────────────────────────────────
+
+    def run(self, command: str, timeout: float = 30) -> tuple:
+        """Run *command* in the shell. Returns ``(returncode, output)`` like run_captured."""
+        with self._lock:
+            note = ""
+            if not self.alive():
+                if self.proc is not None:
+                    self.restarts += 1
+                    note = "[shell restarted: environment reset, working directory kept]\n"
+                self._spawn()
+            self._tmpdir.mkdir(parents=True, exist_ok=True)
+            sentinel = f"__DC_DONE_{secrets.token_hex(8)}__"
+            err_file = self._tmpdir / "stderr"
+            script = (
+                f"{{ {command}\n}} < /dev/null 2> '{err_file}'\n"
+                f"printf '\\n{sentinel} %d %s\\n' \"$?\" \"$PWD\"\n"
+            )
+            try:
+                self.proc.stdin.write(script.encode("utf-8"))
+                self.proc.stdin.flush()
+            except (BrokenPipeError, OSError):
+                self.proc = None
+                return 1, "Error: persistent shell is not accepting input; it will be restarted on the next call"
+            code, output = self._collect(sentinel, err_file, timeout)
+            return code, note + output
+
+    def _collect(self, sentinel: str, err_file: Path, timeout: float) -> tuple:
+        marker = ("\n" + sentinel + " ").encode()
+        out = BoundedCapture(STDOUT_HEAD, STDOUT_TAIL)
+        pending = b""           # bytes that might still be the start of the marker
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                out.feed(pending)
+                return self._timeout(out, err_file, timeout)
+            try:
+                data = self._chunks.get(timeout=min(remaining, 0.5))
+            except queue.Empty:
+                continue
+            if not data:
+                # The command ended the shell (e.g. `exit 3`).
+                out.feed(pending)
+                code = self.proc.wait() if self.proc else 1
+                output = format_output(out.text(), _read_stderr_file(err_file)).strip()
+                notice = f"[shell exited with code {code}; it will be restarted on the next call]"
+                return code, (output + "\n" if output else "") + notice
+            buf = pending + data
+            idx = buf.find(marker)
+            if idx == -1:
+                keep = len(marker) + 1
+                out.feed(buf[:-keep])
+                pending = buf[-keep:]
+                continue
+            out.feed(buf[:idx])
+            rest = buf[idx + len(marker):]
+            while b"\n" not in rest:
+                try:
+                    more = self._chunks.get(timeout=max(0.1, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if not more:
+                    break
+                rest += more
+            status_line = rest.split(b"\n", 1)[0].decode("utf-8", errors="replace")
+            code_text, _, cwd = status_line.partition(" ")
+            if cwd:
+                self.cwd = cwd
+            try:
+                code = int(code_text)
+            except ValueError:
+                code = 1
+            output = format_output(out.text(), _read_stderr_file(err_file))
+            return code, output or "(no output)"
+
+    def _timeout(self, out: BoundedCapture, err_file: Path, timeout: float) -> tuple:
+        if self.proc is not None:
+            kill_proc_tree(self.proc.pid)
+            try:
+                self.proc.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                pass
+        partial = format_output(out.text(), _read_stderr_file(err_file))
+        message = (f"Error: timed out after {timeout}s (process killed; persistent shell will be "
+                   "restarted in the same directory)")
+        if partial:
+            message += f"\n[partial output]\n{partial}"
+        return 124, message
+
+
+_shells: dict[str, PersistentShell] = {}
+_shells_lock = threading.Lock()
+
+
+def get_shell(session_id: str = "default") -> PersistentShell:
+    with _shells_lock:
+        sh = _shells.get(session_id)
+        if sh is None:
+            sh = PersistentShell()
+            _shells[session_id] = sh
+        return sh
+
+
+def close_shell(session_id: str) -> None:
+    with _shells_lock:
+        sh = _shells.pop(session_id, None)
+    if sh is not None:
+        sh.close()
+
+
+def close_all_shells() -> None:
+    with _shells_lock:
+        shells = list(_shells.values())
+        _shells.clear()
+    for sh in shells:
+        sh.close()
+
+
+atexit.register(close_all_shells)
@@ -0,0 +1,85 @@
+"""BashBackground / BashOutput / BashKill tools: long-running commands as background jobs.
+
+Importing this module registers the tools into the central registry.
+"""
+from __future__ import annotations
+
+from tool_registry import ToolDef, register_tool
+from . import jobs
+
+
+def _bash_background(params: dict, config: dict) -> str:
+    try:
+        job = jobs.start_job(params["command"])
+    except Exception as e:
+        return f"Error: {e}"
+    return (f"Started background job {job.id} (pid {job.proc.pid}): {job.command}\n"
+            f"Poll with BashOutput(job_id=\"{job.id}\"); stop with BashKill(job_id=\"{job.id}\").")
+
+
+def _bash_output(params: dict, config: dict) -> str:
+    job = jobs.get_job(params.get("job_id", ""))
+    if job is None:
+        return f"Error: unknown job id: {params.get('job_id', '')}"
+    output = jobs.read_output(job)
+    header = f"[{job.id} {job.status}, {job.runtime:.1f}s]"
+    return f"{header}\n{output.rstrip()}" if output else f"{header} (no new output)"
+
+
+def _bash_kill(params: dict, config: dict) -> str:
+    job = jobs.get_job(params.get("job_id", ""))
+    if job is None:
+        return f"Error: unknown job id: {params.get('job_id', '')}"
+    if job.returncode is not None:
+        return f"Job {job.id} already {job.status}"
+    jobs.kill_job(job)
+    tail = jobs.read_output(job, max_chars=2000)
+    return f"Killed job {job.id}" + (f"\nLast output:\n{tail.rstrip()}" if tail else "")
+
+
+_JOB_ID = {"job_id": {"type": "string", "description": "Id returned by BashBackground, e.g. bg1"}}
+
+register_tool(ToolDef(
+    name="BashBackground",
+    schema={
+        "name": "BashBackground",
+        "description": (
+            "Start a long-running shell command (dev server, build, test suite) in the background "
+            "and return a job id immediately. Keep working while it runs; use BashOutput to read "
+            "new output and BashKill to stop it."
+        ),
+        "input_schema": {
+            "type": "object",
+            "properties": {"command": {"type": "string"}},
+            "required": ["command"],
+        },
+    },
+    func=_bash_background,
+    read_only=False,
+    concurrent_safe=True,
+))
+
+register_tool(ToolDef(
+    name="BashOutput",
+    schema={
+        "name": "BashOutput",
+        "description": "Return the output a background job has produced since the last BashOutput call, plus its status.",
+        "input_schema": {"type": "object", "properties": _JOB_ID, "required": ["job_id"]},
+    },
+    func=_bash_output,
+    read_only=True,
+    concurrent_safe=True,
+    normalize=True,
+))
+
+register_tool(ToolDef(
+    name="BashKill",
+    schema={
+        "name": "BashKill",
+        "description": "Stop a background job (kills its whole process group).",
+        "input_schema": {"type": "object", "properties": _JOB_ID, "required": ["job_id"]},
+    },
+    func=_bash_kill,
+    read_only=False,
+    concurrent_safe=True,
+))
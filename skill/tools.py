@@ -97,6 +97,7 @@ def _register() -> None:
         func=_skill_tool,
         read_only=False,
         concurrent_safe=False,
+        timeout=0,  # runs a sub-agent whose tool calls have their own limits
     ))
     register_tool(ToolDef(
         name="SkillList",
@@ -0,0 +1,312 @@
+"""Compaction quality and cost benchmark for dev-council.
+
+Replays long sessions through every compaction strategy against a local stub
+model and reports, per strategy and parameter set:
+
+- estimated tokens before / after
+- wall time
+- number of LLM calls
+- how many planted facts (file paths, decisions, values, failures) survive
+
+Sessions are either synthetic (generated with planted facts) or recorded
+session JSON files as written by dev-council (``~/.dev-council/sessions``).
+For recorded sessions pass ``--facts`` with one fact string per line.
+
+Examples:
+    python tests/benchmark_compaction.py
+    python tests/benchmark_compaction.py --turns 120 --keep-ratio 0.2 0.3 0.5 --max-chars 1000 2000
+    python tests/benchmark_compaction.py --sessions ~/.dev-council/sessions/daily/*/*.json --facts facts.txt
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compaction
+import providers
+
+
+# ── Synthetic sessions ─────────────────────────────────────────────────────
+
+_MODULES = ["auth", "billing", "search", "reports", "notifications", "admin", "export", "sync"]
+_DB = ["PostgreSQL 15", "SQLite", "MySQL 8", "MongoDB 7"]
+
+
+def _filler(rng: random.Random, n: int, prefix: str) -> list:
+    return [f"{prefix} {i}: " + " ".join(rng.choice(["foo", "bar", "baz", "qux"]) for _ in range(8))
+            for i in range(n)]
+
+
+def make_synthetic_session(turns: int = 40, seed: int = 0) -> tuple:
+    """Build a coding session with planted facts.
+
+    Returns:
+        (messages, facts) where facts maps category -> list of fact strings
+    """
+    rng = random.Random(seed)
+    messages: list = []
+    facts = {"decision": [], "path": [], "value": [], "failure": []}
+    call = 0
+
+    def tool_pair(name, inputs, result, text=""):
+        nonlocal call
+        call += 1
+        cid = f"call_{call}"
+        messages.append({"role": "assistant", "content": text,
+                         "tool_calls": [{"id": cid, "name": name, "input": inputs}]})
+        messages.append({"role": "tool", "tool_call_id": cid, "name": name, "content": result})
+
+    for turn in range(turns):
+        module = _MODULES[turn % len(_MODULES)]
+        path = f"src/{module}/handler_{turn}.py"
+        if turn % 5 == 0:
+            decision = f"Decision: use {rng.choice(_DB)} for the {module} store (turn {turn})"
+            facts["decision"].append(decision)
+            messages.append({"role": "user", "content": f"{decision}. Please wire it up."})
+        else:
+            messages.append({"role": "user", "content": f"Continue with the {module} module."})
+
+        body = _filler(rng, 300, "line")
+        value = f"{module.upper()}_MAX_RETRIES = {rng.randint(2, 99)}"
+        body.insert(rng.randint(50, 250), value)
+        if turn % 3 == 0:
+            facts["value"].append(value)
+        tool_pair("Read", {"file_path": path},
+                  "\n".join(f"{i + 1:6}\t{line}" for i, line in enumerate(body)),
+                  text=f"Reading {path} first.")
+
+        tool_pair("Edit", {"file_path": path, "old_string": body[10], "new_string": f"# patched in turn {turn}"},
+                  f"Changes applied to handler_{turn}.py:\n--- a/handler_{turn}.py\n+++ b/handler_{turn}.py")
+        facts["path"].append(path)
+
+        log = _filler(rng, 120, "collecting")
+        if turn % 4 == 0:
+            failure = f"FAILED tests/test_{module}.py::test_case_{turn} - AssertionError"
+            facts["failure"].append(failure)
+            log.append(failure)
+        log.append(f"{rng.randint(10, 90)} passed in {rng.random():.2f}s")
+        tool_pair("Bash", {"command": f"pytest tests/test_{module}.py"}, "\n".join(log))
+
+        messages.append({"role": "assistant", "content": f"Updated {path}; tests run. " + "ok " * 40})
+    return messages, facts
+
+
+def load_recorded_session(path: Path) -> list:
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    return payload.get("messages", []) if isinstance(payload, dict) else payload
+
+
+# ── Stub model ─────────────────────────────────────────────────────────────
+
+class StubSummarizer:
+    """Deterministic local stand-in for the model used by compact_messages.
+
+    It keeps the leading part of each ``[role]: ...`` line of the summary
+    prompt up to a fixed budget, which is roughly how a small model's summary
+    loses detail. Optional latency simulates generation time.
+    """
+
+    def __init__(self, summary_chars: int = 1500, latency: float = 0.0):
+        self.summary_chars = summary_chars
+        self.latency = latency
+        self.calls = 0
+
+    def stream(self, model, system, messages, tool_schemas, config):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        prompt = messages[-1]["content"] if messages else ""
+        kept, used = [], 0
+        for line in prompt.splitlines():
+            if not line.startswith("["):
+                continue
+            line = line[:200]
+            if used + len(line) > self.summary_chars:
+                break
+            kept.append(line)
+            used += len(line)
+        text = "\n".join(kept)
+        yield providers.TextChunk(text)
+        yield providers.AssistantTurn(text, [], len(prompt) // 4, len(text) // 4)
+
+
+@contextmanager
+def _patched_stream(stub: StubSummarizer):
+    original = providers.stream
+    providers.stream = stub.stream
+    try:
+        yield
+    finally:
+        providers.stream = original
+
+
+# ── Strategies ─────────────────────────────────────────────────────────────
+# Each mirrors what maybe_compact does: layer 1 (snip) first, then layer 2.
+
+def _snip(messages, config, p):
+    return compaction.snip_old_tool_results(messages, max_chars=p["max_chars"])
+
+
+def _llm(messages, config, p):
+    compaction.snip_old_tool_results(messages, max_chars=p["max_chars"])
+    return compaction.compact_messages(messages, config, keep_ratio=p["keep_ratio"])
+
+
+def _extractive(messages, config, p):
+    compaction.snip_old_tool_results(messages, max_chars=p["max_chars"])
+    return compaction.extractive_compact(messages, keep_ratio=p["keep_ratio"])
+
+
+def _extractive_llm(messages, config, p):
+    compaction.snip_old_tool_results(messages, max_chars=p["max_chars"])
+    compacted = compaction.extractive_compact(messages, keep_ratio=p["keep_ratio"])
+    if compaction.estimate_tokens(compacted) > p["target_tokens"]:
+        compacted = compaction.compact_messages(compacted, config, keep_ratio=p["keep_ratio"])
+    return compacted
+
+
+STRATEGIES = {
+    "snip": _snip,
+    "llm": _llm,
+    "extractive": _extractive,
+    "extractive+llm": _extractive_llm,
+}
+
+
+# ── Runner ─────────────────────────────────────────────────────────────────
+
+def _all_text(messages: list) -> str:
+    parts = []
+    for m in messages:
+        content = m.get("content", "")
+        parts.append(content if isinstance(content, str) else json.dumps(content))
+        for tc in m.get("tool_calls") or []:
+            parts.append(json.dumps(tc.get("input", {})))
+    return "\n".join(parts)
+
+
+def run_benchmark(
+    sessions: list,
+    strategies: list = None,
+    keep_ratios: list = None,
+    max_chars_list: list = None,
+    target_ratio: float = 0.25,
+    summary_chars: int = 1500,
+    latency: float = 0.0,
+) -> list:
+    """Run every strategy x parameter combination over *sessions*.
+
+    Args:
+        sessions: list of (name, messages, facts) where facts is a flat list
+                  of strings (may be empty for recorded sessions)
+    Returns:
+        list of result dicts (one per session/strategy/parameter set)
+    """
+    strategies = strategies or list(STRATEGIES)
+    keep_ratios = keep_ratios or [0.3]
+    max_chars_list = max_chars_list or [2000]
+    results = []
+    for name, messages, facts in sessions:
+        before = compaction.estimate_tokens(messages)
+        for strategy in strategies:
+            for keep_ratio in keep_ratios:
+                for max_chars in max_chars_list:
+                    stub = StubSummarizer(summary_chars=summary_chars, latency=latency)
+                    params = {
+                        "keep_ratio": keep_ratio,
+                        "max_chars": max_chars,
+                        "target_tokens": int(before * target_ratio),
+                    }
+                    working = copy.deepcopy(messages)
+                    with _patched_stream(stub):
+                        start = time.perf_counter()
+                        out = STRATEGIES[strategy](working, {"model": "local/stub"}, params)
+                        elapsed = time.perf_counter() - start
+                    text = _all_text(out)
+                    survived = sum(1 for fact in facts if fact in text)
+                    results.append({
+                        "session": name,
+                        "strategy": strategy,
+                        "keep_ratio": keep_ratio,
+                        "max_chars": max_chars,
+                        "tokens_before": before,
+                        "tokens_after": compaction.estimate_tokens(out),
+                        "wall_ms": round(elapsed * 1000, 2),
+                        "llm_calls": stub.calls,
+                        "facts_total": len(facts),
+                        "facts_survived": survived,
+                    })
+    return results
+
+
+def _print_table(results: list) -> None:
+    header = (f"{'session':<16} {'strategy':<15} {'keep':>5} {'snip':>6} "
+              f"{'before':>8} {'after':>8} {'ratio':>6} {'ms':>9} {'llm':>4} {'facts':>9}")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        ratio = r["tokens_after"] / r["tokens_before"] if r["tokens_before"] else 0
+        facts = f"{r['facts_survived']}/{r['facts_total']}" if r["facts_total"] else "n/a"
+        print(f"{r['session'][:16]:<16} {r['strategy']:<15} {r['keep_ratio']:>5.2f} {r['max_chars']:>6} "
+              f"{r['tokens_before']:>8} {r['tokens_after']:>8} {ratio:>6.2f} {r['wall_ms']:>9.2f} "
+              f"{r['llm_calls']:>4} {facts:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compaction quality and cost benchmark for dev-council")
+    parser.add_argument("--sessions", nargs="*", default=[], help="Recorded session JSON files to replay")
+    parser.add_argument("--facts", type=str, default=None, help="File with one fact per line (for recorded sessions)")
+    parser.add_argument("--turns", type=int, default=60, help="Turns per synthetic session")
+    parser.add_argument("--synthetic", type=int, default=3, help="Number of synthetic sessions (0 to disable)")
+    parser.add_argument("--strategy", nargs="*", choices=list(STRATEGIES), default=None, help="Strategies to run (default: all)")
+    parser.add_argument("--keep-ratio", nargs="*", type=float, default=[0.3], help="keep_ratio values to sweep")
+    parser.add_argument("--max-chars", nargs="*", type=int, default=[2000], help="snip max_chars values to sweep")
+    parser.add_argument("--target-ratio", type=float, default=0.25, help="extractive+llm: call the LLM only above this fraction of the original tokens")
+    parser.add_argument("--summary-chars", type=int, default=1500, help="Stub model summary budget")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per stub LLM call")
+    parser.add_argument("--json", dest="json_out", type=str, default=None, help="Write raw results to this JSON file")
+    args = parser.parse_args()
+
+    sessions = []
+    for seed in range(args.synthetic):
+        messages, facts = make_synthetic_session(args.turns, seed)
+        flat = [f for group in facts.values() for f in group]
+        sessions.append((f"synthetic-{seed}", messages, flat))
+
+    recorded_facts = []
+    if args.facts:
+        recorded_facts = [l.strip() for l in Path(args.facts).read_text(encoding="utf-8").splitlines() if l.strip()]
+    for path in args.sessions:
+        try:
+            sessions.append((Path(path).stem, load_recorded_session(Path(path)), recorded_facts))
+        except Exception as e:
+            print(f"Skipping {path}: {e}")
+
+    if not sessions:
+        print("No sessions to benchmark.")
+        return
+
+    results = run_benchmark(
+        sessions,
+        strategies=args.strategy,
+        keep_ratios=args.keep_ratio,
+        max_chars_list=args.max_chars,
+        target_ratio=args.target_ratio,
+        summary_chars=args.summary_chars,
+        latency=args.latency,
+    )
+    _print_table(results)
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\nResults saved to: {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Tool-schema payload benchmark for dynamic tool selection.
+
+Registers a configurable number of synthetic MCP tools next to the built-ins
+and, for a set of representative requests, compares ``tool_selection: all``
+with dynamic selection:
+
+- number of schemas sent
+- serialized tool payload size and estimated tokens (chars / 3.5)
+- selection time
+
+With ``--model`` the same payloads are also sent to a local Ollama server
+(one non-streamed request with ``num_predict=1``) and the reported
+``prompt_eval_duration`` is compared.
+
+Examples:
+    python tests/benchmark_tool_selection.py
+    python tests/benchmark_tool_selection.py --mcp-tools 50 100 200
+    python tests/benchmark_tool_selection.py --mcp-tools 60 --model qwen2.5-coder:latest
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tools  # noqa: F401  (registers built-in tools)
+import providers
+import tool_selection
+from tool_registry import ToolDef, register_tool, unregister_tool
+
+_SERVERS = ["github", "slack", "jira", "linear", "postgres", "sentry", "notion", "figma", "drive", "stripe"]
+_VERBS = ["create", "update", "delete", "list", "get", "search", "archive", "assign", "comment", "export"]
+_NOUNS = ["issue", "message", "ticket", "record", "page", "invoice", "event", "user", "file", "project"]
+
+REQUESTS = [
+    "Fix the off-by-one error in the pagination helper and add a test",
+    "Open a GitHub issue describing the flaky login test",
+    "Post the release notes to the team Slack channel",
+    "Rename the config loader function and update all call sites",
+]
+
+
+def register_fake_mcp_tools(n: int) -> list:
+    names = []
+    for i in range(n):
+        server = _SERVERS[i % len(_SERVERS)]
+        verb = _VERBS[(i // len(_SERVERS)) % len(_VERBS)]
+        noun = _NOUNS[(i // (len(_SERVERS) * len(_VERBS)) + i) % len(_NOUNS)]
+        name = f"mcp__{server}__{verb}_{noun}_{i}"
+        schema = {
+            "name": name,
+            "description": f"[MCP:{server}] {verb.capitalize()} a {noun} in {server.capitalize()}.",
+            "input_schema": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "string", "description": f"The {noun} identifier"},
+                    "fields": {"type": "object", "description": f"Fields to {verb}"},
+                    "limit": {"type": "integer", "description": "Maximum number of results"},
+                },
+                "required": ["id"],
+            },
+        }
+        register_tool(ToolDef(name=name, schema=schema, func=lambda p, c: "ok"))
+        names.append(name)
+    return names
+
+
+def _ollama_prompt_eval(model: str, base_url: str, payload_tools: list, prompt: str) -> float:
+    body = json.dumps({
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "tools": payload_tools,
+        "stream": False,
+        "options": {"num_predict": 1},
+    }).encode()
+    req = urllib.request.Request(f"{base_url}/api/chat", data=body, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=600) as resp:
+        data = json.loads(resp.read())
+    return data.get("prompt_eval_duration", 0) / 1e9
+
+
+def run(mcp_counts: list, model: str = "", base_url: str = "http://localhost:11434") -> None:
+    header = f"{'mcp':>5} {'mode':<8} {'schemas':>7} {'chars':>8} {'~tokens':>8} {'select ms':>9}"
+    if model:
+        header += f" {'eval s':>7}"
+    print(header)
+    for n in mcp_counts:
+        names = register_fake_mcp_tools(n)
+        try:
+            for mode in ("all", "dynamic"):
+                totals = {"schemas": 0, "chars": 0, "ms": 0.0, "eval": 0.0}
+                for text in REQUESTS:
+                    messages = [{"role": "user", "content": text}]
+                    t0 = time.perf_counter()
+                    schemas = tool_selection.select_tool_schemas(messages, {"tool_selection": mode})
+                    totals["ms"] += (time.perf_counter() - t0) * 1000
+                    payload = providers.tools_to_ollama(schemas)
+                    totals["schemas"] += len(schemas)
+                    totals["chars"] += len(json.dumps(payload))
+                    if model:
+                        totals["eval"] += _ollama_prompt_eval(model, base_url, payload, text)
+                k = len(REQUESTS)
+                line = (f"{n:>5} {mode:<8} {totals['schemas'] / k:>7.1f} {totals['chars'] / k:>8.0f} "
+                        f"{totals['chars'] / k / 3.5:>8.0f} {totals['ms'] / k:>9.2f}")
+                if model:
+                    line += f" {totals['eval'] / k:>7.2f}"
+                print(line)
+        finally:
+            for name in names:
+                unregister_tool(name)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mcp-tools", type=int, nargs="+", default=[0, 50, 100])
+    parser.add_argument("--model", default="", help="Ollama model to measure prompt-eval time with")
+    parser.add_argument("--base-url", default="http://localhost:11434")
+    args = parser.parse_args()
+    run(args.mcp_tools, args.model, args.base_url)
+
+
+if __name__ == "__main__":
+    main()
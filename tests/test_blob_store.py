@@ -0,0 +1,100 @@
+"""Tests for spilling large tool outputs to the blob store and ToolResult retrieval."""
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import blob.store as blob_store
+import tool_registry
+import tools  # noqa: F401  (registers built-in tools)
+from tool_registry import ToolDef, execute_tool, register_tool
+
+_TEST_DIR = Path(__file__).resolve().parent.parent / ".test-tmp" / "blob-store"
+
+
+@pytest.fixture(autouse=True)
+def _use_test_dir(monkeypatch):
+    if _TEST_DIR.exists():
+        shutil.rmtree(_TEST_DIR, ignore_errors=True)
+    _TEST_DIR.mkdir(parents=True, exist_ok=True)
+    monkeypatch.setattr(blob_store, "_blobs_root", lambda: _TEST_DIR)
+    yield
+    tool_registry.unregister_tool("_NoisyTest")
+    shutil.rmtree(_TEST_DIR, ignore_errors=True)
+
+
+def _big_output(n: int = 2000) -> str:
+    return "\n".join(f"line {i} value={i * 7}" for i in range(n))
+
+
+def _register_noisy_tool():
+    register_tool(ToolDef(
+        name="_NoisyTest",
+        schema={"name": "_NoisyTest", "description": "", "input_schema": {"type": "object"}},
+        func=lambda p, c: _big_output(),
+        read_only=True,
+    ))
+
+
+class TestSpill:
+    def test_small_output_is_untouched(self):
+        assert blob_store.spill_tool_result("s1", "Bash", "hello", threshold=100) == "hello"
+
+    def test_large_output_is_replaced_by_preview(self):
+        content = _big_output()
+        preview = blob_store.spill_tool_result("s1", "Bash", content, threshold=1000)
+        assert len(preview) < len(content)
+        assert "handle=" in preview
+        assert "line 0 value=0" in preview
+        assert "line 1999 value=13993" in preview
+        assert "lines omitted" in preview
+
+    def test_preview_keeps_error_lines_from_omitted_middle(self):
+        lines = _big_output().splitlines()
+        lines[1000] = "Traceback (most recent call last):"
+        preview = blob_store.spill_tool_result("s1", "Bash", "\n".join(lines), threshold=1000)
+        assert "  1000: Traceback (most recent call last):" in preview
+
+    def test_execute_tool_spills_above_threshold(self):
+        _register_noisy_tool()
+        config = {"_session_id": "s2", "tool_spill_threshold": 1000}
+        result = execute_tool("_NoisyTest", {}, config)
+        assert "stored as handle=" in result
+        assert len(result) < 5000
+
+    def test_spill_disabled_by_zero_threshold(self):
+        _register_noisy_tool()
+        result = execute_tool("_NoisyTest", {}, {"_session_id": "s2", "tool_spill_threshold": 0})
+        assert "stored as handle=" not in result
+
+
+class TestToolResult:
+    def _handle(self, session_id="s3"):
+        return blob_store.save_blob(session_id, "Bash", _big_output())
+
+    def test_page_by_offset_and_limit(self):
+        handle = self._handle()
+        page = execute_tool("ToolResult", {"handle": handle, "offset": 1000, "limit": 3}, {"_session_id": "s3"})
+        assert "line 1000 value=7000" in page
+        assert "line 1002 value=7014" in page
+        assert "line 1003 " not in page
+        assert "continue with offset=1003" in page
+
+    def test_pattern_search(self):
+        handle = self._handle()
+        hits = execute_tool("ToolResult", {"handle": handle, "pattern": r"value=7000$"}, {"_session_id": "s3"})
+        assert hits.strip().endswith("line 1000 value=7000")
+
+    def test_unknown_handle_and_other_session(self):
+        handle = self._handle("s3")
+        assert execute_tool("ToolResult", {"handle": "rnope"}, {"_session_id": "s3"}).startswith("Error")
+        assert execute_tool("ToolResult", {"handle": handle}, {"_session_id": "other"}).startswith("Error")
+
+    def test_rejects_path_like_handles(self):
+        assert blob_store.read_blob("s3", "../config").startswith("Error: invalid handle")
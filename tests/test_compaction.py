@@ -0,0 +1,106 @@
+"""Tests for the extractive (no-LLM) compaction mode."""
+from __future__ import annotations
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compaction
+import providers
+from agent import AgentState
+
+
+def _call(cid, name, inputs, text=""):
+    return {"role": "assistant", "content": text, "tool_calls": [{"id": cid, "name": name, "input": inputs}]}
+
+
+def _result(cid, name, content):
+    return {"role": "tool", "tool_call_id": cid, "name": name, "content": content}
+
+
+def _session():
+    return [
+        {"role": "user", "content": "Fix the failing login test in app/auth.py"},
+        _call("c1", "Read", {"file_path": "app/auth.py"}, "Let me look."),
+        _result("c1", "Read", "     1\tdef login():\n" * 300),
+        _call("c2", "Bash", {"command": "pytest tests/test_auth.py"}),
+        _result("c2", "Bash", "collecting...\n" * 50 + "FAILED tests/test_auth.py::test_login - KeyError: 'token'\n"),
+        _call("c3", "Edit", {"file_path": "app/auth.py", "old_string": "x", "new_string": "return session['token']"}),
+        _result("c3", "Edit", "Changes applied to auth.py:\n..."),
+        _call("c4", "Edit", {"file_path": "app/auth.py", "old_string": "return session['token']", "new_string": "return session.get('token')"}),
+        _result("c4", "Edit", "Changes applied to auth.py:\n..."),
+        _call("c5", "Read", {"file_path": "app/auth.py"}),
+        _result("c5", "Read", "     1\tdef login():\n" * 300),
+        {"role": "user", "content": "Now also update the README"},
+        {"role": "assistant", "content": "Sure, updating README. " * 200},
+    ]
+
+
+def test_summary_keeps_user_messages_and_folds_tool_calls():
+    summary = compaction.extractive_summary(_session())
+    assert "[user]: Fix the failing login test in app/auth.py" in summary
+    assert "- Bash(command=pytest tests/test_auth.py) -> ok: FAILED tests/test_auth.py::test_login" in summary
+    assert "def login()" not in summary
+
+
+def test_superseded_reads_and_edits_are_dropped():
+    summary = compaction.extractive_summary(_session())
+    assert summary.count("- Read(app/auth.py)") == 1
+    assert "return session.get('token')" in summary
+    assert "latest edit:\nreturn session['token']" not in summary
+
+
+def test_extractive_compact_is_deterministic_and_smaller():
+    messages = _session()
+    first = compaction.extractive_compact(list(messages))
+    second = compaction.extractive_compact(list(messages))
+    assert first == second
+    assert first[0]["content"].startswith("[Previous conversation summary]")
+    assert compaction.estimate_tokens(first) < compaction.estimate_tokens(messages)
+    recent = first[2:]
+    assert recent and recent[0]["role"] != "tool"
+
+
+def test_extractive_mode_makes_no_llm_call(monkeypatch):
+    def fail_stream(*args, **kwargs):
+        raise AssertionError("LLM should not be called")
+
+    monkeypatch.setattr(providers, "stream", fail_stream)
+    state = AgentState()
+    state.messages = _session()
+    success, message = compaction.manual_compact(state, {"model": "local/test", "compaction_mode": "extractive"})
+    assert success
+    assert "Compacted" in message
+    assert "(extractive record" in state.messages[0]["content"]
+
+
+def test_extractive_mode_layers_llm_when_still_over_threshold(monkeypatch):
+    calls = []
+
+    def fake_stream(*args, **kwargs):
+        calls.append(1)
+        yield providers.TextChunk("summary")
+
+    monkeypatch.setattr(providers, "stream", fake_stream)
+    messages = _session()
+    config = {"model": "local/test", "compaction_mode": "extractive"}
+    compaction._compact_layer2(list(messages), config, threshold=10**9)
+    assert calls == []
+    compaction._compact_layer2(list(messages), config, threshold=1)
+    assert calls == [1]
+
+
+def test_compaction_benchmark_smoke():
+    import benchmark_compaction as bench
+
+    messages, facts = bench.make_synthetic_session(turns=12, seed=1)
+    flat = [f for group in facts.values() for f in group]
+    results = bench.run_benchmark([("synthetic", messages, flat)])
+    by_strategy = {r["strategy"]: r for r in results}
+    assert set(by_strategy) == set(bench.STRATEGIES)
+    assert by_strategy["llm"]["llm_calls"] == 1
+    assert by_strategy["extractive"]["llm_calls"] == 0
+    for r in results:
+        assert r["tokens_after"] < r["tokens_before"]
+        assert 0 <= r["facts_survived"] <= r["facts_total"] == len(flat)
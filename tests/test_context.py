@@ -0,0 +1,118 @@
+"""Tests for the memoised system prompt build."""
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import context
+
+_TEST_DIR = Path(__file__).resolve().parent.parent / ".test-tmp" / "context"
+
+
+@pytest.fixture(autouse=True)
+def _use_test_dir(monkeypatch):
+    if _TEST_DIR.exists():
+        shutil.rmtree(_TEST_DIR, ignore_errors=True)
+    _TEST_DIR.mkdir(parents=True, exist_ok=True)
+    monkeypatch.chdir(_TEST_DIR)
+    context.clear_prompt_cache()
+    yield
+    context.clear_prompt_cache()
+    shutil.rmtree(_TEST_DIR, ignore_errors=True)
+
+
+def _counting(monkeypatch, name):
+    calls = []
+    original = getattr(context, name)
+
+    def wrapper(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(context, name, wrapper)
+    return calls
+
+
+def test_sections_are_built_once_when_nothing_changes(monkeypatch):
+    git_calls = _counting(monkeypatch, "get_git_info")
+    skill_calls = _counting(monkeypatch, "get_skill_metadata")
+    first = context.build_system_prompt()
+    second = context.build_system_prompt()
+    assert first == second
+    assert len(git_calls) == 1
+    assert len(skill_calls) == 1
+    stats = context.get_prompt_cache_stats()
+    assert stats["builds"] == 1 and stats["reuses"] == 1
+    assert stats["sections"]["git"]["hits"] == 1
+
+
+def test_guidance_change_invalidates_only_guidance(monkeypatch):
+    git_calls = _counting(monkeypatch, "get_git_info")
+    guidance = _TEST_DIR / "GUIDANCE.md"
+    guidance.write_text("Use tabs.", encoding="utf-8")
+    assert "Use tabs." in context.build_system_prompt()
+
+    guidance.write_text("Use four spaces.", encoding="utf-8")
+    stat = guidance.stat()
+    os.utime(guidance, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    prompt = context.build_system_prompt()
+    assert "Use four spaces." in prompt
+    assert len(git_calls) == 1
+    assert context.get_prompt_cache_stats()["sections"]["guidance"]["misses"] == 2
+
+
+def test_plan_mode_is_not_served_from_stale_cache():
+    normal = context.build_system_prompt({"permission_mode": "auto"})
+    plan = context.build_system_prompt({"permission_mode": "plan", "_plan_file": "plan.md"})
+    assert "# Plan Mode" not in normal
+    assert "You may only write to: plan.md" in plan
+
+
+# ── Git probe ────────────────────────────────────────────────────────────────
+
+def _fake_repo(head: str) -> Path:
+    git_dir = _TEST_DIR / ".git"
+    git_dir.mkdir()
+    (git_dir / "HEAD").write_text(head, encoding="utf-8")
+    return git_dir
+
+
+def test_branch_is_read_from_head_file():
+    git_dir = _fake_repo("ref: refs/heads/feature/login\n")
+    assert context.find_git_dir() == git_dir.resolve()
+    assert context.read_git_branch(git_dir) == "feature/login"
+    (git_dir / "HEAD").write_text("0123456789abcdef\n", encoding="utf-8")
+    assert context.read_git_branch(git_dir) == "HEAD (detached at 0123456)"
+
+
+def test_porcelain_v2_is_rendered_in_short_format():
+    output = (
+        "1 .M N... 100644 100644 100644 abc abc src/app.py\n"
+        "1 A. N... 000000 100644 100644 000 def new file.py\n"
+        "2 R. N... 100644 100644 100644 abc abc R100 dst.py\tsrc.py\n"
+        "? notes.txt\n"
+    )
+    assert context._parse_porcelain_v2(output) == [
+        " M src/app.py",
+        "A  new file.py",
+        "R  src.py -> dst.py",
+        "?? notes.txt",
+    ]
+
+
+def test_slow_status_degrades_to_branch_only(monkeypatch):
+    _fake_repo("ref: refs/heads/main\n")
+    calls = []
+    monkeypatch.setattr(context, "_slow_status_repos", set())
+    monkeypatch.setattr(context, "probe_git_status", lambda cwd, timeout=0: calls.append(1))
+    first = context.get_git_info()
+    second = context.get_git_info()
+    assert "Git branch: main" in first
+    assert "skipped" in first and "skipped" in second
+    assert len(calls) == 1
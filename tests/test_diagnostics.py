@@ -0,0 +1,125 @@
+"""Tests for the cached, batched diagnostics service."""
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import diagnostics.service as svc
+import tools
+
+_TEST_DIR = Path(__file__).resolve().parent.parent / ".test-tmp" / "diagnostics"
+
+
+@pytest.fixture
+def fake_checker(monkeypatch):
+    """Replace the Python checkers with one that records its invocations."""
+    calls = []
+
+    def run(files):
+        calls.append(list(files))
+        return {f: f"fake: {Path(f).name} ok" for f in files}
+
+    monkeypatch.setitem(svc.CHECKERS, "python", [svc.Checker("fake", "", run)])
+    svc.clear_diagnostics_cache()
+    _TEST_DIR.mkdir(parents=True, exist_ok=True)
+    yield calls
+    svc.clear_diagnostics_cache()
+
+
+def _files(n):
+    _TEST_DIR.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(n):
+        p = _TEST_DIR / f"m{i}.py"
+        p.write_text(f"x = {i}\n")
+        paths.append(str(p))
+    return paths
+
+
+def test_edit_batch_runs_checker_once(fake_checker):
+    paths = _files(10)
+    results = svc.diagnose(paths)
+    assert len(fake_checker) == 1 and len(fake_checker[0]) == 10
+    assert results[paths[3]] == "fake: m3.py ok"
+
+
+def test_unchanged_files_come_from_cache(fake_checker):
+    paths = _files(3)
+    svc.diagnose(paths)
+    Path(paths[1]).write_text("x = 'changed'\n")
+    svc.diagnose(paths)
+    assert fake_checker[1] == [str(Path(paths[1]).resolve())]
+    assert svc.get_diagnostics_stats()["hits"] == 2
+    svc.diagnose(paths)
+    assert len(fake_checker) == 2
+
+
+def test_missing_and_unknown_files(fake_checker):
+    other = _TEST_DIR / "notes.xyz"
+    other.write_text("hi")
+    results = svc.diagnose([str(_TEST_DIR / "gone.py"), str(other)])
+    assert results[str(_TEST_DIR / "gone.py")].startswith("Error: file not found")
+    assert "No diagnostic tool available" in results[str(other)]
+    assert fake_checker == []
+
+
+def test_split_by_file_attributes_lines():
+    out = "/a/b.py:3: error: bad\n/a/bb.py:1: note: x\nFound 2 errors\n/a/b.ts(2,1): error TS1"
+    per_file, rest = svc._split_by_file(out, ["/a/b.py", "/a/bb.py", "/a/b.ts"])
+    assert per_file["/a/b.py"] == ["/a/b.py:3: error: bad"]
+    assert per_file["/a/bb.py"] == ["/a/bb.py:1: note: x"]
+    assert per_file["/a/b.ts"] == ["/a/b.ts(2,1): error TS1"]
+    assert rest == []
+
+
+def test_split_by_file_matches_cwd_relative_paths(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    bad = str(tmp_path / "pkg" / "bad.py")
+    out = f"pkg{os.sep}bad.py:1: error: Incompatible types in assignment\n./pkg/bad.py:2: note: x"
+    per_file, rest = svc._split_by_file(out, [bad])
+    assert len(per_file[bad]) == 2 and rest == []
+
+
+def test_unattributed_output_is_returned_and_not_cached(monkeypatch):
+    calls = []
+
+    def run(files):
+        calls.append(files)
+        return svc._text_results("mypy", "no diagnostics", "elsewhere/bad.py:1: error: boom", files)
+
+    monkeypatch.setitem(svc.CHECKERS, "python", [svc.Checker("fake", "", run)])
+    svc.clear_diagnostics_cache()
+    path = _files(1)[0]
+    result = svc.diagnose([path])[path]
+    assert result.startswith(f"mypy {svc.UNATTRIBUTED}:") and "boom" in result
+    svc.diagnose([path])
+    assert len(calls) == 2
+    svc.clear_diagnostics_cache()
+
+
+def test_pyright_timeout_is_not_cached(monkeypatch):
+    calls = []
+    monkeypatch.setattr(svc, "_run", lambda cmd, timeout=svc.CHECK_TIMEOUT: calls.append(cmd)
+                        or (-1, f"(timed out after {timeout}s)"))
+    monkeypatch.setitem(svc.CHECKERS, "python", [svc.Checker("pyright", "", svc._pyright)])
+    svc.clear_diagnostics_cache()
+    path = _files(1)[0]
+    result = svc.diagnose([path])[path]
+    assert result.startswith(f"pyright {svc.UNATTRIBUTED}:") and "timed out" in result
+    svc.diagnose([path])
+    assert len(calls) == 2
+    svc.clear_diagnostics_cache()
+
+
+def test_tool_accepts_file_paths(fake_checker):
+    paths = _files(2)
+    single = tools._get_diagnostics(paths[0])
+    assert single == "fake: m0.py ok"
+    both = tools._get_diagnostics(None, None, paths)
+    assert f"== {paths[1]} ==\nfake: m1.py ok" in both
+    assert tools._get_diagnostics().startswith("Error:")
@@ -0,0 +1,98 @@
+"""Tests for size-aware diffs and atomic writes."""
+from __future__ import annotations
+
+import difflib
+import os
+import shutil
+import stat
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fileops.diff as fdiff
+import tools
+from fileops import atomic_write_text
+
+_TEST_DIR = Path(__file__).resolve().parent.parent / ".test-tmp" / "fileops-diff"
+
+
+@pytest.fixture(autouse=True)
+def _use_test_dir():
+    if _TEST_DIR.exists():
+        shutil.rmtree(_TEST_DIR, ignore_errors=True)
+    _TEST_DIR.mkdir(parents=True, exist_ok=True)
+    yield
+    shutil.rmtree(_TEST_DIR, ignore_errors=True)
+
+
+def _lines(n: int) -> str:
+    return "".join(f"line {i}\n" for i in range(n))
+
+
+def test_trimmed_diff_matches_difflib():
+    old = _lines(2000)
+    new = old.replace("line 1500\n", "changed\n").replace("line 10\n", "")
+    expected = "".join(difflib.unified_diff(
+        old.splitlines(keepends=True), new.splitlines(keepends=True),
+        fromfile="a/f.txt", tofile="b/f.txt", n=3))
+    assert fdiff.unified_diff(old, new, "f.txt") == expected
+
+
+def test_large_change_is_summarised(monkeypatch):
+    monkeypatch.setattr(fdiff, "FULL_DIFF_MAX_LINES", 100)
+    old = _lines(1000)
+    new = "header\n" + old.replace("line", "LINE")
+    out = fdiff.unified_diff(old, new, "big.txt")
+    assert out.startswith("[diff omitted for big.txt: 1000 -> 1001 lines")
+
+
+def test_truncate_diff_bounds_chars():
+    diff = "\n".join("+" + "x" * 500 for _ in range(50))
+    out = fdiff.truncate_diff(diff, max_lines=80, max_chars=2000)
+    assert len(out) < 2100
+    assert "more lines" in out
+
+
+def test_edit_result_is_bounded():
+    path = _TEST_DIR / "gen.txt"
+    path.write_text(_lines(5000), encoding="utf-8")
+    out = tools._edit(str(path), "line", "LINE", replace_all=True)
+    assert out.startswith("Changes applied to gen.txt")
+    assert len(out) < 15000
+
+
+def test_atomic_write_preserves_mode_and_leaves_no_temp_files():
+    path = _TEST_DIR / "script.sh"
+    path.write_text("echo old\n", encoding="utf-8")
+    os.chmod(path, 0o755)
+    atomic_write_text(path, "echo new\r\n")
+    assert path.read_bytes() == b"echo new\r\n"
+    assert stat.S_IMODE(path.stat().st_mode) == 0o755
+    assert [p.name for p in _TEST_DIR.iterdir()] == ["script.sh"]
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX permission bits")
+def test_new_file_gets_umask_mode_without_touching_the_umask(monkeypatch):
+    umask = os.umask(0o022)
+    os.umask(umask)
+    monkeypatch.setattr(os, "umask", lambda mask: pytest.fail("umask changed"))
+    path = _TEST_DIR / "new.txt"
+    atomic_write_text(path, "fresh\n")
+    assert stat.S_IMODE(path.stat().st_mode) == 0o666 & ~umask
+
+
+def test_failed_write_keeps_original(monkeypatch):
+    path = _TEST_DIR / "keep.txt"
+    path.write_text("original\n", encoding="utf-8")
+
+    def boom(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", boom)
+    with pytest.raises(OSError):
+        atomic_write_text(path, "new content\n")
+    assert path.read_text(encoding="utf-8") == "original\n"
+    assert [p.name for p in _TEST_DIR.iterdir()] == ["keep.txt"]
@@ -0,0 +1,80 @@
+"""Tests for since_last_read re-reads backed by the per-session read history."""
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fileops.history as history
+import tools
+from tool_registry import execute_tool
+
+_TEST_DIR = Path(__file__).resolve().parent.parent / ".test-tmp" / "fileops-history"
+
+
+@pytest.fixture(autouse=True)
+def _use_test_dir():
+    if _TEST_DIR.exists():
+        shutil.rmtree(_TEST_DIR, ignore_errors=True)
+    _TEST_DIR.mkdir(parents=True, exist_ok=True)
+    history.clear_read_history()
+    yield
+    history.clear_read_history()
+    shutil.rmtree(_TEST_DIR, ignore_errors=True)
+
+
+def _file(lines: int = 300) -> Path:
+    path = _TEST_DIR / "mod.py"
+    path.write_text("".join(f"value_{i} = {i}\n" for i in range(lines)), encoding="utf-8")
+    return path
+
+
+def _read(path: Path, session: str = "s1", **params) -> str:
+    return execute_tool("Read", {"file_path": str(path), **params}, {"_session_id": session})
+
+
+def test_returns_only_changed_lines():
+    path = _file()
+    _read(path)
+    assert _read(path, since_last_read=True) == f"No changes since last read of {path}."
+    text = path.read_text().replace("value_150 = 150\n", "value_150 = 'changed'\n")
+    path.write_text(text)
+    out = _read(path, since_last_read=True)
+    assert out.startswith(f"Changes since last read of {path} (300 -> 300 lines in range):")
+    assert "@@ -148,7 +148,7 @@" in out
+    assert "-value_150 = 150\n+value_150 = 'changed'" in out
+    assert "value_10 = 10" not in out
+    assert _read(path, since_last_read=True).startswith("No changes")
+
+
+def test_windowed_reads_diff_the_same_window():
+    path = _file()
+    _read(path, offset=100, limit=20)
+    path.write_text(path.read_text().replace("value_110 = 110\n", "value_110 = -1\n"))
+    out = _read(path, since_last_read=True)
+    assert "@@ -108,7 +108,7 @@" in out and "+value_110 = -1" in out
+
+
+def test_falls_back_to_full_content():
+    path = _file(5)
+    out = _read(path, since_last_read=True)
+    assert out.startswith("(No earlier Read of this range")
+    assert "value_4 = 4" in out
+    _read(path, session="other")
+    path.write_text("completely\ndifferent\n")
+    out = _read(path, since_last_read=True)
+    assert "full content follows" in out and "completely" in out
+
+
+def test_history_is_bounded(monkeypatch):
+    monkeypatch.setattr(history, "MAX_FILES_PER_SESSION", 2)
+    h = history.get_read_history("bounded")
+    for name in ("a", "b", "c"):
+        h.remember(name, history.ReadSnapshot(name * 10, 0, None))
+    assert h.get("a") is None and h.get("c") is not None
+    assert h.stats() == {"files": 2, "chars": 20}
@@ -0,0 +1,82 @@
+"""Tests for ranged Read backed by the cached line-offset index."""
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fileops.reader as reader
+import tools
+
+_TEST_DIR = Path(__file__).resolve().parent.parent / ".test-tmp" / "fileops-reader"
+
+
+@pytest.fixture(autouse=True)
+def _use_test_dir(monkeypatch):
+    if _TEST_DIR.exists():
+        shutil.rmtree(_TEST_DIR, ignore_errors=True)
+    _TEST_DIR.mkdir(parents=True, exist_ok=True)
+    monkeypatch.setattr(reader, "CHUNK_BYTES", 64)    # force many chunks on small files
+    reader.clear_line_index_cache()
+    yield
+    reader.clear_line_index_cache()
+    shutil.rmtree(_TEST_DIR, ignore_errors=True)
+
+
+def _big_file(n: int = 5000, ending: str = "\n") -> Path:
+    path = _TEST_DIR / "big.log"
+    with path.open("w", encoding="utf-8", newline="") as f:
+        f.write(ending.join(f"row {i}" for i in range(n)) + ending)
+    return path
+
+
+def test_ranged_read_matches_full_split():
+    path = _big_file()
+    expected = path.read_text(encoding="utf-8").splitlines(keepends=True)
+    for offset, limit in [(0, 3), (63, 5), (4998, 10), (1234, 1)]:
+        page = reader.read_lines(path, offset, limit)
+        assert page["lines"] == expected[offset:offset + limit]
+        assert page["total"] == 5000
+
+
+def test_index_is_cached_until_file_changes():
+    path = _big_file()
+    reader.read_lines(path, 10, 2)
+    reader.read_lines(path, 4000, 2)
+    stats = reader.get_line_index_stats()
+    assert stats["builds"] == 1 and stats["hits"] == 1
+
+    with path.open("a", encoding="utf-8") as f:
+        f.write("tail")
+    page = reader.read_lines(path, 5000, 5)
+    assert page["lines"] == ["tail"]
+    assert reader.get_line_index_stats()["builds"] == 2
+
+
+def test_crlf_is_preserved_and_counted_once():
+    path = _big_file(10, ending="\r\n")
+    page = reader.read_lines(path, 2, 2)
+    assert page["lines"] == ["row 2\r\n", "row 3\r\n"]
+
+
+def test_read_tool_caps_bytes_and_reports_next_offset(monkeypatch):
+    path = _big_file()
+    monkeypatch.setattr(tools, "MAX_READ_BYTES", 100)
+    out = tools._read(str(path), offset=100)
+    assert out.startswith("   101\trow 100\n")
+    assert "continue with offset=" in out
+    assert len(out) < 400
+
+
+def test_read_tool_rejects_binary_and_handles_empty():
+    binary = _TEST_DIR / "image.bin"
+    binary.write_bytes(b"\x89PNG\0\0\0")
+    assert "binary file" in tools._read(str(binary))
+    empty = _TEST_DIR / "empty.txt"
+    empty.write_text("", encoding="utf-8")
+    assert tools._read(str(empty)) == "(empty file)"
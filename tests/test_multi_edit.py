@@ -0,0 +1,91 @@
+"""Tests for the MultiEdit tool."""
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import checkpoint.hooks as ckpt_hooks
+import tools
+from tool_registry import execute_tool
+
+_TEST_DIR = Path(__file__).resolve().parent.parent / ".test-tmp" / "multi-edit"
+
+
+@pytest.fixture(autouse=True)
+def _use_test_dir():
+    if _TEST_DIR.exists():
+        shutil.rmtree(_TEST_DIR, ignore_errors=True)
+    _TEST_DIR.mkdir(parents=True, exist_ok=True)
+    yield
+    shutil.rmtree(_TEST_DIR, ignore_errors=True)
+
+
+def _file(name: str, text: str) -> str:
+    path = _TEST_DIR / name
+    with path.open("w", encoding="utf-8", newline="") as f:
+        f.write(text)
+    return str(path)
+
+
+def _text(path: str) -> str:
+    with open(path, encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def test_applies_ordered_edits_across_files_with_one_diff():
+    a = _file("a.py", "def old_name():\n    return 1\n\nold_name()\n")
+    b = _file("b.py", "from a import old_name\n")
+    result = tools._multi_edit([
+        {"file_path": a, "old_string": "old_name", "new_string": "new_name", "replace_all": True},
+        {"file_path": a, "old_string": "return 1", "new_string": "return 2"},
+        {"file_path": b, "old_string": "old_name", "new_string": "new_name"},
+    ])
+    assert result.startswith("Applied 3 edit(s) to 2 file(s)")
+    assert "+++ b/a.py" in result and "+++ b/b.py" in result
+    assert _text(a) == "def new_name():\n    return 2\n\nnew_name()\n"
+    assert _text(b) == "from a import new_name\n"
+
+
+def test_later_edits_see_earlier_ones():
+    a = _file("a.txt", "one\n")
+    tools._multi_edit([
+        {"file_path": a, "old_string": "one", "new_string": "two"},
+        {"file_path": a, "old_string": "two", "new_string": "three"},
+    ])
+    assert _text(a) == "three\n"
+
+
+def test_failed_validation_writes_nothing():
+    a = _file("a.txt", "alpha\n")
+    b = _file("b.txt", "beta\nbeta\n")
+    result = tools._multi_edit([
+        {"file_path": a, "old_string": "alpha", "new_string": "ALPHA"},
+        {"file_path": b, "old_string": "beta", "new_string": "BETA"},
+    ])
+    assert result.startswith("Error: edit #2")
+    assert "No files were changed" in result
+    assert _text(a) == "alpha\n"
+
+
+def test_crlf_files_keep_their_line_endings():
+    a = _file("win.txt", "first\r\nsecond\r\n")
+    tools._multi_edit([{"file_path": a, "old_string": "first\nsecond", "new_string": "1\n2"}])
+    assert _text(a) == "1\r\n2\r\n"
+
+
+def test_checkpoint_hook_backs_up_each_file_once(monkeypatch):
+    backed_up = []
+    monkeypatch.setattr(ckpt_hooks, "_backup_before_write", backed_up.append)
+    a = _file("a.txt", "x y\n")
+    execute_tool("MultiEdit", {"edits": [
+        {"file_path": a, "old_string": "x", "new_string": "X"},
+        {"file_path": a, "old_string": "y", "new_string": "Y"},
+    ]}, {})
+    assert backed_up == [a]
+    assert _text(a) == "X Y\n"
@@ -0,0 +1,48 @@
+"""Tests for bounded, streaming Bash output capture."""
+from __future__ import annotations
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shell.capture as capture
+import tools
+
+
+def test_bounded_capture_keeps_head_and_tail():
+    cap = capture.BoundedCapture(head=10, tail=10)
+    for i in range(1000):
+        cap.feed(f"{i:04d}\n".encode())
+    text = cap.text()
+    assert text.startswith("0000\n0001\n")
+    assert text.endswith("0998\n0999\n")
+    assert f"[... {5000 - 20:,} bytes omitted ...]" in text
+    assert len(cap.head) == 10 and len(cap.tail) == 10
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses POSIX shell syntax")
+def test_chatty_command_output_is_bounded():
+    code, out = tools._run_shell_command(
+        "python -c \"import sys; [sys.stdout.write('x' * 99 + '\\n') for _ in range(50000)]\"; echo done", 30)
+    assert code == 0
+    assert len(out) < capture.STDOUT_HEAD + capture.STDOUT_TAIL + 200
+    assert "bytes omitted" in out
+    assert out.endswith("done")
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses POSIX shell syntax")
+def test_timeout_returns_partial_output():
+    code, out = tools._run_shell_command("echo started; sleep 5", 1)
+    assert code == 124
+    assert out.startswith("Error: timed out after 1s")
+    assert "started" in out
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses POSIX shell syntax")
+def test_stderr_is_labelled():
+    code, out = tools._run_shell_command("echo out; echo err 1>&2; exit 3", 10)
+    assert code == 3
+    assert out == "out\n\n[stderr]\nerr"
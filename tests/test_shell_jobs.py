@@ -0,0 +1,65 @@
+"""Tests for background shell jobs (BashBackground / BashOutput / BashKill)."""
+from __future__ import annotations
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shell.jobs as jobs
+import tools  # noqa: F401  (registers built-in tools)
+from tool_registry import execute_tool
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="uses POSIX shell syntax")
+
+
+def _wait_for(job, text, timeout=5.0):
+    seen = ""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        seen += jobs.read_output(job)
+        if text in seen:
+            return seen
+        time.sleep(0.05)
+    return seen
+
+
+def test_background_job_returns_immediately_and_streams_incrementally():
+    started = time.time()
+    result = execute_tool("BashBackground", {"command": "echo first; sleep 0.3; echo second; sleep 30"}, {})
+    assert time.time() - started < 2
+    job_id = result.split()[3]
+    job = jobs.get_job(job_id)
+    try:
+        assert "first" in _wait_for(job, "first")
+        later = _wait_for(job, "second")
+        assert "second" in later and "first" not in later
+        out = execute_tool("BashOutput", {"job_id": job_id}, {})
+        assert out.startswith(f"[{job_id} running") and "no new output" in out
+    finally:
+        killed = execute_tool("BashKill", {"job_id": job_id}, {})
+    assert killed.startswith(f"Killed job {job_id}")
+    assert job.status == "killed"
+
+
+def test_finished_job_reports_exit_code():
+    job = jobs.start_job("echo done; exit 4")
+    job.proc.wait(timeout=5)
+    out = execute_tool("BashOutput", {"job_id": job.id}, {})
+    assert out.startswith(f"[{job.id} exited (4)")
+    assert "done" in out
+
+
+def test_poll_is_bounded_to_newest_output():
+    job = jobs.start_job("for i in $(seq 1 5000); do echo line $i; done")
+    job.proc.wait(timeout=10)
+    out = jobs.read_output(job, max_chars=200)
+    assert out.startswith("[... ")
+    assert out.rstrip().endswith("line 5000")
+
+
+def test_unknown_job_id():
+    assert execute_tool("BashOutput", {"job_id": "bg999"}, {}).startswith("Error: unknown job id")
@@ -0,0 +1,66 @@
+"""Tests for the opt-in persistent bash session."""
+from __future__ import annotations
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shell.session as session
+import tools
+
+pytestmark = pytest.mark.skipif(not session.is_available(), reason="needs bash")
+
+
+@pytest.fixture
+def sh(tmp_path):
+    shell = session.PersistentShell(cwd=str(tmp_path))
+    yield shell
+    shell.close()
+
+
+def test_state_persists_between_commands(sh, tmp_path):
+    (tmp_path / "sub").mkdir()
+    assert sh.run("cd sub && export GREETING=hi")[0] == 0
+    code, out = sh.run("pwd; echo $GREETING")
+    assert code == 0
+    assert out.splitlines() == [str(tmp_path / "sub"), "hi"]
+
+
+def test_exit_code_and_stderr(sh):
+    code, out = sh.run("echo out; echo err >&2; false")
+    assert code == 1
+    assert out == "out\n\n[stderr]\nerr"
+
+
+def test_output_without_trailing_newline(sh):
+    assert sh.run("printf abc") == (0, "abc")
+
+
+def test_timeout_kills_and_respawns_in_same_directory(sh, tmp_path):
+    sh.run(f"cd '{tmp_path}'")
+    code, out = sh.run("echo partial; sleep 10", timeout=1)
+    assert code == 124
+    assert "partial" in out
+    code, out = sh.run("pwd")
+    assert code == 0
+    assert out.endswith(str(tmp_path))
+    assert "shell restarted" in out
+
+
+def test_exit_respawns_shell(sh):
+    code, out = sh.run("exit 3")
+    assert code == 3
+    assert sh.run("echo back")[1].endswith("back")
+
+
+def test_bash_tool_uses_session_when_enabled(tmp_path):
+    config = {"bash_persistent": True, "_session_id": "test-persistent"}
+    try:
+        tools._bash(f"cd '{tmp_path}'", 10, config)
+        assert tools._bash("pwd", 10, config) == str(tmp_path)
+        assert tools._bash("pwd", 10, {}) != str(tmp_path)
+    finally:
+        session.close_shell("test-persistent")
@@ -0,0 +1,88 @@
+"""Tests for tool timeouts, the worker pool and process isolation."""
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tool_executor
+from tool_executor import ToolTimeout, WorkerPool, run_tool
+from tool_registry import ToolDef, execute_tool, get_tool_metrics, register_tool, unregister_tool
+
+needs_fork = pytest.mark.skipif(not tool_executor.isolation_available(), reason="needs fork + resource")
+
+
+def _tool(name: str, func, **kw) -> ToolDef:
+    return ToolDef(name=name, schema={"name": name, "description": "d", "input_schema": {"type": "object"}},
+                   func=func, **kw)
+
+
+@pytest.fixture(autouse=True)
+def _cleanup():
+    yield
+    for name in ("_ExSlow", "_ExHog", "_ExPid"):
+        unregister_tool(name)
+
+
+def test_hung_tool_returns_timeout_result():
+    release = threading.Event()
+    register_tool(_tool("_ExSlow", lambda p, c: release.wait(5) and "late", timeout=0.2))
+    start = time.monotonic()
+    result = execute_tool("_ExSlow", {}, {})
+    release.set()
+    assert time.monotonic() - start < 2
+    assert result.startswith("Error: _ExSlow timed out after 0.2s and was abandoned")
+    assert get_tool_metrics()["_ExSlow"]["timeouts"] >= 1
+
+
+def test_config_timeout_applies_when_tool_has_none():
+    release = threading.Event()
+    register_tool(_tool("_ExSlow", lambda p, c: release.wait(5) and "late"))
+    result = execute_tool("_ExSlow", {}, {"tool_timeout": 0.2})
+    release.set()
+    assert "timed out after 0.2s" in result
+
+
+def test_pool_replaces_stuck_workers():
+    pool = WorkerPool(size=1)
+    release = threading.Event()
+    stuck = pool.submit(release.wait, 5)
+    with pytest.raises(Exception):
+        stuck.result(0.05)
+    pool.abandon(stuck)
+    assert pool.submit(lambda: "free").result(1) == "free"
+    release.set()
+    stuck.result(1)
+    assert pool.stats()["stuck"] == 0
+
+
+def test_inline_and_exceptions():
+    assert run_tool(lambda p, c: threading.current_thread().name, {}, {}, timeout=0) == \
+        threading.current_thread().name
+    with pytest.raises(ZeroDivisionError):
+        run_tool(lambda p, c: 1 / 0, {}, {}, timeout=1)
+
+
+@needs_fork
+def test_isolated_tool_runs_in_child_and_is_killed_on_timeout():
+    register_tool(_tool("_ExPid", lambda p, c: str(os.getpid()), isolate=True, timeout=5))
+    assert execute_tool("_ExPid", {}, {}) != str(os.getpid())
+
+    def spin(p, c):
+        while True:
+            pass
+    with pytest.raises(ToolTimeout) as info:
+        run_tool(spin, {}, {}, timeout=0.3, isolate=True)
+    assert info.value.killed
+
+
+@needs_fork
+def test_isolated_tool_memory_limit():
+    register_tool(_tool("_ExHog", lambda p, c: str(len(bytearray(512 * 1024 * 1024))), isolate=True, timeout=10))
+    result = execute_tool("_ExHog", {}, {"tool_memory_limit_mb": 256})
+    assert result.startswith("Error executing _ExHog") and "MemoryError" in result
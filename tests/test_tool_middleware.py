@@ -0,0 +1,119 @@
+"""Tests for the tool-registry middleware pipeline and its built-in stages."""
+from __future__ import annotations
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tool_registry
+import tools
+from tool_registry import (
+    ToolDef,
+    add_middleware,
+    execute_tool,
+    get_middlewares,
+    get_tool_metrics,
+    register_tool,
+    remove_middleware,
+    unregister_tool,
+)
+
+
+def _tool(name: str, func, **kw) -> ToolDef:
+    return ToolDef(name=name, schema={"name": name, "description": "d", "input_schema": {"type": "object"}},
+                   func=func, **kw)
+
+
+@pytest.fixture(autouse=True)
+def _cleanup():
+    tool_registry.reset_tool_metrics()
+    tool_registry.clear_tool_cache()
+    yield
+    for name in ("_MwEcho", "_MwCached", "_MwWrite", "_MwBoom"):
+        unregister_tool(name)
+    for name in ("_outer", "_inner"):
+        remove_middleware(name)
+
+
+def test_builtin_middlewares_are_ordered():
+    names = [name for name, _ in get_middlewares()]
+    assert names[:6] == ["validate", "permission", "timing", "cache", "output", "checkpoint"]
+
+
+def test_middlewares_wrap_in_order_and_can_rewrite_calls():
+    seen = []
+    register_tool(_tool("_MwEcho", lambda p, c: p["text"]))
+
+    def outer(call, next_):
+        seen.append("outer")
+        return next_(call) + "!"
+
+    def inner(call, next_):
+        seen.append("inner")
+        call.params = {"text": call.params["text"].upper()}
+        return next_(call)
+
+    add_middleware("_inner", inner, order=45)
+    add_middleware("_outer", outer, order=5)
+    assert execute_tool("_MwEcho", {"text": "hi"}, {}) == "HI!"
+    assert seen == ["outer", "inner"]
+
+
+def test_timing_records_calls_and_errors():
+    register_tool(_tool("_MwEcho", lambda p, c: "ok"))
+    register_tool(_tool("_MwBoom", lambda p, c: 1 / 0))
+    for _ in range(3):
+        execute_tool("_MwEcho", {}, {})
+    assert execute_tool("_MwBoom", {}, {}).startswith("Error executing _MwBoom")
+    metrics = get_tool_metrics()
+    assert metrics["_MwEcho"]["calls"] == 3 and metrics["_MwEcho"]["errors"] == 0
+    assert metrics["_MwBoom"]["errors"] == 1
+    assert metrics["_MwEcho"]["p50_ms"] <= metrics["_MwEcho"]["max_ms"]
+    assert sum(metrics["_MwEcho"]["histogram"].values()) == 3
+
+
+def test_cache_reuses_results_until_a_write_runs():
+    calls = []
+    register_tool(_tool("_MwCached", lambda p, c: calls.append(1) or f"n={len(calls)}",
+                        read_only=True, cache_ttl=60))
+    register_tool(_tool("_MwWrite", lambda p, c: "written"))
+    assert execute_tool("_MwCached", {"q": 1}, {}) == "n=1"
+    assert execute_tool("_MwCached", {"q": 1}, {}) == "n=1"
+    assert execute_tool("_MwCached", {"q": 2}, {}) == "n=2"
+    assert get_tool_metrics()["_MwCached"]["cached"] == 1
+    execute_tool("_MwWrite", {}, {})
+    assert execute_tool("_MwCached", {"q": 1}, {}) == "n=3"
+
+
+def test_cache_hits_are_not_spilled_again(monkeypatch):
+    import blob.store
+
+    spills = []
+    monkeypatch.setattr(blob.store, "spill_tool_result",
+                        lambda session, name, text, threshold: spills.append(name) or "[spilled]")
+    register_tool(_tool("_MwCached", lambda p, c: "x" * 500, read_only=True, cache_ttl=60))
+    config = {"tool_spill_threshold": 100}
+    assert execute_tool("_MwCached", {}, config) == "[spilled]"
+    assert execute_tool("_MwCached", {}, config) == "[spilled]"
+    assert spills == ["_MwCached"]
+    assert tool_registry.get_tool("WebFetch").cache_ttl == 0, "WebFetch freshness is left to the HTTP cache"
+
+
+def test_output_truncation_keeps_head_and_tail():
+    register_tool(_tool("_MwEcho", lambda p, c: "a" * 500 + "b" * 500))
+    result = execute_tool("_MwEcho", {}, {}, max_output=100)
+    assert result.startswith("a" * 50) and result.endswith("b" * 25)
+    assert "chars truncated" in result
+
+
+def test_permission_middleware_only_applies_with_a_mode(tmp_path):
+    target = tmp_path / "out.txt"
+    denied = tools.execute_tool("Write", {"file_path": str(target), "content": "x"},
+                                permission_mode="manual", ask_permission=lambda desc: False)
+    assert denied.startswith("Denied")
+    assert not target.exists()
+    execute_tool("Write", {"file_path": str(target), "content": "x"}, {})
+    assert target.read_text() == "x"
@@ -0,0 +1,95 @@
+"""Tests for tool output normalisation and error-preserving truncation."""
+from __future__ import annotations
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tool_output
+import tools
+from tool_output import normalize, truncate
+from tool_registry import ToolDef, execute_tool, register_tool, unregister_tool
+
+
+@pytest.fixture(autouse=True)
+def _cleanup():
+    tool_output.reset_output_stats()
+    yield
+    unregister_tool("_OutNoisy")
+
+
+def test_strips_ansi_and_progress_redraws():
+    text = "\x1b[32mok\x1b[0m\n 10%\r 50%\r100% done\r\nnext"
+    assert normalize(text) == "ok\n100% done\nnext"
+
+
+def test_collapses_identical_runs_stack_blocks_and_warnings():
+    frames = ['  File "a.py", line 3, in f', "    return f(x)"] * 50
+    warns = ["npm WARN deprecated request@2.88.2: gone"] * 2 + ["body"]
+    out = normalize("\n".join(["start"] + ["same"] * 5 + frames + warns))
+    assert out.startswith("start\nsame  [repeated 5x]\n")
+    assert "[previous 2 lines repeated 49 more times]" in out
+    assert out.endswith("npm WARN deprecated request@2.88.2: gone  [repeated 2x]\nbody")
+
+
+CODE = """\
+x1 = compute(1)
+x2 = compute(2)
+x3 = compute(3)
+x4 = compute(4)
+x5 = compute(5)
+warnings.warn('deprecated')
+y = x1 + x2
+warnings.warn('deprecated')
+"""
+
+DIFF = """\
+diff --git a/data.csv b/data.csv
+@@ -1,6 +1,6 @@
+ id,value
+-1,10
+-2,20
+-3,30
++1,11
++2,21
++3,31
+ 4,40
+ 5,50
+"""
+
+
+@pytest.mark.parametrize("text", [
+    CODE, DIFF, "\n".join(f"step {i}/100" for i in range(100)),
+    "\n".join(f"a.py:{n}: warning: unused import" for n in (1, 2, 3)),
+])
+def test_distinct_lines_come_back_byte_identical(text):
+    assert normalize(text) == text
+
+
+def test_grep_results_are_not_normalised(tmp_path):
+    for i in (1, 3, 5, 8, 13, 21):
+        (tmp_path / f"f{i}.py").write_text("print('hello')\n")
+    out = execute_tool("Grep", {"pattern": "hello", "path": str(tmp_path)}, {})
+    assert sorted(out.splitlines()) == sorted(str(tmp_path / f"f{i}.py") for i in (1, 3, 5, 8, 13, 21))
+
+
+def test_truncation_keeps_error_lines_from_the_middle():
+    lines = [f"line {i} fine" for i in range(400)]
+    lines[200] = "FAILED tests/test_x.py::test_y - AssertionError"
+    out = truncate("\n".join(lines), 2000)
+    assert out.startswith("line 0 fine")
+    assert "FAILED tests/test_x.py::test_y" in out
+    assert "error/failure lines from them kept" in out
+    assert len(out) < 2200
+
+
+def test_registry_normalises_opted_in_tools_and_records_tokens():
+    noisy = "\n".join(["\x1b[1mbuilding\x1b[0m"] * 200)
+    register_tool(ToolDef(name="_OutNoisy", schema={"name": "_OutNoisy", "input_schema": {"type": "object"}},
+                          func=lambda p, c: noisy, normalize=True))
+    assert execute_tool("_OutNoisy", {}, {}) == "building  [repeated 200x]"
+    stats = tool_output.get_output_stats()["_OutNoisy"]
+    assert stats["tokens_before"] > 10 * stats["tokens_after"]
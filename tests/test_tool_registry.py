@@ -0,0 +1,79 @@
+"""Tests for the registry's alias index, version counter and derived-payload caches."""
+from __future__ import annotations
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import providers
+import tool_registry
+from tool_registry import ToolDef, get_registry_version, get_tool, get_tool_schemas, register_tool, unregister_tool
+
+
+def _tool(name: str) -> ToolDef:
+    return ToolDef(name=name, schema={"name": name, "description": "d", "input_schema": {"type": "object"}},
+                   func=lambda p, c: name)
+
+
+@pytest.fixture(autouse=True)
+def _cleanup():
+    yield
+    for name in ("_RegA", "_rega", "_RegB"):
+        unregister_tool(name)
+
+
+def test_version_bumps_and_schema_list_is_cached():
+    register_tool(_tool("_RegA"))
+    version = get_registry_version()
+    schemas = get_tool_schemas()
+    assert get_tool_schemas() is schemas
+    register_tool(_tool("_RegB"))
+    assert get_registry_version() == version + 1
+    assert get_tool_schemas() is not schemas
+    assert [s["name"] for s in get_tool_schemas()][-2:] == ["_RegA", "_RegB"]
+
+
+def test_alias_index_survives_unregister():
+    register_tool(_tool("_RegA"))
+    register_tool(_tool("_rega"))
+    assert get_tool("_REGA").name == "_RegA"
+    assert unregister_tool("_RegA") is True
+    assert get_tool("_REGA").name == "_rega"
+    assert unregister_tool("_RegA") is False
+    unregister_tool("_rega")
+    assert get_tool("_rega") is None
+
+
+def test_cached_for_version_rebuilds_after_change():
+    calls = []
+    build = lambda: calls.append(1) or len(calls)
+    assert tool_registry.cached_for_version("t", build) == 1
+    assert tool_registry.cached_for_version("t", build) == 1
+    register_tool(_tool("_RegA"))
+    assert tool_registry.cached_for_version("t", build) == 2
+
+
+def test_cached_for_version_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(tool_registry, "_MAX_DERIVED", 2)
+    register_tool(_tool("_RegA"))
+    tool_registry.cached_for_version("lru-a", lambda: "a")
+    tool_registry.cached_for_version("lru-b", lambda: "b")
+    tool_registry.cached_for_version("lru-a", lambda: "rebuilt")
+    assert tool_registry.cached_for_version("lru-c", lambda: "c") == "c"
+    assert tool_registry.cached_for_version("lru-c", lambda: "rebuilt") == "c"
+    assert tool_registry.cached_for_version("lru-a", lambda: "rebuilt") == "a"
+    assert tool_registry.cached_for_version("lru-b", lambda: "rebuilt") == "rebuilt"
+
+
+def test_provider_payload_is_reused_per_version():
+    register_tool(_tool("_RegA"))
+    schemas = get_tool_schemas()
+    first = providers._cached_tools_payload(schemas)
+    assert providers._cached_tools_payload(schemas) is first
+    assert first[-1] == {"type": "function", "function": {
+        "name": "_RegA", "description": "d", "parameters": {"type": "object"}}}
+    register_tool(_tool("_RegB"))
+    assert providers._cached_tools_payload(get_tool_schemas()) is not first
@@ -0,0 +1,89 @@
+"""Tests for tool input validation and coercion."""
+from __future__ import annotations
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tool_registry
+import tools
+from tool_registry import ToolDef, execute_tool, get_tool_input_stats, register_tool, unregister_tool
+from tool_schema import compile_schema
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "file_path": {"type": "string"},
+        "limit": {"type": "integer"},
+        "ratio": {"type": "number"},
+        "replace_all": {"type": "boolean"},
+        "mode": {"type": "string", "enum": ["content", "count"]},
+        "paths": {"type": "array", "items": {"type": "string"}},
+        "edits": {
+            "type": "array",
+            "items": {"type": "object", "properties": {"old": {"type": "string"}}, "required": ["old"]},
+        },
+    },
+    "required": ["file_path"],
+}
+
+
+@pytest.fixture(autouse=True)
+def _cleanup():
+    tool_registry.reset_tool_input_stats()
+    yield
+    unregister_tool("_SchemaEcho")
+
+
+def test_coerces_obvious_type_mistakes():
+    v = compile_schema(SCHEMA)({
+        "file_path": "a.py", "limit": "20", "ratio": "0.5", "replace_all": "true",
+        "mode": "Content", "paths": "b.py", "offset": None, "junk": 1,
+    })
+    assert not v.errors
+    assert v.params == {"file_path": "a.py", "limit": 20, "ratio": 0.5, "replace_all": True,
+                        "mode": "content", "paths": ["b.py"]}
+    assert "dropped unknown junk" in v.repairs
+
+
+def test_unwraps_json_text_and_argument_wrappers():
+    validate = compile_schema(SCHEMA)
+    assert validate('{"file_path": "a.py", "limit": 3}').params == {"file_path": "a.py", "limit": 3}
+    assert validate({"arguments": '{"file_path": "a.py"}'}).params == {"file_path": "a.py"}
+    assert validate({"file_path": "a.py", "paths": '["x", "y"]'}).params["paths"] == ["x", "y"]
+
+
+def test_reports_precise_errors():
+    v = compile_schema(SCHEMA)({"limit": "ten", "mode": "lines", "edits": [{"new": "x"}]})
+    assert v.errors == [
+        "limit must be integer (got 'ten')",
+        "mode must be one of content, count (got 'lines')",
+        "edits[0].old is required",
+        "file_path is required",
+    ]
+    assert compile_schema(SCHEMA)("not json").errors
+
+
+def test_registry_rejects_before_execution_and_tracks_models():
+    calls = []
+    register_tool(ToolDef(name="_SchemaEcho", schema={"name": "_SchemaEcho", "input_schema": SCHEMA},
+                          func=lambda p, c: calls.append(p) or "ok"))
+    result = execute_tool("_SchemaEcho", {"limit": 5}, {"model": "m1"})
+    assert result == ("Error: invalid input for _SchemaEcho: file_path is required. Expected: file_path: string, "
+                      "limit?: integer, ratio?: number, replace_all?: boolean, mode?: string, paths?: array, "
+                      "edits?: array")
+    assert calls == []
+    assert execute_tool("_SchemaEcho", {"file_path": "a", "limit": "5"}, {"model": "m1"}) == "ok"
+    assert calls == [{"file_path": "a", "limit": 5}]
+    stats = get_tool_input_stats()["m1"]
+    assert (stats["calls"], stats["repaired"], stats["rejected"], stats["retry_rate"]) == (2, 1, 1, 0.5)
+
+
+def test_builtin_read_accepts_string_limit(tmp_path):
+    target = tmp_path / "f.txt"
+    target.write_text("one\ntwo\nthree\n")
+    result = execute_tool("Read", {"file_path": str(target), "limit": "1", "bogus": True}, {})
+    assert "one" in result and "three" not in result
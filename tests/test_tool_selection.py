@@ -0,0 +1,77 @@
+"""Tests for per-turn tool schema selection and ToolSearch."""
+from __future__ import annotations
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tools  # noqa: F401  (registers built-in tools)
+import tool_selection
+from tool_registry import ToolDef, execute_tool, register_tool, unregister_tool
+
+_FAKE = [
+    ("mcp__github__create_issue", "Create a new issue in a GitHub repository"),
+    ("mcp__github__list_pull_requests", "List pull requests for a GitHub repository"),
+    ("mcp__slack__post_message", "Post a message to a Slack channel"),
+    ("mcp__jira__transition_ticket", "Move a Jira ticket to another workflow state"),
+] + [(f"mcp__misc__op_{i}", f"Miscellaneous operation number {i}") for i in range(50)]
+
+
+@pytest.fixture(autouse=True)
+def _fake_mcp_tools():
+    for name, desc in _FAKE:
+        register_tool(ToolDef(name=name, schema={"name": name, "description": desc,
+                                                 "input_schema": {"type": "object"}},
+                              func=lambda p, c: "ok"))
+    tool_selection.reset_enabled_tools()
+    yield
+    for name, _ in _FAKE:
+        unregister_tool(name)
+    tool_selection.reset_enabled_tools()
+
+
+def _names(schemas):
+    return {s["name"] for s in schemas}
+
+
+def test_core_plus_relevant_tools_only():
+    messages = [{"role": "user", "content": "Open a GitHub issue about the failing build"}]
+    names = _names(tool_selection.select_tool_schemas(messages, {"_session_id": "s1"}))
+    assert set(tool_selection.CORE_TOOLS) <= names
+    assert "mcp__github__create_issue" in names
+    assert "mcp__slack__post_message" not in names
+    assert not any(n.startswith("mcp__misc__") for n in names)
+    assert len(names) < 25
+
+
+def test_all_mode_and_small_registries_send_everything():
+    messages = [{"role": "user", "content": "hi"}]
+    everything = tool_selection.select_tool_schemas(messages, {"tool_selection": "all"})
+    assert "mcp__misc__op_7" in _names(everything)
+    for name, _ in _FAKE:
+        unregister_tool(name)
+    small = tool_selection.select_tool_schemas(messages, {})
+    assert _names(small) == _names(tool_selection.get_tool_schemas())
+
+
+def test_recently_used_tools_stay_selected():
+    messages = [
+        {"role": "user", "content": "do the thing"},
+        {"role": "assistant", "content": "", "tool_calls": [{"id": "1", "name": "mcp__misc__op_3", "input": {}}]},
+        {"role": "tool", "tool_call_id": "1", "name": "mcp__misc__op_3", "content": "ok"},
+    ]
+    assert "mcp__misc__op_3" in _names(tool_selection.select_tool_schemas(messages, {}))
+
+
+def test_tool_search_enables_tools_for_the_session():
+    out = execute_tool("ToolSearch", {"query": "post a slack message"}, {"_session_id": "s2"})
+    assert out.splitlines()[1].startswith("- mcp__slack__post_message: Post a message")
+    messages = [{"role": "user", "content": "unrelated"}]
+    assert "mcp__slack__post_message" in _names(tool_selection.select_tool_schemas(messages, {"_session_id": "s2"}))
+    assert "mcp__slack__post_message" not in _names(tool_selection.select_tool_schemas(messages, {"_session_id": "s3"}))
+    exact = execute_tool("ToolSearch", {"query": "mcp__misc__op_1, MCP__MISC__OP_2"}, {"_session_id": "s2"})
+    assert "Enabled 2 tool(s)" in exact
+    assert {"mcp__misc__op_1", "mcp__misc__op_2"} <= tool_selection.enabled_tools("s2")
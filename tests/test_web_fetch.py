@@ -0,0 +1,122 @@
+"""Tests for WebFetch: pooled client, HTTP cache and streaming HTML extraction."""
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("httpx")
+
+import tools
+import web.cache as web_cache
+import web.client as web_client
+from web import html_to_text
+
+_TEST_DIR = Path(__file__).resolve().parent.parent / ".test-tmp" / "web-cache"
+
+PAGE = (
+    "<html><head><title>T</title><style>.x{color:red}</style></head><body>"
+    "<script>var secret = 1;</script><h1>Docs</h1><p>Hello&nbsp;<b>world</b> &amp; friends.</p>"
+    "<ul><li>one</li><li>two</li></ul></body></html>"
+)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    hits: dict = {}
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        _Handler.hits[self.path] = _Handler.hits.get(self.path, 0) + 1
+        body = PAGE.encode()
+        if self.path == "/etag":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.send_header("ETag", '"v1"')
+                self.end_headers()
+                return
+            headers = {"ETag": '"v1"', "Cache-Control": "no-cache"}
+        elif self.path == "/fresh":
+            headers = {"Cache-Control": "max-age=3600"}
+        elif self.path == "/big":
+            body = ("<p>" + "word " * 200 + "</p>").encode() * 2000
+            headers = {"Cache-Control": "no-store"}
+        else:
+            headers = {"Cache-Control": "no-store"}
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    if _TEST_DIR.exists():
+        shutil.rmtree(_TEST_DIR, ignore_errors=True)
+    monkeypatch.setattr(web_cache, "_cache_root", lambda: _TEST_DIR)
+    _Handler.hits = {}
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+    web_client.close_client()
+    shutil.rmtree(_TEST_DIR, ignore_errors=True)
+
+
+def test_html_to_text_skips_scripts_and_keeps_blocks():
+    text = html_to_text(PAGE)
+    assert "secret" not in text and "color" not in text
+    assert text == "Docs\nHello world & friends.\none\ntwo"
+
+
+def test_html_to_text_handles_unclosed_head():
+    page = "<html><head><title>T</title><meta charset=utf-8><body><p>Body text</p></body></html>"
+    assert html_to_text(page) == "Body text"
+    assert html_to_text("<head><title>T</title><div>Flow content</div>") == "Flow content"
+
+
+def test_html_to_text_stops_at_limit():
+    assert 95 <= len(html_to_text("<p>" + "abc " * 10000 + "</p>", max_chars=100)) <= 100
+
+
+def test_fresh_response_is_served_from_cache(server):
+    first = tools._webfetch(f"{server}/fresh")
+    second = tools._webfetch(f"{server}/fresh")
+    assert first == second and "Hello world" in first
+    assert _Handler.hits["/fresh"] == 1
+
+
+def test_etag_is_revalidated_with_304(server):
+    before = web_client.get_fetch_stats()["revalidated"]
+    tools._webfetch(f"{server}/etag")
+    assert "Docs" in tools._webfetch(f"{server}/etag")
+    assert _Handler.hits["/etag"] == 2
+    assert web_client.get_fetch_stats()["revalidated"] == before + 1
+
+
+def test_no_store_is_not_cached_and_large_pages_are_bounded(server):
+    tools._webfetch(f"{server}/plain")
+    tools._webfetch(f"{server}/plain")
+    assert _Handler.hits["/plain"] == 2
+    assert not _TEST_DIR.exists() or not any(_TEST_DIR.glob("*.json"))
+    assert 24990 <= len(tools._webfetch(f"{server}/big")) <= 25000
+
+
+def test_connection_pool_is_shared(server):
+    tools._webfetch(f"{server}/plain")
+    client = web_client.get_client()
+    tools._webfetch(f"{server}/plain")
+    assert web_client.get_client() is client
@@ -0,0 +1,119 @@
+"""Tests for the built-in Grep fallback and cached ripgrep detection."""
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tools
+import workspace.grep as ws_grep
+from workspace import clear_file_indexes
+
+_TEST_DIR = Path(__file__).resolve().parent.parent / ".test-tmp" / "workspace-grep"
+
+
+@pytest.fixture(autouse=True)
+def _use_test_dir():
+    if _TEST_DIR.exists():
+        shutil.rmtree(_TEST_DIR, ignore_errors=True)
+    (_TEST_DIR / ".git").mkdir(parents=True)
+    clear_file_indexes()
+    _touch(".gitignore", "dist/\n")
+    _touch("src/a.py", "import os\n\ndef alpha():\n    return TODO_one\n")
+    _touch("src/b.py", "def beta():\n    pass\n# todo_two\n")
+    _touch("src/c.txt", "TODO_three\n")
+    _touch("dist/bundle.py", "TODO_hidden\n")
+    _touch("node_modules/x.py", "TODO_hidden\n")
+    (_TEST_DIR / "src" / "blob.bin").write_bytes(b"\0\1TODO_binary")
+    yield
+    clear_file_indexes()
+    shutil.rmtree(_TEST_DIR, ignore_errors=True)
+
+
+def _touch(rel: str, text: str) -> None:
+    path = _TEST_DIR / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def _rel(out: str) -> list:
+    return [line.replace(str(_TEST_DIR) + os.sep, "") for line in out.splitlines()]
+
+
+def test_files_with_matches_skips_ignored_and_binary():
+    out = ws_grep.search("TODO", str(_TEST_DIR))
+    assert _rel(out) == ["src/a.py", "src/c.txt"]
+
+
+def test_glob_and_case_insensitive():
+    out = ws_grep.search("todo", str(_TEST_DIR), glob="*.py", case_insensitive=True)
+    assert _rel(out) == ["src/a.py", "src/b.py"]
+    out = ws_grep.search("todo", str(_TEST_DIR), glob="*.{txt,md}", case_insensitive=True)
+    assert _rel(out) == ["src/c.txt"]
+
+
+def test_count_and_content_with_context():
+    assert _rel(ws_grep.search("def ", str(_TEST_DIR), output_mode="count")) == ["src/a.py:1", "src/b.py:1"]
+    out = ws_grep.search("return", str(_TEST_DIR / "src"), output_mode="content", context=1)
+    assert _rel(out) == ["src/a.py-3-def alpha():", "src/a.py:4:    return TODO_one"]
+
+
+def test_output_limit_stops_early():
+    for i in range(200):
+        _touch(f"many/f{i:03}.py", "needle\n")
+    out = ws_grep.search("needle", str(_TEST_DIR / "many"), max_chars=500)
+    assert len(out) <= 500
+    assert "f000.py" in out and "f199.py" not in out
+
+
+def test_anchored_patterns_match_inner_lines():
+    _touch("src/end.py", "x = 1\nend_marker\nmore\n")
+    out = ws_grep.search("^def beta", str(_TEST_DIR), output_mode="content")
+    assert _rel(out) == ["src/b.py:1:def beta():"]
+    assert _rel(ws_grep.search("^def alpha", str(_TEST_DIR))) == ["src/a.py"]
+    out = ws_grep.search("^    return", str(_TEST_DIR), output_mode="content")
+    assert _rel(out) == ["src/a.py:4:    return TODO_one"]
+    assert _rel(ws_grep.search("^end_marker$", str(_TEST_DIR))) == ["src/end.py"]
+
+
+def test_prefilter_never_drops_unicode_matches():
+    _touch("src/u.py", "name = 'Ärger'\nlabel = 'écrit'\nunit = '\u212a'\n")
+    assert _rel(ws_grep.search("ärger", str(_TEST_DIR), case_insensitive=True)) == ["src/u.py"]
+    assert _rel(ws_grep.search(r"'\w+'", str(_TEST_DIR))) == ["src/u.py"]
+    assert _rel(ws_grep.search("'.crit'", str(_TEST_DIR))) == ["src/u.py"]
+    assert "src/u.py" in _rel(ws_grep.search("unit = 'k'", str(_TEST_DIR), case_insensitive=True))
+
+
+def test_invalid_regex_is_reported():
+    assert ws_grep.search("(unclosed", str(_TEST_DIR)).startswith("Error: invalid regex")
+
+
+def test_rg_detection_is_cached(monkeypatch):
+    calls = []
+    monkeypatch.setattr(tools.shutil, "which", lambda name: calls.append(name))
+    tools._has_rg.cache_clear()
+    try:
+        assert tools._grep("TODO", str(_TEST_DIR)) != ""
+        tools._grep("TODO", str(_TEST_DIR))
+        assert calls == ["rg"]
+    finally:
+        tools._has_rg.cache_clear()
+
+
+def test_fallback_grep_tool_reuses_the_shared_file_index(monkeypatch):
+    from tool_registry import execute_tool
+    from workspace import index as ws_index
+
+    monkeypatch.setattr(tools.shutil, "which", lambda name: None)
+    tools._has_rg.cache_clear()
+    try:
+        out = execute_tool("Grep", {"pattern": "TODO_one", "path": str(_TEST_DIR)}, {})
+        assert _rel(out) == ["src/a.py"]
+        assert ws_index._indexes
+    finally:
+        tools._has_rg.cache_clear()
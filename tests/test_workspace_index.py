@@ -0,0 +1,177 @@
+"""Tests for the ignore-aware workspace file index."""
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import workspace.index as ws_index
+from workspace import FileIndex, clear_file_indexes, parse_gitignore, project_snapshot
+from workspace.ignore import IgnoreMatcher
+
+_TEST_DIR = Path(__file__).resolve().parent.parent / ".test-tmp" / "workspace"
+
+
+@pytest.fixture(autouse=True)
+def _use_test_dir(monkeypatch):
+    if _TEST_DIR.exists():
+        shutil.rmtree(_TEST_DIR, ignore_errors=True)
+    _TEST_DIR.mkdir(parents=True, exist_ok=True)
+    (_TEST_DIR / ".git").mkdir()
+    clear_file_indexes()
+    yield
+    clear_file_indexes()
+    shutil.rmtree(_TEST_DIR, ignore_errors=True)
+
+
+def _touch(rel: str, text: str = "") -> Path:
+    path = _TEST_DIR / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def _tree():
+    _touch(".gitignore", "build/\n*.log\n!keep.log\n/secret.txt\n")
+    _touch("src/app.py")
+    _touch("src/util.py")
+    _touch("src/pkg/core.py")
+    _touch("src/pkg/.gitignore", "generated_*.py\n")
+    _touch("src/pkg/generated_a.py")
+    _touch("src/secret.txt")
+    _touch("secret.txt")
+    _touch("build/out.py")
+    _touch("node_modules/lib/index.js")
+    _touch("debug.log")
+    _touch("keep.log")
+    _touch("README.md")
+
+
+def test_gitignore_rules():
+    rules = parse_gitignore("# comment\n\n*.pyc\n!important.pyc\ndocs/**/tmp/\n")
+    assert len(rules) == 3
+    assert rules[1].negate
+    assert rules[2].dir_only
+    assert rules[2].regex.match("docs/a/b/tmp")
+
+
+def test_walk_respects_ignores():
+    _tree()
+    files = FileIndex(_TEST_DIR).files()
+    assert files == [
+        ".gitignore", "README.md", "keep.log",
+        "src/app.py", "src/pkg/.gitignore", "src/pkg/core.py", "src/secret.txt", "src/util.py",
+    ]
+
+
+def test_glob_matches_pathlib_order_and_stops_early():
+    _tree()
+    index = FileIndex(_TEST_DIR)
+    assert index.glob("**/*.py") == ["src/app.py", "src/pkg/core.py", "src/util.py"]
+    assert index.glob("*.py", start="src") == ["src/app.py", "src/util.py"]
+    assert index.glob("**/*.py", limit=1) == ["src/app.py"]
+    assert index.glob("node_modules/lib/*.js") is None
+
+
+def test_incremental_refresh_sees_new_files(monkeypatch):
+    _tree()
+    monkeypatch.setattr(ws_index, "REFRESH_INTERVAL", 0.0)
+    index = FileIndex(_TEST_DIR)
+    index.files()
+    generation = index.generation
+    index.files()
+    assert index.generation == generation, "unchanged directories must not be rescanned"
+
+    new = _touch("src/pkg/new_mod.py")
+    stat = new.parent.stat()
+    os.utime(new.parent, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert "src/pkg/new_mod.py" in index.glob("**/*.py")
+
+
+def _bump_mtime(path: Path) -> None:
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_directory_change_rescans_only_that_directory(monkeypatch):
+    _tree()
+    monkeypatch.setattr(ws_index, "REFRESH_INTERVAL", 0.0)
+    index = FileIndex(_TEST_DIR)
+    index.files()
+    generation = index.generation
+
+    _touch("NEWS.md")
+    _bump_mtime(_TEST_DIR)
+    files = index.files()
+    assert "NEWS.md" in files and "src/pkg/core.py" in files
+    assert index.generation == generation + 1, "descendant listings must be kept"
+
+    shutil.rmtree(_TEST_DIR / "src" / "pkg")
+    _bump_mtime(_TEST_DIR / "src")
+    assert not any(f.startswith("src/pkg/") for f in index.files())
+    assert "src/pkg" not in index._dirs
+
+
+def test_deleted_gitignore_rules_stop_applying(monkeypatch):
+    _tree()
+    monkeypatch.setattr(ws_index, "REFRESH_INTERVAL", 0.0)
+    index = FileIndex(_TEST_DIR)
+    assert "src/pkg/generated_a.py" not in index.files()
+    (_TEST_DIR / "src" / "pkg" / ".gitignore").unlink()
+    _bump_mtime(_TEST_DIR / "src" / "pkg")
+    assert "src/pkg/generated_a.py" in index.files()
+
+
+def test_gitignore_edit_invalidates_listing(monkeypatch):
+    _tree()
+    monkeypatch.setattr(ws_index, "REFRESH_INTERVAL", 0.0)
+    index = FileIndex(_TEST_DIR)
+    assert "README.md" in index.files()
+    gi = _TEST_DIR / ".gitignore"
+    gi.write_text(gi.read_text(encoding="utf-8") + "README.md\n", encoding="utf-8")
+    stat = gi.stat()
+    os.utime(gi, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert "README.md" not in index.files()
+
+
+def test_git_info_exclude_survives_root_rescan(monkeypatch):
+    _tree()
+    (_TEST_DIR / ".git" / "info").mkdir()
+    (_TEST_DIR / ".git" / "info" / "exclude").write_text("local_notes.md\n", encoding="utf-8")
+    _touch("local_notes.md")
+    monkeypatch.setattr(ws_index, "REFRESH_INTERVAL", 0.0)
+    index = FileIndex(_TEST_DIR)
+    assert "local_notes.md" not in index.files()
+    _touch("NEWS.md")
+    _bump_mtime(_TEST_DIR / ".gitignore")
+    _bump_mtime(_TEST_DIR)
+    files = index.files()
+    assert "NEWS.md" in files and "local_notes.md" not in files
+
+
+def test_parent_gitignore_applies_to_subdirectory_root():
+    _tree()
+    matcher = IgnoreMatcher((_TEST_DIR / "src").resolve())
+    assert matcher.is_ignored("debug.log", False)
+    assert not matcher.is_ignored("app.py", False)
+
+
+def test_project_snapshot_is_bounded():
+    _tree()
+    snapshot = project_snapshot(_TEST_DIR, limit=3).splitlines()
+    assert snapshot == [".gitignore", "README.md", "keep.log"]
+
+
+def test_glob_tool_uses_index():
+    import tools
+
+    _tree()
+    out = tools._glob("**/*.py", str(_TEST_DIR))
+    assert "core.py" in out
+    assert "generated_a.py" not in out and "build" not in out
+    assert "index.js" in tools._glob("node_modules/lib/*.js", str(_TEST_DIR))
@@ -0,0 +1,118 @@
+"""Tests for the token-budgeted repository map."""
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dev_council
+import workspace.repomap as repomap
+from workspace import build_repo_map, clear_file_indexes, clear_repo_map_cache, clear_symbol_indexes
+
+_TEST_DIR = Path(__file__).resolve().parent.parent / ".test-tmp" / "repomap"
+
+
+def _touch(rel: str, text: str) -> None:
+    path = _TEST_DIR / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+@pytest.fixture(autouse=True)
+def _use_test_dir():
+    if _TEST_DIR.exists():
+        shutil.rmtree(_TEST_DIR, ignore_errors=True)
+    (_TEST_DIR / ".git").mkdir(parents=True)
+    _touch("core/models.py", "class Invoice:\n    def total(self) -> int:\n        return 0\n")
+    _touch("core/billing.py", "from core.models import Invoice\n\n\ndef charge(invoice: Invoice) -> None:\n    pass\n")
+    _touch("api/views.py", "from core.billing import charge\n\n\ndef checkout(request):\n    return charge(None)\n")
+    for i in range(40):
+        _touch(f"misc/util_{i:02d}.py", f"def helper_{i}(value):\n    return value\n")
+    _touch("README.md", "# demo\n")
+    clear_file_indexes()
+    clear_symbol_indexes()
+    clear_repo_map_cache()
+    yield
+    clear_file_indexes()
+    clear_symbol_indexes()
+    clear_repo_map_cache()
+    shutil.rmtree(_TEST_DIR, ignore_errors=True)
+
+
+def test_relevant_files_get_signatures_within_budget():
+    text = build_repo_map("fix the invoice total in billing", 120, _TEST_DIR)
+    assert repomap.estimate_tokens(text) <= 120
+    assert (
+        "core/\n"
+        "  billing.py\n"
+        "    def charge(invoice: Invoice) -> None\n"
+        "  models.py\n"
+        "    class Invoice\n"
+        "      def total(self) -> int\n"
+    ) in text
+    top = [l for l in text.splitlines() if not l.startswith(" ")]
+    assert top == sorted(top) and len(top) == len(set(top))
+
+
+def test_map_is_a_tree_with_each_directory_listed_once():
+    text = build_repo_map("", 2000, _TEST_DIR)
+    lines = text.splitlines()
+    assert lines.count("misc/") == 1 and lines.count("core/") == 1
+    util = lines.index("  util_00.py")
+    assert lines[util + 1] == "    def helper_0(value)"
+    assert lines[lines.index("misc/") + 1] == "  util_00.py"
+
+
+@pytest.mark.parametrize("budget", [5, 40, 200, 2000])
+def test_budget_is_never_exceeded(budget):
+    assert repomap.estimate_tokens(build_repo_map("checkout", budget, _TEST_DIR)) <= budget
+
+
+def test_reference_graph_ranks_used_definitions():
+    from workspace import get_file_index, get_symbol_index
+    order = repomap.rank_files(get_symbol_index(_TEST_DIR).all_entries(),
+                               get_file_index(_TEST_DIR).files(), "")
+    assert order.index("core/models.py") < order.index("misc/util_05.py")
+    assert order.index("core/billing.py") < order.index("misc/util_05.py")
+
+
+def test_map_is_cached_until_files_change(monkeypatch):
+    first = build_repo_map("invoice", 300, _TEST_DIR)
+    calls = []
+    real = repomap.rank_files
+    monkeypatch.setattr(repomap, "rank_files", lambda *a, **k: calls.append(1) or real(*a, **k))
+    assert build_repo_map("invoice", 300, _TEST_DIR) == first
+    assert calls == []
+    _touch("core/models.py", "class Invoice:\n    def grand_total(self) -> int:\n        return 0\n")
+    get_index = repomap.get_symbol_index(_TEST_DIR)
+    get_index.notify_changed(_TEST_DIR / "core/models.py")
+    assert "def grand_total(self) -> int" in build_repo_map("invoice", 300, _TEST_DIR)
+    assert calls == [1]
+
+
+def test_council_budget_follows_model_context(monkeypatch):
+    seen = []
+    monkeypatch.setattr(dev_council, "build_repo_map", lambda task, budget, root: seen.append(budget) or "map")
+    monkeypatch.setattr(dev_council, "get_context_limit", lambda model: {"big": 1_000_000, "small": 8192}[model])
+    dev_council._repo_map("t", {}, ["big"])
+    dev_council._repo_map("t", {}, ["big", "small"])
+    dev_council._repo_map("t", {"repo_map_tokens": 777}, ["big"])
+    assert seen == [dev_council.REPO_MAP_MAX_TOKENS, dev_council.REPO_MAP_MIN_TOKENS, 777]
+
+
+def test_council_falls_back_to_the_file_list(monkeypatch):
+    monkeypatch.chdir(_TEST_DIR)
+    monkeypatch.setattr(dev_council, "build_repo_map", lambda task, budget, root: "")
+    listing = dev_council._repo_map("t", {"repo_map_tokens": 20})
+    assert listing.splitlines()[0] == "README.md"
+    assert repomap.estimate_tokens(listing) <= 20
+
+    def broken(task, budget, root):
+        raise RecursionError("deep tree")
+    monkeypatch.setattr(dev_council, "build_repo_map", broken)
+    assert dev_council._repo_map("t", {"repo_map_tokens": 2000}).startswith("README.md\napi/views.py")
@@ -0,0 +1,138 @@
+"""Tests for BM25 code search (SearchCode) and its persistent index."""
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tools
+import workspace.search as search
+import workspace.tools as ws_tools
+from workspace import clear_file_indexes, clear_search_indexes, get_search_index, relevant_code
+
+_BASE = Path(__file__).resolve().parent.parent / ".test-tmp" / "search"
+_TEST_DIR = _BASE / "repo"
+
+HTTP = '''\
+import time
+
+
+def fetch_with_retry(url, attempts=3):
+    """Retry the HTTP request with exponential backoff."""
+    for attempt in range(attempts):
+        time.sleep(2 ** attempt)
+    return url
+
+
+class RateLimiter:
+    def acquire(self):
+        return True
+'''
+
+DB = '''\
+def open_connection(dsn):
+    """Open a database connection."""
+    return dsn
+
+
+def run_migration(conn, version):
+    return conn, version
+'''
+
+
+@pytest.fixture(autouse=True)
+def _use_test_dir(monkeypatch):
+    if _BASE.exists():
+        shutil.rmtree(_BASE, ignore_errors=True)
+    (_TEST_DIR / ".git").mkdir(parents=True)
+    (_TEST_DIR / "net").mkdir()
+    (_TEST_DIR / "net" / "http.py").write_text(HTTP, encoding="utf-8")
+    (_TEST_DIR / "db.py").write_text(DB, encoding="utf-8")
+    (_TEST_DIR / "docs.md").write_text("# Setup\nRun the database migration before starting.\n", encoding="utf-8")
+    monkeypatch.setattr(search, "_index_dir", lambda: _BASE / "index")
+    monkeypatch.chdir(_TEST_DIR)
+    clear_file_indexes()
+    clear_search_indexes()
+    yield
+    clear_file_indexes()
+    clear_search_indexes()
+    shutil.rmtree(_BASE, ignore_errors=True)
+
+
+def test_tokenize_splits_identifiers():
+    assert search.tokenize("fetchWithRetry http_get") == ["fetchwithretry", "fetch", "with", "retry", "http_get", "http", "get"]
+
+
+def test_chunks_follow_definitions():
+    chunks = search.chunk_file(_TEST_DIR / "net" / "http.py", "net/http.py")
+    assert [(c.start, c.end, c.label) for c in chunks] == [
+        (1, 3, ""),
+        (4, 10, "def fetch_with_retry(url, attempts=3)"),
+        (11, 11, "class RateLimiter"),
+        (12, 13, "def acquire(self)"),
+    ]
+
+
+def test_search_ranks_the_matching_function_first():
+    out = ws_tools._search_code({"query": "retry request with backoff"}, {})
+    first = out.split("\n\n")[0]
+    assert first.startswith("1. net/http.py:4-10")
+    assert "def fetch_with_retry(url, attempts=3)" in first
+    assert "     5\t" in first
+    migration = get_search_index().search("database migration", limit=3)
+    assert {c.path for _, c, _ in migration} == {"db.py", "docs.md"}
+    assert ws_tools._search_code({"query": "migration", "path": "net"}, {}).startswith("No code matches")
+
+
+def test_edits_refresh_incrementally():
+    index = get_search_index()
+    index.search("anything")
+    indexed = index.indexed
+    tools._edit(str(_TEST_DIR / "db.py"), "def run_migration", "def apply_schema_upgrade")
+    top = index.search("schema upgrade", limit=1)
+    assert top and top[0][1].path == "db.py" and top[0][1].start == 6
+    assert index.indexed == indexed + 1
+
+
+def test_periodic_refresh_picks_up_changes_made_outside_the_tools(monkeypatch):
+    import workspace.index as ws_index
+
+    monkeypatch.setattr(search, "REFRESH_INTERVAL", 0.0)
+    monkeypatch.setattr(ws_index, "REFRESH_INTERVAL", 0.0)
+    index = get_search_index()
+    index.search("anything")
+    indexed = index.indexed
+    (_TEST_DIR / "net" / "cache.py").write_text("def evict_stale_entries():\n    pass\n", encoding="utf-8")
+    st = (_TEST_DIR / "net").stat()
+    os.utime(_TEST_DIR / "net", ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    top = index.search("evict stale entries", limit=1)
+    assert top and top[0][1].path == "net/cache.py"
+    assert index.indexed == indexed + 1, "only the added file is tokenized"
+
+    db = _TEST_DIR / "db.py"
+    db.write_text("def rotate_credentials(dsn):\n    return dsn\n", encoding="utf-8")
+    st = db.stat()
+    os.utime(db, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    top = index.search("rotate credentials", limit=1)
+    assert top and top[0][1].path == "db.py"
+
+
+def test_index_is_persisted_and_reused():
+    get_search_index().search("retry")
+    get_search_index().save()
+    clear_search_indexes()
+    reloaded = get_search_index()
+    assert reloaded.stats()["files"] == 3
+    reloaded.search("retry")
+    assert reloaded.indexed == 0, "unchanged files must not be re-tokenized after a reload"
+
+
+def test_relevant_code_respects_char_budget():
+    text = relevant_code("retry backoff connection", _TEST_DIR, limit=5, max_chars=400)
+    assert text.startswith("1. net/http.py") and len(text) <= 400
+    assert relevant_code("zzzz", _TEST_DIR) == ""
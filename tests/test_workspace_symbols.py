@@ -0,0 +1,121 @@
+"""Tests for the incremental symbol index and FindSymbol / FindReferences."""
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tools
+import workspace.tools as ws_tools
+from workspace import clear_file_indexes, clear_symbol_indexes, get_symbol_index
+from workspace.symbols import parse_file
+
+_TEST_DIR = Path(__file__).resolve().parent.parent / ".test-tmp" / "symbols"
+
+PY_SOURCE = '''\
+"""Module."""
+LIMIT = 10
+
+
+class Engine(Base):
+    mode: str = "fast"
+
+    def run(self, steps: int = 1) -> str:
+        # Engine is mentioned in a comment
+        return helper("Engine")
+
+
+async def helper(name):
+    return Engine()
+'''
+
+
+@pytest.fixture(autouse=True)
+def _use_test_dir(monkeypatch):
+    if _TEST_DIR.exists():
+        shutil.rmtree(_TEST_DIR, ignore_errors=True)
+    (_TEST_DIR / ".git").mkdir(parents=True)
+    (_TEST_DIR / "pkg").mkdir()
+    (_TEST_DIR / "pkg" / "engine.py").write_text(PY_SOURCE, encoding="utf-8")
+    (_TEST_DIR / "web.ts").write_text(
+        "export function render(el: Element): void {}\n"
+        "export const mount = async (el) => render(el);\n"
+        "export interface Props { a: number }\n", encoding="utf-8")
+    (_TEST_DIR / "node_modules").mkdir()
+    (_TEST_DIR / "node_modules" / "dep.js").write_text("function render() {}\n", encoding="utf-8")
+    monkeypatch.chdir(_TEST_DIR)
+    clear_file_indexes()
+    clear_symbol_indexes()
+    yield
+    clear_file_indexes()
+    clear_symbol_indexes()
+    shutil.rmtree(_TEST_DIR, ignore_errors=True)
+
+
+def test_python_symbols_have_spans_and_signatures():
+    symbols, refs = parse_file(_TEST_DIR / "pkg" / "engine.py", "pkg/engine.py")
+    by_name = {s.qualname: s for s in symbols}
+    assert by_name["Engine"].signature == "class Engine(Base)"
+    assert (by_name["Engine"].line, by_name["Engine"].end_line) == (5, 10)
+    assert by_name["Engine.run"].kind == "method"
+    assert by_name["Engine.run"].signature == "def run(self, steps: int=1) -> str"
+    assert by_name["helper"].signature.startswith("async def helper(name)")
+    assert by_name["LIMIT"].kind == "variable" and by_name["Engine.mode"].kind == "variable"
+    # comment and string mentions are not references
+    assert refs["Engine"] == (5, 14)
+
+
+def test_other_languages_use_patterns():
+    symbols, _ = parse_file(_TEST_DIR / "web.ts", "web.ts")
+    assert [(s.name, s.kind) for s in symbols] == [
+        ("render", "function"), ("mount", "function"), ("Props", "interface")]
+
+
+def test_find_symbol_tool_skips_ignored_dirs():
+    out = ws_tools._find_symbol({"name": "render"}, {})
+    assert out.splitlines()[0] == "1 definition(s) of 'render':"
+    assert "web.ts:1  [function] render" in out
+    assert "node_modules" not in out
+    assert "pkg/engine.py:8-10  [method] Engine.run" in ws_tools._find_symbol({"name": "Engine.run"}, {})
+    fuzzy = ws_tools._find_symbol({"name": "elpe"}, {})
+    assert fuzzy.startswith("No exact match") and "helper" in fuzzy
+
+
+def test_find_references_marks_definitions():
+    out = ws_tools._find_references({"name": "Engine"}, {})
+    assert out.splitlines()[0] == "2 reference(s) to 'Engine':"
+    assert "pkg/engine.py:5: class Engine(Base):  (definition)" in out
+    assert "pkg/engine.py:14: return Engine()" in out
+
+
+def test_edits_through_tools_refresh_the_index():
+    index = get_symbol_index()
+    ws_tools._find_symbol({"name": "helper"}, {})
+    parsed = index.parsed
+    tools._edit(str(_TEST_DIR / "pkg" / "engine.py"), "async def helper(name):", "async def assist(name):")
+    tools._write(str(_TEST_DIR / "pkg" / "extra.py"), "def brand_new():\n    pass\n")
+    assert "pkg/engine.py:13" in ws_tools._find_symbol({"name": "assist"}, {})
+    assert "pkg/extra.py:1-2" in ws_tools._find_symbol({"name": "brand_new"}, {})
+    assert ws_tools._find_symbol({"name": "helper"}, {}).startswith("No symbol")
+    assert index.parsed == parsed + 2
+
+
+def test_edits_made_outside_the_tools_are_picked_up(monkeypatch):
+    import workspace.index as ws_index
+    import workspace.symbols as ws_symbols
+
+    monkeypatch.setattr(ws_symbols, "REFRESH_INTERVAL", 0.0)
+    monkeypatch.setattr(ws_index, "REFRESH_INTERVAL", 0.0)
+    (_TEST_DIR / "m.py").write_text("def alpha():\n    pass\n", encoding="utf-8")
+    assert "m.py:1-2" in ws_tools._find_symbol({"name": "alpha"}, {})
+    path = _TEST_DIR / "m.py"
+    path.write_text("\n\ndef beta():\n    pass\n", encoding="utf-8")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert "m.py:3-4" in ws_tools._find_symbol({"name": "beta"}, {})
+    assert ws_tools._find_symbol({"name": "alpha"}, {}).startswith("No symbol")
@@ -0,0 +1,187 @@
+"""Worker pool, per-tool timeouts and process isolation for tool calls.
+
+Tool functions run on a pool of daemon worker threads, so a hung call (an MCP
+server that never answers, a runaway parse) cannot stall the agent: the
+caller waits at most the tool's timeout and gets a timeout result, and the
+stuck worker is replaced by a fresh one. Daemon threads never block
+interpreter exit.
+
+A thread cannot be stopped, and CPU-bound Python work (e.g. catastrophic
+regex backtracking) holds the GIL while it runs. Tools marked ``isolate``
+therefore run in a forked child process under RLIMIT_AS / RLIMIT_CPU and
+are killed on timeout. Where fork or ``resource`` are unavailable (Windows)
+they fall back to the thread pool.
+"""
+from __future__ import annotations
+
+import math
+import os
+import queue
+import threading
+import warnings
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict
+
+try:
+    import resource
+except ImportError:            # Windows
+    resource = None
+
+DEFAULT_TIMEOUT = 120.0
+DEFAULT_MEMORY_LIMIT_MB = 2048
+POOL_SIZE = 8
+
+
+class ToolTimeout(Exception):
+    """Raised by ``run_tool`` when a call exceeds its timeout."""
+
+    def __init__(self, seconds: float, killed: bool):
+        super().__init__(f"timed out after {seconds:g}s")
+        self.seconds = seconds
+        self.killed = killed
+
+
+class WorkerPool:
+    """Daemon worker threads started on demand, up to *size* busy at once.
+
+    Workers abandoned by a timeout do not count against *size* while they
+    stay stuck, so hung calls never exhaust the pool.
+    """
+
+    def __init__(self, size: int = POOL_SIZE):
+        self.size = size
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._workers = 0
+        self._idle = 0
+        self._stuck = 0
+
+    def submit(self, fn: Callable, *args) -> Future:
+        fut: Future = Future()
+        self._queue.put((fut, fn, args))
+        with self._lock:
+            if self._idle == 0 and self._workers < self.size + self._stuck:
+                self._workers += 1
+                threading.Thread(target=self._work, name=f"tool-worker-{self._workers}", daemon=True).start()
+        return fut
+
+    def abandon(self, fut: Future) -> None:
+        """Stop waiting for *fut*; its worker is replaced until the call returns."""
+        with self._lock:
+            self._stuck += 1
+
+        def done(_):
+            with self._lock:
+                self._stuck -= 1
+        fut.add_done_callback(done)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"workers": self._workers, "idle": self._idle, "stuck": self._stuck}
+
+    def _work(self) -> None:
+        while True:
+            with self._lock:
+                self._idle += 1
+            fut, fn, args = self._queue.get()
+            with self._lock:
+                self._idle -= 1
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                fut.set_result(fn(*args))
+            except BaseException as e:
+                fut.set_exception(e)
+
+
+_pool = WorkerPool()
+
+
+def get_worker_pool() -> WorkerPool:
+    return _pool
+
+
+def isolation_available() -> bool:
+    return resource is not None and hasattr(os, "fork")
+
+
+def _apply_limits(cpu_seconds: float, memory_limit_mb: int) -> None:
+    def lower(which, value):
+        soft, hard = resource.getrlimit(which)
+        if hard != resource.RLIM_INFINITY:
+            value = min(value, hard)
+        if soft == resource.RLIM_INFINITY or value < soft:
+            resource.setrlimit(which, (value, hard))
+
+    if memory_limit_mb:
+        lower(resource.RLIMIT_AS, memory_limit_mb * 1024 * 1024)
+    if cpu_seconds:
+        lower(resource.RLIMIT_CPU, math.ceil(cpu_seconds) + 1)
+
+
+def _child(conn, func, params, config, cpu_seconds, memory_limit_mb) -> None:
+    try:
+        _apply_limits(cpu_seconds, memory_limit_mb)
+        conn.send((True, func(params, config)))
+    except BaseException as e:
+        conn.send((False, f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def _run_isolated(func, params, config, timeout: float, memory_limit_mb: int) -> str:
+    import multiprocessing
+
+    ctx = multiprocessing.get_context("fork")
+    recv, send = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_child, args=(send, func, params, config, timeout, memory_limit_mb), daemon=True)
+    with warnings.catch_warnings():
+        # Python 3.12 warns about fork() in a multi-threaded process; the child
+        # only runs the tool function and exits.
+        warnings.simplefilter("ignore", DeprecationWarning)
+        proc.start()
+    send.close()
+    try:
+        if timeout and not recv.poll(timeout):
+            raise ToolTimeout(timeout, killed=True)
+        try:
+            ok, value = recv.recv()
+        except EOFError:
+            proc.join(1)
+            raise RuntimeError(f"isolated tool process died (exit code {proc.exitcode}; "
+                               "memory or CPU limit exceeded?)") from None
+        if not ok:
+            raise RuntimeError(value)
+        return value
+    finally:
+        if proc.is_alive():
+            proc.kill()
+        proc.join()
+        recv.close()
+
+
+def run_tool(
+    func: Callable[[Dict[str, Any], Dict[str, Any]], str],
+    params: Dict[str, Any],
+    config: Dict[str, Any],
+    timeout: float = DEFAULT_TIMEOUT,
+    isolate: bool = False,
+    memory_limit_mb: int = DEFAULT_MEMORY_LIMIT_MB,
+) -> str:
+    """Run ``func(params, config)`` with a timeout; raises ``ToolTimeout``.
+
+    ``timeout`` 0 (or None) runs the call inline on the calling thread with no
+    limit. Exceptions raised by *func* propagate to the caller.
+    """
+    if isolate and isolation_available():
+        return _run_isolated(func, params, config, timeout or 0, memory_limit_mb)
+    if not timeout:
+        return func(params, config)
+    fut = _pool.submit(func, params, config)
+    try:
+        return fut.result(timeout)
+    except FutureTimeout:
+        if fut.done():
+            return fut.result()
+        _pool.abandon(fut)
+        raise ToolTimeout(timeout, killed=False) from None
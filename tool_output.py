@@ -0,0 +1,180 @@
+"""Token-efficient normalisation and truncation of tool output.
+
+Shell output is full of bytes that cost tokens and carry nothing for the
+model: ANSI colour codes, progress bars redrawn with carriage returns, the
+same line printed hundreds of times, recursion tracebacks that repeat the
+same frames, and the same warning printed back to back. ``normalize``
+removes that noise for tools that opt in (``ToolDef.normalize``: Bash and
+BashOutput). It only ever folds runs of exactly identical adjacent lines or
+blocks, so code, CSV, diffs and numbered logs come back unchanged. ``truncate``
+is used for every tool and, unlike a plain head/tail cut, carries error and
+failure lines from the dropped middle over into the result.
+
+Characters and estimated tokens (chars / 3.5, as in
+``compaction.estimate_tokens``) before and after are recorded per tool.
+"""
+from __future__ import annotations
+
+import math
+import re
+import threading
+from typing import Dict, List
+
+CHARS_PER_TOKEN = 3.5
+MIN_REPEAT = 3              # identical lines collapsed from this many in a row
+MIN_WARNING_REPEAT = 2      # identical warning lines grouped from this many in a row
+MAX_BLOCK = 4               # longest repeated multi-line block (stack frames) detected
+MAX_KEPT_ERROR_LINES = 40
+
+_ANSI = re.compile(r"\x1b\[[0-?]*[ -/]*[@-~]|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)|\x1b[@-Z\\-_]")
+_WARNING = re.compile(r"\w*warn(?:ing)?\b", re.IGNORECASE)
+_IMPORTANT = re.compile(
+    r"\b(?:error|errors|fail|failed|failure|fatal|exception|traceback|panic|assert(?:ion)?|denied|"
+    r"not found|cannot|undefined)\b|^E\s",
+    re.IGNORECASE,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def is_important(line: str) -> bool:
+    """True for lines that report errors or failures."""
+    return bool(_IMPORTANT.search(line))
+
+
+def strip_ansi(text: str) -> str:
+    return _ANSI.sub("", text) if "\x1b" in text else text
+
+
+def collapse_carriage_returns(text: str) -> str:
+    """Keep only the final state of lines redrawn with ``\\r`` (progress bars, spinners)."""
+    if "\r" not in text:
+        return text
+    out = []
+    for line in text.split("\n"):
+        if "\r" in line:
+            parts = [p for p in line.split("\r") if p.strip()]
+            line = parts[-1] if parts else ""
+        out.append(line)
+    return "\n".join(out)
+
+
+def _collapse_blocks(lines: List[str]) -> List[str]:
+    """Collapse a block of 2..MAX_BLOCK lines repeated back to back (recursive stack frames)."""
+    out: List[str] = []
+    i = 0
+    n = len(lines)
+    while i < n:
+        for size in range(2, MAX_BLOCK + 1):
+            block = lines[i:i + size]
+            if len(block) < size or len(set(block)) == 1:
+                continue
+            reps = 1
+            while lines[i + reps * size:i + (reps + 1) * size] == block:
+                reps += 1
+            if reps >= MIN_REPEAT:
+                out.extend(block)
+                out.append(f"[previous {size} lines repeated {reps - 1} more times]")
+                i += reps * size
+                break
+        else:
+            out.append(lines[i])
+            i += 1
+    return out
+
+
+def _collapse_runs(lines: List[str]) -> List[str]:
+    """Run-length-encode runs of identical adjacent lines (warnings from two in a row)."""
+    out: List[str] = []
+    i = 0
+    n = len(lines)
+    while i < n:
+        line = lines[i]
+        j = i + 1
+        while j < n and lines[j] == line:
+            j += 1
+        min_run = MIN_WARNING_REPEAT if _WARNING.search(line) else MIN_REPEAT
+        if line.strip() and j - i >= min_run:
+            out.append(f"{line}  [repeated {j - i}x]")
+        else:
+            out.extend(lines[i:j])
+        i = j
+    return out
+
+
+def normalize(text: str) -> str:
+    """Strip terminal noise and collapse repetition without dropping distinct content."""
+    text = collapse_carriage_returns(strip_ansi(text))
+    lines = text.split("\n")
+    if len(lines) < MIN_REPEAT:
+        return text
+    lines = _collapse_runs(_collapse_blocks(lines))
+    return "\n".join(lines)
+
+
+def important_lines(lines: List[str], limit: int = MAX_KEPT_ERROR_LINES) -> List[int]:
+    """Indexes of up to *limit* error/failure lines, earliest first."""
+    found = []
+    for i, line in enumerate(lines):
+        if is_important(line):
+            found.append(i)
+            if len(found) >= limit:
+                break
+    return found
+
+
+def truncate(text: str, max_chars: int) -> str:
+    """Cut *text* to about *max_chars*: head half, tail quarter, and error lines from between."""
+    if len(text) <= max_chars:
+        return text
+    first_half = max_chars // 2
+    last_quarter = max_chars // 4
+    head, middle, tail = text[:first_half], text[first_half:-last_quarter], text[-last_quarter:]
+    budget = max_chars - first_half - last_quarter
+    middle_lines = middle.split("\n")
+    kept = []
+    for i in important_lines(middle_lines):
+        line = middle_lines[i][:300]
+        if budget - len(line) - 1 < 0:
+            break
+        kept.append(line)
+        budget -= len(line) + 1
+    if not kept:
+        return head + f"\n[... {len(middle)} chars truncated ...]\n" + tail
+    return (
+        head
+        + f"\n[... {len(middle)} chars truncated; {len(kept)} error/failure lines from them kept ...]\n"
+        + "\n".join(kept)
+        + "\n[...]\n"
+        + tail
+    )
+
+
+# ── Stats ─────────────────────────────────────────────────────────────────────
+
+_stats: Dict[str, Dict[str, int]] = {}
+_stats_lock = threading.Lock()
+
+
+def record(tool_name: str, before: str, after: str) -> None:
+    with _stats_lock:
+        s = _stats.setdefault(tool_name, {"calls": 0, "chars_before": 0, "chars_after": 0,
+                                          "tokens_before": 0, "tokens_after": 0})
+        s["calls"] += 1
+        s["chars_before"] += len(before)
+        s["chars_after"] += len(after)
+        s["tokens_before"] += estimate_tokens(before)
+        s["tokens_after"] += estimate_tokens(after)
+
+
+def get_output_stats() -> Dict[str, Dict[str, int]]:
+    """Per-tool output size before and after normalisation / spilling / truncation."""
+    with _stats_lock:
+        return {name: dict(s) for name, s in _stats.items()}
+
+
+def reset_output_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
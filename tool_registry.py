@@ -1,12 +1,36 @@
 """Tool registry for dev-council.
 
 Provides a central registry for tool definitions, lookup, schema export,
-and dispatch with output truncation.
+and dispatch through an ordered middleware pipeline.
+
+Every change to the set of tools bumps a monotonically increasing version
+(``get_registry_version``). Lookups go through a lowercase alias index, and
+the schema list and other derived payloads (``cached_for_version``) are built
+once per version, so callers and downstream caches can key on the version.
+
+``execute_tool`` runs every call through middlewares ``mw(call, next_) -> str``
+sorted by their order (lowest outermost). Built in: validate (5) checks and
+coerces inputs against validators precompiled from each ``input_schema`` at
+registration (see ``tool_schema``), timing (20) feeds the per-tool latency
+histograms behind ``get_tool_metrics``, cache (25) reuses the final
+(already spilled and truncated) results of tools with a ``cache_ttl``,
+output (30) normalises, spills and truncates results (see ``tool_output``).
+``tools.py`` adds the permission gate (10) and ``checkpoint.hooks`` the
+file backups (50).
 """
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Optional
+import bisect
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import tool_output
+from tool_executor import DEFAULT_MEMORY_LIMIT_MB, DEFAULT_TIMEOUT, ToolTimeout, run_tool
+from tool_schema import Validator, compile_schema
 
 
 @dataclass
@@ -19,24 +43,92 @@ class ToolDef:
         func: callable(params: dict, config: dict) -> str
         read_only: True if the tool never mutates state
         concurrent_safe: True if safe to run in parallel with other tools
+        cache_ttl: seconds to reuse the result of an identical call (0 disables);
+            only meaningful for read-only tools
+        timeout: seconds before the call is abandoned with a timeout result;
+            None uses config ``tool_timeout``, 0 runs inline without a limit
+            (interactive tools, tools that enforce their own timeout)
+        isolate: run in a forked child process under memory/CPU rlimits
+            (config ``tool_memory_limit_mb``) that is killed on timeout
+        normalize: strip ANSI codes and collapse progress lines and repetition
+            in the output (``tool_output.normalize``); for shell output,
+            never for file contents the model may edit against
     """
     name: str
     schema: Dict[str, Any]
     func: Callable[[Dict[str, Any], Dict[str, Any]], str]
     read_only: bool = False
     concurrent_safe: bool = False
+    cache_ttl: float = 0.0
+    timeout: Optional[float] = None
+    isolate: bool = False
+    normalize: bool = False
+
+
+@dataclass
+class ToolCall:
+    """One tool invocation as seen by middlewares.
+
+    ``context`` carries per-call settings from the caller (``max_output``,
+    ``permission_mode``, ``ask_permission``) and notes middlewares and the
+    executor leave for each other (``cache_hit``, ``timed_out``).
+    """
+    name: str
+    tool: ToolDef
+    params: Dict[str, Any]
+    config: Dict[str, Any]
+    context: Dict[str, Any] = field(default_factory=dict)
+
+
+Middleware = Callable[[ToolCall, Callable[[ToolCall], str]], str]
 
 
 # --------------- internal state ---------------
 
 _registry: Dict[str, ToolDef] = {}
+_aliases: Dict[str, str] = {}           # lowercase name -> registered name
+_validators: Dict[str, Validator] = {}  # name -> compiled input_schema
+_version = 0
+# cached_for_version results for the current version, least recently used first
+_derived: "OrderedDict[Hashable, Any]" = OrderedDict()
+_MAX_DERIVED = 64
+_lock = threading.RLock()
+
+
+def _changed() -> None:
+    global _version
+    _version += 1
+    _derived.clear()
 
 
 # --------------- public API ---------------
 
 def register_tool(tool_def: ToolDef) -> None:
     """Register a tool, overwriting any existing tool with the same name."""
-    _registry[tool_def.name] = tool_def
+    validator = compile_schema(tool_def.schema.get("input_schema"))
+    with _lock:
+        _registry[tool_def.name] = tool_def
+        _validators[tool_def.name] = validator
+        # First registration wins for names that differ only in case
+        _aliases.setdefault(tool_def.name.lower(), tool_def.name)
+        _changed()
+
+
+def unregister_tool(name: str) -> bool:
+    """Remove a tool by exact name. Returns True if it was registered."""
+    with _lock:
+        if _registry.pop(name, None) is None:
+            return False
+        _validators.pop(name, None)
+        lower = name.lower()
+        if _aliases.get(lower) == name:
+            del _aliases[lower]
+            for other in _registry:
+                if other.lower() == lower:
+                    _aliases[lower] = other
+                    break
+        _changed()
+        return True
 
 
 def get_tool(name: str) -> Optional[ToolDef]:
@@ -44,12 +136,14 @@ def get_tool(name: str) -> Optional[ToolDef]:
     tool = _registry.get(name)
     if tool is not None:
         return tool
-    # Fallback: case-insensitive match (common with smaller LLMs calling 'bash' instead of 'Bash')
-    lower = name.lower()
-    for key, tool_def in _registry.items():
-        if key.lower() == lower:
-            return tool_def
-    return None
+    # Case-insensitive match (common with smaller LLMs calling 'bash' instead of 'Bash')
+    alias = _aliases.get(name.lower())
+    return _registry.get(alias) if alias is not None else None
+
+
+def get_registry_version() -> int:
+    """Monotonically increasing counter, bumped on every register/unregister/clear."""
+    return _version
 
 
 def get_all_tools() -> List[ToolDef]:
@@ -57,9 +151,93 @@ def get_all_tools() -> List[ToolDef]:
     return list(_registry.values())
 
 
+def cached_for_version(key: Hashable, build: Callable[[], Any]) -> Any:
+    """Return ``build()``, computed at most once per registry version for *key*.
+
+    For payloads derived from the registered tools (provider tool lists,
+    name indexes); the cache is dropped whenever the registry changes and
+    keeps the ``_MAX_DERIVED`` most recently used keys.
+    """
+    with _lock:
+        if key in _derived:
+            _derived.move_to_end(key)
+            return _derived[key]
+        version = _version
+    value = build()
+    with _lock:
+        if version == _version:
+            _derived[key] = value
+            _derived.move_to_end(key)
+            while len(_derived) > _MAX_DERIVED:
+                _derived.popitem(last=False)
+    return value
+
+
 def get_tool_schemas() -> List[Dict[str, Any]]:
-    """Return the schemas of all registered tools (for API tool parameter)."""
-    return [t.schema for t in _registry.values()]
+    """Return the schemas of all registered tools (for API tool parameter).
+
+    The list is cached per registry version and shared between callers, so
+    it must not be mutated.
+    """
+    return cached_for_version("schemas", lambda: [t.schema for t in list(_registry.values())])
+
+
+# --------------- middleware pipeline ---------------
+
+_middlewares: Dict[str, Tuple[int, int, Middleware]] = {}   # name -> (order, seq, func)
+_chain: List[Middleware] = []
+_seq = 0
+
+
+def add_middleware(name: str, func: Middleware, order: int = 100) -> None:
+    """Install *func* as middleware *name*, replacing any previous one of that name.
+
+    Lower orders run first (outermost); equal orders run in installation order.
+    """
+    global _seq, _chain
+    with _lock:
+        _seq += 1
+        _middlewares[name] = (order, _seq, func)
+        _chain = [f for _, _, f in sorted(_middlewares.values(), key=lambda m: m[:2])]
+
+
+def remove_middleware(name: str) -> bool:
+    """Uninstall middleware *name*. Returns True if it was installed."""
+    global _chain
+    with _lock:
+        if _middlewares.pop(name, None) is None:
+            return False
+        _chain = [f for _, _, f in sorted(_middlewares.values(), key=lambda m: m[:2])]
+        return True
+
+
+def get_middlewares() -> List[Tuple[str, int]]:
+    """(name, order) of the installed middlewares, outermost first."""
+    with _lock:
+        return [(name, m[0]) for name, m in sorted(_middlewares.items(), key=lambda kv: kv[1][:2])]
+
+
+def _invoke(call: ToolCall) -> str:
+    """Innermost handler: run the tool on the worker pool (see ``tool_executor``)."""
+    tool, config = call.tool, call.config
+    timeout = tool.timeout
+    if timeout is None:
+        timeout = float(config.get("tool_timeout", DEFAULT_TIMEOUT) or 0)
+    try:
+        return run_tool(
+            tool.func, call.params, config, timeout,
+            isolate=tool.isolate and config.get("tool_isolation", True),
+            memory_limit_mb=int(config.get("tool_memory_limit_mb", DEFAULT_MEMORY_LIMIT_MB) or 0),
+        )
+    except ToolTimeout as e:
+        call.context["timed_out"] = True
+        outcome = "was stopped" if e.killed else "was abandoned (it may still finish in the background)"
+        return (
+            f"Error: {call.name} timed out after {e.seconds:g}s and {outcome}.\n"
+            "Retry with a narrower request, or raise the limit with the tool_timeout setting."
+        )
+    except Exception as e:
+        return f"Error executing {call.name}: {e}"
 
 
 def execute_tool(
@@ -67,14 +245,16 @@ def execute_tool(
     params: Dict[str, Any],
     config: Dict[str, Any],
     max_output: int = 32000,
+    context: Optional[Dict[str, Any]] = None,
 ) -> str:
-    """Dispatch a tool call by name.
+    """Dispatch a tool call by name through the middleware pipeline.
 
     Args:
         name: tool name
         params: tool input parameters dict
         config: runtime configuration dict
         max_output: maximum allowed output length in characters
+        context: extra per-call settings for middlewares (e.g. permission_mode)
 
     Returns:
         Tool result string, possibly truncated.
@@ -83,24 +263,213 @@ def execute_tool(
     if tool is None:
         return f"Error: tool '{name}' not found."
 
+    call = ToolCall(tool.name, tool, params, config, {**(context or {}), "max_output": max_output})
+    chain = _chain
+
+    def step(i: int, c: ToolCall) -> str:
+        if i == len(chain):
+            return _invoke(c)
+        return chain[i](c, lambda nxt: step(i + 1, nxt))
+
     try:
-        result = tool.func(params, config)
+        return step(0, call)
     except Exception as e:
-        return f"Error executing {name}: {e}"
-
-    if len(result) > max_output:
-        first_half = max_output // 2
-        last_quarter = max_output // 4
-        truncated = len(result) - first_half - last_quarter
-        result = (
-            result[:first_half]
-            + f"\n[... {truncated} chars truncated ...]\n"
-            + result[-last_quarter:]
+        return f"Error executing {tool.name}: {e}"
+
+
+# --------------- built-in middlewares ---------------
+
+_input_stats: Dict[str, Dict[str, int]] = {}   # model -> counters
+_input_stats_lock = threading.Lock()
+
+
+def _validate_middleware(call: ToolCall, next_) -> str:
+    validator = _validators.get(call.name)
+    if validator is None:
+        return next_(call)
+    checked = validator(call.params)
+    counts = {"calls": 1, "repaired": bool(checked.repairs), "rejected": bool(checked.errors), "errors": 0}
+    if checked.errors:
+        expected = f" Expected: {validator.signature}" if validator.signature else ""
+        result = f"Error: invalid input for {call.name}: {'; '.join(checked.errors)}.{expected}"
+    else:
+        call.params = checked.params
+        result = next_(call)
+        counts["errors"] = result.startswith("Error")
+    with _input_stats_lock:
+        stats = _input_stats.setdefault(str(call.config.get("model", "")), dict.fromkeys(counts, 0))
+        for key, n in counts.items():
+            stats[key] += n
+    return result
+
+
+def get_tool_input_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-model tool-call counters.
+
+    ``repaired`` calls had inputs coerced into shape (each a saved retry
+    turn); ``rejected`` failed validation and ``errors`` failed while
+    running, both of which cost the model another turn (``retry_rate``).
+    """
+    with _input_stats_lock:
+        return {
+            model: {**s, "retry_rate": (s["rejected"] + s["errors"]) / s["calls"]}
+            for model, s in _input_stats.items()
+        }
+
+
+def reset_tool_input_stats() -> None:
+    with _input_stats_lock:
+        _input_stats.clear()
+
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended.
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+
+
+class _LatencyHistogram:
+    __slots__ = ("counts", "calls", "errors", "cached", "timeouts", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.calls = 0
+        self.errors = 0
+        self.cached = 0
+        self.timeouts = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms: float, error: bool, cached: bool, timed_out: bool) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.calls += 1
+        self.errors += error
+        self.cached += cached
+        self.timeouts += timed_out
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile, capped at the observed max."""
+        rank = q * self.calls
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                return min(LATENCY_BUCKETS_MS[i], self.max_ms) if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+
+_metrics: Dict[str, _LatencyHistogram] = {}
+_metrics_lock = threading.Lock()
+
+
+def _timing_middleware(call: ToolCall, next_) -> str:
+    start = time.perf_counter()
+    result = next_(call)
+    ms = (time.perf_counter() - start) * 1000
+    with _metrics_lock:
+        hist = _metrics.get(call.name)
+        if hist is None:
+            hist = _metrics[call.name] = _LatencyHistogram()
+        hist.record(ms, result.startswith("Error"), bool(call.context.get("cache_hit")),
+                    bool(call.context.get("timed_out")))
+    return result
+
+
+def get_tool_metrics() -> Dict[str, Dict[str, Any]]:
+    """Per-tool call counts and latency summary (ms), busiest tools first."""
+    with _metrics_lock:
+        rows = {
+            name: {
+                "calls": h.calls,
+                "errors": h.errors,
+                "cached": h.cached,
+                "timeouts": h.timeouts,
+                "total_ms": h.total_ms,
+                "avg_ms": h.total_ms / h.calls,
+                "p50_ms": h.percentile(0.5),
+                "p95_ms": h.percentile(0.95),
+                "max_ms": h.max_ms,
+                "histogram": dict(zip([*map(str, LATENCY_BUCKETS_MS), "inf"], h.counts)),
+            }
+            for name, h in _metrics.items()
+        }
+    return dict(sorted(rows.items(), key=lambda kv: -kv[1]["total_ms"]))
+
+
+def reset_tool_metrics() -> None:
+    with _metrics_lock:
+        _metrics.clear()
+
+
+def _output_middleware(call: ToolCall, next_) -> str:
+    raw = result = next_(call)
+    if call.tool.normalize:
+        result = tool_output.normalize(result)
+
+    # Large outputs go to the session blob store; only a preview + handle
+    # stays in the conversation (retrievable via the ToolResult tool).
+    spill_threshold = int(call.config.get("tool_spill_threshold", 0) or 0)
+    if spill_threshold and len(result) > spill_threshold:
+        from blob.store import spill_tool_result
+        result = spill_tool_result(
+            call.config.get("_session_id", "default"), call.name, result, spill_threshold,
         )
 
+    result = tool_output.truncate(result, call.context.get("max_output", 32000))
+    tool_output.record(call.name, raw, result)
     return result
 
 
+_MAX_CACHED_RESULTS = 256
+_result_cache: Dict[tuple, Tuple[float, int, str]] = {}   # (tool, params, session, max_output) -> (expires, version, result)
+_result_cache_lock = threading.Lock()
+
+
+def _cache_middleware(call: ToolCall, next_) -> str:
+    if not (call.tool.cache_ttl > 0 and call.tool.read_only):
+        result = next_(call)
+        if not call.tool.read_only:
+            # A mutating tool may have changed whatever a cached result describes
+            clear_tool_cache()
+        return result
+
+    try:
+        # Results are cached after spilling and truncation, which depend on these too
+        key = (call.name, json.dumps(call.params, sort_keys=True, default=str),
+               call.config.get("_session_id", "default"), call.context.get("max_output"))
+    except (TypeError, ValueError):
+        return next_(call)
+    now = time.monotonic()
+    with _result_cache_lock:
+        hit = _result_cache.get(key)
+        if hit is not None and hit[0] > now and hit[1] == _version:
+            call.context["cache_hit"] = True
+            return hit[2]
+    result = next_(call)
+    if not result.startswith("Error"):
+        with _result_cache_lock:
+            if len(_result_cache) >= _MAX_CACHED_RESULTS:
+                for k in [k for k, v in _result_cache.items() if v[0] <= now] or [next(iter(_result_cache))]:
+                    del _result_cache[k]
+            _result_cache[key] = (now + call.tool.cache_ttl, _version, result)
+    return result
+
+
+def clear_tool_cache() -> None:
+    with _result_cache_lock:
+        _result_cache.clear()
+
+
+add_middleware("validate", _validate_middleware, order=5)
+add_middleware("timing", _timing_middleware, order=20)
+add_middleware("cache", _cache_middleware, order=25)
+add_middleware("output", _output_middleware, order=30)
+
+
 def clear_registry() -> None:
     """Remove all registered tools. Intended for testing."""
-    _registry.clear()
+    with _lock:
+        _registry.clear()
+        _aliases.clear()
+        _validators.clear()
+        _changed()
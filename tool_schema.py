@@ -0,0 +1,265 @@
+"""Validate and coerce tool inputs against their ``input_schema``.
+
+Local models often send ``"limit": "20"``, ``"replace_all": "true"``, one
+path where a list is expected, JSON text where an object is expected,
+``null`` for optional fields, or the whole input as a JSON string.
+``compile_schema`` turns an input_schema into a tree of closures once, when
+the tool is registered. The compiled validator repairs those mistakes, drops
+unknown keys, and reports what it cannot fix in one compact line, so the
+model can correct the call without a stack trace.
+
+Supported keywords: type (including type lists and "null"), properties,
+required, additionalProperties, items, enum, anyOf / oneOf (first branch
+that validates). Anything else is ignored.
+"""
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, List
+
+# Single-key wrappers some models put around the real arguments
+WRAPPER_KEYS = ("arguments", "args", "input", "params", "parameters", "kwargs")
+
+_INT = re.compile(r"[+-]?\d+")
+_TRUE = frozenset({"true", "yes", "1", "on"})
+_FALSE = frozenset({"false", "no", "0", "off"})
+_DROP = object()
+
+Check = Callable[[Any, str, list, list], Any]
+
+
+@dataclass
+class Validation:
+    """Outcome of validating one tool input."""
+    params: Any
+    errors: List[str] = field(default_factory=list)
+    repairs: List[str] = field(default_factory=list)
+
+
+def _is_type(value, t: str) -> bool:
+    if t == "string":
+        return isinstance(value, str)
+    if t == "integer":
+        return isinstance(value, int) and not isinstance(value, bool)
+    if t == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if t == "boolean":
+        return isinstance(value, bool)
+    if t == "array":
+        return isinstance(value, list)
+    if t == "object":
+        return isinstance(value, dict)
+    if t == "null":
+        return value is None
+    return True
+
+
+def _json(text: str, kind: type):
+    try:
+        value = json.loads(text)
+    except ValueError:
+        return _DROP
+    return value if isinstance(value, kind) else _DROP
+
+
+def _coerce(value, t: str):
+    """Return *value* converted to JSON type *t*, or ``_DROP`` if there is no obvious conversion."""
+    if isinstance(value, str):
+        text = value.strip()
+        if t == "integer":
+            if _INT.fullmatch(text):
+                return int(text)
+            try:
+                number = float(text)
+            except ValueError:
+                return _DROP
+            return int(number) if number.is_integer() else _DROP
+        if t == "number":
+            if _INT.fullmatch(text):
+                return int(text)
+            try:
+                return float(text)
+            except ValueError:
+                return _DROP
+        if t == "boolean":
+            low = text.lower()
+            return True if low in _TRUE else False if low in _FALSE else _DROP
+        if t == "array":
+            return _json(text, list) if text.startswith("[") else [value]
+        if t == "object":
+            return _json(text, dict) if text.startswith("{") else _DROP
+        return _DROP
+    if isinstance(value, bool):
+        return ("true" if value else "false") if t == "string" else _DROP
+    if isinstance(value, (int, float)):
+        if t == "string":
+            return str(value)
+        if t == "integer" and float(value).is_integer():
+            return int(value)
+        if t == "boolean" and value in (0, 1):
+            return bool(value)
+        if t == "array":
+            return [value]
+        return _DROP
+    if isinstance(value, dict) and t == "array":
+        return [value]
+    return _DROP
+
+
+def _short(value) -> str:
+    text = json.dumps(value, default=str) if not isinstance(value, str) else repr(value)
+    return text if len(text) <= 40 else text[:37] + "..."
+
+
+def _kind(value) -> str:
+    for t in ("null", "boolean", "integer", "number", "string", "array", "object"):
+        if _is_type(value, t):
+            return t
+    return type(value).__name__
+
+
+def _accept(value, path, errors, repairs):
+    return value
+
+
+def _accepts_null(schema) -> bool:
+    if not isinstance(schema, dict):
+        return True
+    t = schema.get("type")
+    return t is None or t == "null" or (isinstance(t, list) and "null" in t)
+
+
+def _compile(schema) -> Check:
+    if not isinstance(schema, dict):
+        return _accept
+    for combinator in ("anyOf", "oneOf"):
+        if isinstance(schema.get(combinator), list):
+            return _compile_union([_compile(s) for s in schema[combinator]])
+
+    types = schema.get("type")
+    types = [types] if isinstance(types, str) else [t for t in types or [] if isinstance(t, str)]
+    enum = schema.get("enum") if isinstance(schema.get("enum"), list) else None
+    props = schema.get("properties") if isinstance(schema.get("properties"), dict) else None
+    required = [k for k in schema.get("required") or [] if isinstance(k, str)]
+    additional = schema.get("additionalProperties")
+    prop_checks = {k: _compile(v) for k, v in (props or {}).items()}
+    nullable = {k for k, v in (props or {}).items() if _accepts_null(v) and v}
+    extra_check = _compile(additional) if isinstance(additional, dict) else None
+    item_check = _compile(schema["items"]) if isinstance(schema.get("items"), dict) else None
+
+    def check(value, path, errors, repairs):
+        where = path or "input"
+        if types and not any(_is_type(value, t) for t in types):
+            for t in types:
+                coerced = _coerce(value, t)
+                if coerced is not _DROP:
+                    repairs.append(f"{where}: {_kind(value)} -> {t}")
+                    value = coerced
+                    break
+            else:
+                errors.append(f"{where} must be {' or '.join(types)} (got {_short(value)})")
+                return value
+        if enum is not None and value not in enum:
+            match = [e for e in enum if isinstance(e, str) and isinstance(value, str)
+                     and e.lower() == value.strip().lower()]
+            if match:
+                repairs.append(f"{where}: {value!r} -> {match[0]!r}")
+                value = match[0]
+            else:
+                errors.append(f"{where} must be one of {', '.join(map(str, enum))} (got {_short(value)})")
+                return value
+        if isinstance(value, dict) and (props is not None or required or extra_check):
+            prefix = f"{path}." if path else ""
+            out = {}
+            for key, item in value.items():
+                sub = prop_checks.get(key)
+                if sub is None:
+                    if extra_check is not None:
+                        out[key] = extra_check(item, prefix + key, errors, repairs)
+                    elif props is None or additional is True:
+                        out[key] = item
+                    else:
+                        repairs.append(f"dropped unknown {prefix}{key}")
+                    continue
+                if item is None and key not in required and key not in nullable:
+                    repairs.append(f"dropped null {prefix}{key}")
+                    continue
+                out[key] = sub(item, prefix + key, errors, repairs)
+            for key in required:
+                if key not in out:
+                    errors.append(f"{prefix}{key} is required")
+            value = out
+        if isinstance(value, list) and item_check is not None:
+            value = [item_check(item, f"{where}[{i}]", errors, repairs) for i, item in enumerate(value)]
+        return value
+
+    return check
+
+
+def _compile_union(branches: List[Check]) -> Check:
+    def check(value, path, errors, repairs):
+        first = None
+        for branch in branches:
+            errs, reps = [], []
+            out = branch(value, path, errs, reps)
+            if not errs:
+                repairs.extend(reps)
+                return out
+            first = first or errs
+        errors.extend(first or [])
+        return value
+    return check
+
+
+def _signature(schema) -> str:
+    props = schema.get("properties") if isinstance(schema, dict) else None
+    if not isinstance(props, dict):
+        return ""
+    required = set(schema.get("required") or [])
+    parts = []
+    for key, sub in props.items():
+        t = sub.get("type", "any") if isinstance(sub, dict) else "any"
+        t = "|".join(t) if isinstance(t, list) else t
+        parts.append(f"{key}{'' if key in required else '?'}: {t}")
+    return ", ".join(parts)
+
+
+class Validator:
+    """Compiled validator for one input_schema; call it with the raw params."""
+
+    __slots__ = ("_check", "_props", "signature")
+
+    def __init__(self, schema):
+        schema = schema if isinstance(schema, dict) else {}
+        self._check = _compile(schema)
+        self._props = set(schema.get("properties") or ())
+        self.signature = _signature(schema)
+
+    def __call__(self, params) -> Validation:
+        repairs: list = []
+        if isinstance(params, str):
+            parsed = _json(params, dict)
+            if parsed is _DROP:
+                return Validation(params, [f"input must be a JSON object (got {_short(params)})"])
+            repairs.append("input: JSON text -> object")
+            params = parsed
+        if params is None:
+            params = {}
+        if isinstance(params, dict) and len(params) == 1:
+            (key, inner), = params.items()
+            if key in WRAPPER_KEYS and key not in self._props:
+                if isinstance(inner, str):
+                    inner = _json(inner, dict)
+                if isinstance(inner, dict):
+                    repairs.append(f"input: unwrapped {key}")
+                    params = inner
+        errors: list = []
+        params = self._check(params, "", errors, repairs)
+        return Validation(params, errors, repairs)
+
+
+def compile_schema(schema) -> Validator:
+    """Precompile *schema* (a tool's ``input_schema``)."""
+    return Validator(schema)
@@ -0,0 +1,178 @@
+"""Per-turn tool schema selection and the ToolSearch meta-tool.
+
+Instead of sending every registered schema (all built-ins plus every MCP
+tool) on every request, ``select_tool_schemas`` sends:
+
+- a small core set (file, shell and code-navigation tools plus ToolSearch),
+- the tools most relevant to the latest user message (keyword overlap with
+  each tool's name and description),
+- tools called in the last few assistant turns,
+- tools the model enabled for this session through ``ToolSearch``.
+
+Config ``tool_selection``: ``"all"`` sends everything, ``"dynamic"`` always
+selects, ``"auto"`` (default) selects only once more than ``AUTO_THRESHOLD``
+tools are registered.
+"""
+from __future__ import annotations
+
+import re
+import threading
+from typing import Dict, List, Set
+
+from tool_registry import (
+    ToolDef,
+    cached_for_version,
+    get_all_tools,
+    get_tool,
+    get_tool_schemas,
+    register_tool,
+)
+
+AUTO_THRESHOLD = 40
+RELEVANT_LIMIT = 6
+RECENT_TURNS = 6
+SEARCH_LIMIT = 10
+
+CORE_TOOLS = (
+    "Read", "Write", "Edit", "MultiEdit", "Bash", "Glob", "Grep",
+    "FindSymbol", "SearchCode", "ToolResult", "ToolSearch",
+)
+PLAN_TOOLS = ("EnterPlanMode", "ExitPlanMode")
+
+_WORD = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+_STOPWORDS = frozenset({
+    "the", "and", "for", "with", "that", "this", "from", "into", "use", "you", "your", "are",
+    "can", "will", "not", "all", "any", "its", "tool", "tools", "when", "what", "how", "get",
+    "set", "return", "returns", "list", "file", "files", "mcp", "please", "then", "also",
+})
+
+_enabled: Dict[str, Set[str]] = {}      # session id -> tools enabled via ToolSearch
+_enabled_lock = threading.Lock()
+
+
+def _words(text: str) -> set:
+    out = set()
+    for w in _WORD.findall(text or ""):
+        w = w.lower()
+        if len(w) >= 3 and w not in _STOPWORDS:
+            out.add(w[:-1] if len(w) > 4 and w.endswith("s") and not w.endswith("ss") else w)
+    return out
+
+
+def _tool_keywords() -> dict:
+    """name -> (name words, description words), rebuilt once per registry version."""
+    def build():
+        return {t.name: (_words(t.name), _words(t.schema.get("description", "")))
+                for t in get_all_tools()}
+    return cached_for_version("tool-selection-keywords", build)
+
+
+def rank_tools(text: str, limit: int = SEARCH_LIMIT) -> List[str]:
+    """Tool names ordered by keyword overlap with *text* (name matches count double)."""
+    query = _words(text)
+    if not query:
+        return []
+    scored = []
+    for name, (name_words, desc_words) in _tool_keywords().items():
+        score = 2 * len(query & name_words) + len(query & desc_words)
+        if score:
+            scored.append((-score, name))
+    return [name for _, name in sorted(scored)[:limit]]
+
+
+def enable_tools(session_id: str, names) -> None:
+    with _enabled_lock:
+        _enabled.setdefault(session_id, set()).update(names)
+
+
+def enabled_tools(session_id: str) -> Set[str]:
+    with _enabled_lock:
+        return set(_enabled.get(session_id, ()))
+
+
+def reset_enabled_tools(session_id: str = None) -> None:
+    with _enabled_lock:
+        if session_id is None:
+            _enabled.clear()
+        else:
+            _enabled.pop(session_id, None)
+
+
+def _recent_tool_names(messages: list) -> set:
+    names = set()
+    turns = 0
+    for msg in reversed(messages):
+        if msg.get("role") != "assistant":
+            continue
+        names.update(tc.get("name", "") for tc in msg.get("tool_calls") or [])
+        turns += 1
+        if turns >= RECENT_TURNS:
+            break
+    return names
+
+
+def _latest_user_text(messages: list) -> str:
+    for msg in reversed(messages):
+        if msg.get("role") == "user" and isinstance(msg.get("content"), str):
+            return msg["content"]
+    return ""
+
+
+def select_tool_schemas(messages: list, config: dict) -> list:
+    """Schemas to send for the next request (registry order preserved)."""
+    mode = config.get("tool_selection", "auto")
+    tools = get_all_tools()
+    if mode == "all" or (mode == "auto" and len(tools) <= AUTO_THRESHOLD):
+        return get_tool_schemas()
+    wanted = set(CORE_TOOLS)
+    if config.get("permission_mode") == "plan":
+        wanted.update(PLAN_TOOLS)
+    wanted.update(rank_tools(_latest_user_text(messages), RELEVANT_LIMIT))
+    wanted.update(_recent_tool_names(messages))
+    wanted.update(enabled_tools(config.get("_session_id", "default")))
+    return [t.schema for t in tools if t.name in wanted]
+
+
+# ── ToolSearch ────────────────────────────────────────────────────────────────
+
+def _tool_search(params: dict, config: dict) -> str:
+    query = (params.get("query") or "").strip()
+    if not query:
+        return "Error: query is required"
+    exact = [get_tool(n.strip()) for n in query.split(",")]
+    if all(exact):
+        names = [t.name for t in exact]
+    else:
+        names = rank_tools(query, SEARCH_LIMIT)
+    if not names:
+        return f"No tools match '{query}'"
+    enable_tools(config.get("_session_id", "default"), names)
+    lines = [f"Enabled {len(names)} tool(s); they are available from your next step:"]
+    for name in names:
+        desc = (get_tool(name).schema.get("description", "") or "").strip().splitlines()
+        lines.append(f"- {name}: {desc[0][:160] if desc else ''}")
+    return "\n".join(lines)
+
+
+register_tool(ToolDef(
+    name="ToolSearch",
+    schema={
+        "name": "ToolSearch",
+        "description": (
+            "Find and enable tools that are not in your current tool list (MCP server tools, "
+            "memory, tasks, notebooks, web, diagnostics, background jobs, ...). Describe the "
+            "capability you need in a few words, or pass exact tool names separated by commas. "
+            "Matching tools become callable from your next step."
+        ),
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "Capability keywords or comma-separated tool names"},
+            },
+            "required": ["query"],
+        },
+    },
+    func=_tool_search,
+    read_only=True,
+    concurrent_safe=True,
+))
@@ -3,14 +3,31 @@ import json
 import os
 import re
 import glob as _glob
-import difflib
+import functools
+import shutil
 import subprocess
 import threading
 from pathlib import Path
 from typing import Callable, Optional
 
-from tool_registry import ToolDef, register_tool
+from tool_registry import ToolDef, add_middleware, register_tool
 from tool_registry import execute_tool as _registry_execute
+from diagnostics import diagnose
+from fileops import (
+    MAX_READ_BYTES,
+    ReadSnapshot,
+    atomic_write_text,
+    diff_since,
+    get_read_history,
+    read_lines,
+    truncate_diff,
+    unified_diff,
+)
+import shell.session as shell_session
+from shell import run_captured
+import web
+from workspace import find_file_index, notify_changed
+from workspace.grep import search as grep_search
 
 # ── AskUserQuestion state ──────────────────────────────────────────────────────
 # A direct prompt path is used so the agent can ask focused questions without
@@ -40,7 +57,10 @@ TOOL_SCHEMAS = [
         "name": "Read",
         "description": (
             "Read a file's contents. Returns content with line numbers "
-            "(format: 'N\\tline'). Use limit/offset to read large files in chunks."
+            "(format: 'N\\tline'). Use limit/offset to read large files in chunks. "
+            "To see what changed in a file you already read (after an Edit, a formatter or a "
+            "generator), set since_last_read=true to get only a unified diff against your last "
+            "Read of it, or 'No changes'."
         ),
         "input_schema": {
             "type": "object",
@@ -48,6 +68,10 @@ TOOL_SCHEMAS = [
                 "file_path": {"type": "string", "description": "Absolute file path"},
                 "limit":     {"type": "integer", "description": "Max lines to read"},
                 "offset":    {"type": "integer", "description": "Start line (0-indexed)"},
+                "since_last_read": {
+                    "type": "boolean",
+                    "description": "Return only the changes since the last Read of this file (same range by default)",
+                },
             },
             "required": ["file_path"],
         },
@@ -81,9 +105,40 @@ TOOL_SCHEMAS = [
             "required": ["file_path", "old_string", "new_string"],
         },
     },
+    {
+        "name": "MultiEdit",
+        "description": (
+            "Apply several exact-text replacements, across one or more files, in a single call. "
+            "Edits run in order (later edits see earlier ones); all are validated before any file "
+            "is written, so either every edit applies or none do. Prefer this over repeated Edit calls."
+        ),
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "edits": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "file_path":   {"type": "string"},
+                            "old_string":  {"type": "string", "description": "Exact text to replace"},
+                            "new_string":  {"type": "string", "description": "Replacement text"},
+                            "replace_all": {"type": "boolean", "description": "Replace all occurrences"},
+                        },
+                        "required": ["file_path", "old_string", "new_string"],
+                    },
+                },
+            },
+            "required": ["edits"],
+        },
+    },
     {
         "name": "Bash",
-        "description": "Execute a shell command. Returns stdout+stderr. Stateless (no cd persistence).",
+        "description": (
+            "Execute a shell command. Returns stdout+stderr. Stateless (no cd persistence) "
+            "unless the persistent shell is enabled, in which case cd, exports and activated "
+            "virtualenvs carry over between calls."
+        ),
         "input_schema": {
             "type": "object",
             "properties": {
@@ -107,7 +162,7 @@ TOOL_SCHEMAS = [
     },
     {
         "name": "Grep",
-        "description": "Search file contents with regex using ripgrep (falls back to grep).",
+        "description": "Search file contents with regex using ripgrep (falls back to a built-in .gitignore-aware search).",
         "input_schema": {
             "type": "object",
             "properties": {
@@ -255,7 +310,8 @@ TOOL_SCHEMAS = [
         "description": (
             "Get LSP-style diagnostics (errors, warnings, hints) for a source file. "
             "Uses pyright/mypy/flake8 for Python, tsc for TypeScript/JavaScript, "
-            "and shellcheck for shell scripts. Returns structured diagnostic output."
+            "and shellcheck for shell scripts. Returns structured diagnostic output. "
+            "Pass file_paths to check several files at once; unchanged files are answered from cache."
         ),
         "input_schema": {
             "type": "object",
@@ -264,6 +320,14 @@ TOOL_SCHEMAS = [
                     "type": "string",
                     "description": "Absolute or relative path to the file to diagnose",
                 },
+                "file_paths": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": (
+                        "Several files to diagnose in one batched checker run "
+                        "(e.g. everything touched by an edit batch)"
+                    ),
+                },
                 "language": {
                     "type": "string",
                     "description": (
@@ -272,7 +336,7 @@ TOOL_SCHEMAS = [
                     ),
                 },
             },
-            "required": ["file_path"],
+            "required": [],
         },
     },
     {
@@ -347,19 +411,11 @@ def _is_safe_bash(cmd: str) -> bool:
 # ── Diff helpers ──────────────────────────────────────────────────────────
 
 def generate_unified_diff(old, new, filename, context_lines=3):
-    old_lines = old.splitlines(keepends=True)
-    new_lines = new.splitlines(keepends=True)
-    diff = difflib.unified_diff(old_lines, new_lines,
-        fromfile=f"a/{filename}", tofile=f"b/{filename}", n=context_lines)
-    return "".join(diff)
+    # Strips common head/tail first; falls back to a summary line for huge changes.
+    return unified_diff(old, new, filename, context_lines)
 
 def maybe_truncate_diff(diff_text, max_lines=80):
-    lines = diff_text.splitlines()
-    if len(lines) <= max_lines:
-        return diff_text
-    shown = lines[:max_lines]
-    remaining = len(lines) - max_lines
-    return "\n".join(shown) + f"\n\n[... {remaining} more lines ...]"
+    return truncate_diff(diff_text, max_lines=max_lines)
 
 
 def _read_text_preserve_newlines(path: Path) -> str:
@@ -368,27 +424,52 @@ def _read_text_preserve_newlines(path: Path) -> str:
 
 
 def _write_text_preserve_newlines(path: Path, content: str) -> None:
-    with path.open("w", encoding="utf-8", newline="") as handle:
-        handle.write(content)
+    # Temp file + rename: a crash mid-write never leaves a truncated target.
+    atomic_write_text(path, content)
+    notify_changed(path)
 
 
 # ── Tool implementations ───────────────────────────────────────────────────
 
-def _read(file_path: str, limit: int = None, offset: int = None) -> str:
+def _read(file_path: str, limit: int = None, offset: int = None,
+          since_last_read: bool = False, session_id: str = "default") -> str:
     p = Path(file_path)
     if not p.exists():
         return f"Error: file not found: {file_path}"
     if p.is_dir():
         return f"Error: {file_path} is a directory"
     try:
-        # Explicitly use utf-8 and newline="" to avoid encoding/line-ending mismatches
-        lines = _read_text_preserve_newlines(p).splitlines(keepends=True)
-        start = offset or 0
-        chunk = lines[start:start + limit] if limit else lines[start:]
+        history = get_read_history(session_id)
+        key = str(p.resolve())
+        previous = history.get(key) if since_last_read else None
+        if previous is not None and offset is None and limit is None:
+            offset, limit = previous.start, previous.limit   # re-read the same window
+        # Ranged mmap read: only the requested lines are decoded (see fileops.reader)
+        page = read_lines(p, offset or 0, limit, max_bytes=MAX_READ_BYTES)
+        if page["binary"]:
+            return f"Error: {file_path} appears to be a binary file ({p.stat().st_size} bytes)"
+        chunk, start = page["lines"], page["start"]
+        text = "".join(chunk)
+        history.remember(key, ReadSnapshot(text, start, limit))
         if not chunk:
-            return "(empty file)"
-        # Use standard 6-char padding for line numbers, matching Claude's expected format
-        return "".join(f"{start + i + 1:6}\t{l}" for i, l in enumerate(chunk))
+            out = "(empty file)"
+        else:
+            # Use standard 6-char padding for line numbers, matching Claude's expected format
+            out = "".join(f"{start + i + 1:6}\t{l}" for i, l in enumerate(chunk))
+            if page["truncated"]:
+                out += (f"\n[... output capped at {MAX_READ_BYTES // 1024} KB of {page['total']} lines; "
+                        f"continue with offset={start + len(chunk)} ...]")
+        if not since_last_read:
+            return out
+        if previous is None or (previous.start, previous.limit) != (start, limit):
+            return f"(No earlier Read of this range in this session; full content follows.)\n{out}"
+        if previous.text == text:
+            return f"No changes since last read of {file_path}."
+        diff = diff_since(previous, text, p.name)
+        if diff.startswith("[diff omitted") or len(diff) >= len(out):
+            return f"(Changed since last read; the diff is no smaller, so full content follows.)\n{out}"
+        old_n = previous.text.count("\n") + (1 if previous.text and not previous.text.endswith("\n") else 0)
+        return f"Changes since last read of {file_path} ({old_n} -> {len(chunk)} lines in range):\n\n{diff}"
     except Exception as e:
         return f"Error: {e}"
 
@@ -415,6 +496,34 @@ def _write(file_path: str, content: str) -> str:
         return f"Error: {e}"
 
 
+def _split_line_endings(content: str) -> tuple:
+    """Return (LF-normalised content, is_pure_crlf)."""
+    # Only treat as pure CRLF if every \n is part of \r\n
+    crlf_count = content.count("\r\n")
+    lf_count = content.count("\n")
+    is_pure_crlf = crlf_count > 0 and crlf_count == lf_count
+    return content.replace("\r\n", "\n"), is_pure_crlf
+
+
+def _replace_once_or_all(content_norm: str, old_string: str, new_string: str,
+                         replace_all: bool = False) -> tuple:
+    """Apply one search-and-replace to LF-normalised content.
+
+    Returns (new_content, None) on success or (None, error message).
+    """
+    old_norm = old_string.replace("\r\n", "\n")
+    new_norm = new_string.replace("\r\n", "\n")
+    count = content_norm.count(old_norm)
+    if count == 0:
+        return None, "Error: old_string not found in file. Please ensure EXACT match, including all exact leading spaces/indentation and trailing newlines."
+    if count > 1 and not replace_all:
+        return None, (f"Error: old_string appears {count} times. "
+                      "Provide more context to make it unique, or use replace_all=true.")
+    if replace_all:
+        return content_norm.replace(old_norm, new_norm), None
+    return content_norm.replace(old_norm, new_norm, 1), None
+
+
 def _edit(file_path: str, old_string: str, new_string: str, replace_all: bool = False) -> str:
     p = Path(file_path)
     if not p.exists():
@@ -422,27 +531,12 @@ def _edit(file_path: str, old_string: str, new_string: str, replace_all: bool =
     try:
         # Read with newline="" to get original line endings
         content = _read_text_preserve_newlines(p)
-        
-        # Detect original line endings: only treat as pure CRLF if every \n is part of \r\n
-        crlf_count = content.count("\r\n")
-        lf_count = content.count("\n")
-        is_pure_crlf = crlf_count > 0 and crlf_count == lf_count
 
         # Normalize line endings to avoid \r\n vs \n mismatch during matching
-        content_norm = content.replace("\r\n", "\n")
-        old_norm = old_string.replace("\r\n", "\n")
-        new_norm = new_string.replace("\r\n", "\n")
-
-        count = content_norm.count(old_norm)
-        if count == 0:
-            return "Error: old_string not found in file. Please ensure EXACT match, including all exact leading spaces/indentation and trailing newlines."
-        if count > 1 and not replace_all:
-            return (f"Error: old_string appears {count} times. "
-                    "Provide more context to make it unique, or use replace_all=true.")
-
-        old_content_norm = content_norm
-        new_content_norm = content_norm.replace(old_norm, new_norm) if replace_all else \
-                           content_norm.replace(old_norm, new_norm, 1)
+        content_norm, is_pure_crlf = _split_line_endings(content)
+        new_content_norm, error = _replace_once_or_all(content_norm, old_string, new_string, replace_all)
+        if error:
+            return error
 
         # Restore CRLF only for pure-CRLF files; mixed or LF-only files stay as LF
         if is_pure_crlf:
@@ -456,51 +550,67 @@ def _edit(file_path: str, old_string: str, new_string: str, replace_all: bool =
         _write_text_preserve_newlines(p, final_content)
         filename = p.name
         diff = generate_unified_diff(old_content_final, final_content, filename)
-        return f"Changes applied to {filename}:\n\n{diff}"
+        return f"Changes applied to {filename}:\n\n{maybe_truncate_diff(diff)}"
     except Exception as e:
         return f"Error: {e}"
 
 
-def _kill_proc_tree(pid: int):
-    """Kill a process and all its children."""
-    import sys as _sys
-    if _sys.platform == "win32":
-        # taskkill /T kills the entire process tree on Windows
-        subprocess.run(["taskkill", "/F", "/T", "/PID", str(pid)],
-                       capture_output=True)
-    else:
-        import signal
+def _multi_edit(edits: list) -> str:
+    """Apply an ordered list of edits, validating everything before writing anything.
+
+    Edits to the same file are applied in order to one in-memory copy (later
+    edits see earlier results), so each file is read once and written once.
+    """
+    if isinstance(edits, str):
         try:
-            os.killpg(os.getpgid(pid), signal.SIGKILL)
-        except (ProcessLookupError, PermissionError):
-            try:
-                os.kill(pid, signal.SIGKILL)
-            except (ProcessLookupError, PermissionError):
-                pass
+            edits = json.loads(edits)
+        except json.JSONDecodeError:
+            return "Error: edits must be a list of {file_path, old_string, new_string} objects"
+    if not isinstance(edits, list) or not edits:
+        return "Error: edits must be a non-empty list"
+    files: dict = {}    # path -> [original, is_pure_crlf, working_norm]
+    for i, op in enumerate(edits, 1):
+        if not isinstance(op, dict) or not op.get("file_path") or "old_string" not in op \
+                or "new_string" not in op:
+            return f"Error: edit #{i} needs file_path, old_string and new_string"
+        if op["old_string"] == op["new_string"]:
+            return f"Error: edit #{i} has identical old_string and new_string"
+        key = str(Path(op["file_path"]).resolve())
+        if key not in files:
+            p = Path(key)
+            if not p.exists():
+                return f"Error: edit #{i}: file not found: {op['file_path']}"
+            original = _read_text_preserve_newlines(p)
+            norm, is_pure_crlf = _split_line_endings(original)
+            files[key] = [original, is_pure_crlf, norm]
+        entry = files[key]
+        updated, error = _replace_once_or_all(
+            entry[2], op["old_string"], op["new_string"], bool(op.get("replace_all", False)))
+        if error:
+            return f"Error: edit #{i} ({op['file_path']}): {error[len('Error: '):]} No files were changed."
+        entry[2] = updated
+
+    sections = []
+    try:
+        for key, (original, is_pure_crlf, norm) in files.items():
+            final_content = norm.replace("\n", "\r\n") if is_pure_crlf else norm
+            old_content = original if is_pure_crlf else original.replace("\r\n", "\n")
+            if final_content == old_content:
+                continue
+            _write_text_preserve_newlines(Path(key), final_content)
+            sections.append(generate_unified_diff(old_content, final_content, Path(key).name))
+    except Exception as e:
+        return f"Error: {e}"
+    if not sections:
+        return "No changes"
+    return (f"Applied {len(edits)} edit(s) to {len(sections)} file(s):\n\n"
+            + maybe_truncate_diff("".join(sections), max_lines=200))
 
 
 def _run_shell_command(command: str, timeout: int) -> tuple[int, str]:
-    import sys as _sys
-    kwargs = dict(
-        shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-        text=True, cwd=os.getcwd(),
-    )
-    # On Unix, create a process group so we can kill the whole tree.
-    # start_new_session=True is equivalent to setsid but safe in multithreaded code
-    # (preexec_fn=os.setsid can deadlock when other threads hold locks at fork time).
-    if _sys.platform != "win32":
-        kwargs["start_new_session"] = True
-    proc = subprocess.Popen(command, **kwargs)
-    try:
-        stdout, stderr = proc.communicate(timeout=timeout)
-    except subprocess.TimeoutExpired:
-        _kill_proc_tree(proc.pid)
-        proc.wait()
-        return 124, f"Error: timed out after {timeout}s (process killed)"
-    out = stdout
-    if stderr:
-        out += ("\n" if out else "") + "[stderr]\n" + stderr
-    return proc.returncode, out.strip() or "(no output)"
+    # Streams stdout/stderr into head+tail buffers so memory stays bounded
+    # and a timeout still returns whatever was printed before the kill.
+    return run_captured(command, timeout, cwd=os.getcwd())
 
 
 def _windows_retry_command(command: str) -> str | None:
@@ -526,9 +636,13 @@ def _looks_like_windows_command_not_found(result: str) -> bool:
     )
 
 
-def _bash(command: str, timeout: int = 30) -> str:
+def _bash(command: str, timeout: int = 30, config: dict = None) -> str:
     import sys as _sys
     try:
+        if (config or {}).get("bash_persistent") and shell_session.is_available():
+            # cd / export / source carry over between calls in this session's shell
+            shell = shell_session.get_shell(config.get("_session_id") or "default")
+            return shell.run(command, timeout)[1]
         returncode, output = _run_shell_command(command, timeout)
         retry = None
         if _sys.platform == "win32" and returncode != 0 and _looks_like_windows_command_not_found(output):
@@ -548,30 +662,62 @@ def _bash(command: str, timeout: int = 30) -> str:
         return f"Error: {e}"
 
 
+GLOB_LIMIT = 500
+GREP_MAX_CHARS = 20000
+
+
 def _glob(pattern: str, path: str = None) -> str:
     base = Path(path) if path else Path.cwd()
     try:
-        matches = sorted(base.glob(pattern))
+        index, start = find_file_index(base)
+        rels = None
+        if not Path(pattern).is_absolute() and ".." not in Path(pattern).parts:
+            rels = index.glob(pattern, start, limit=GLOB_LIMIT)
+        if rels is None:
+            # Outside the index (absolute, parent-relative or explicitly ignored path).
+            matches = [str(m) for m in sorted(base.glob(pattern))[:GLOB_LIMIT]]
+        else:
+            matches = [str(index.root / rel) for rel in rels]
         if not matches:
             return "No files matched"
-        return "\n".join(str(m) for m in matches[:500])
+        out = "\n".join(matches)
+        if len(matches) >= GLOB_LIMIT:
+            out += f"\n... (first {GLOB_LIMIT} matches shown; narrow the pattern for more)"
+        return out
     except Exception as e:
         return f"Error: {e}"
 
 
+@functools.lru_cache(maxsize=1)
 def _has_rg() -> bool:
+    """Detect ripgrep once per process."""
+    return shutil.which("rg") is not None
+
+
+def _run_bounded(cmd: list, limit: int, timeout: float = 30) -> str:
+    """Run *cmd* and return at most *limit* chars of stdout, killing it once enough is read."""
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                            text=True, encoding="utf-8", errors="replace")
+    timer = threading.Timer(timeout, proc.kill)
+    timer.start()
     try:
-        subprocess.run(["rg", "--version"], capture_output=True, check=True)
-        return True
-    except Exception:
-        return False
+        out = proc.stdout.read(limit)
+    finally:
+        timer.cancel()
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
+    return out
 
 
 def _grep(pattern: str, path: str = None, glob: str = None,
           output_mode: str = "files_with_matches",
           case_insensitive: bool = False, context: int = 0) -> str:
-    use_rg = _has_rg()
-    cmd = ["rg" if use_rg else "grep", "--no-heading"]
+    if not _has_rg():
+        return grep_search(pattern, path, glob, output_mode, case_insensitive, context,
+                           max_chars=GREP_MAX_CHARS)
+    cmd = ["rg", "--no-heading"]
     if case_insensitive:
         cmd.append("-i")
     if output_mode == "files_with_matches":
@@ -583,34 +729,20 @@ def _grep(pattern: str, path: str = None, glob: str = None,
         if context:
             cmd += ["-C", str(context)]
     if glob:
-        cmd += (["--glob", glob] if use_rg else ["--include", glob])
-    cmd.append(pattern)
+        cmd += ["--glob", glob]
+    cmd += ["--", pattern]
     cmd.append(path or str(Path.cwd()))
     try:
-        r = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        out = r.stdout.strip()
-        return out[:20000] if out else "No matches found"
+        out = _run_bounded(cmd, GREP_MAX_CHARS).strip()
+        return out if out else "No matches found"
     except Exception as e:
         return f"Error: {e}"
 
 
 def _webfetch(url: str, prompt: str = None) -> str:
     try:
-        import httpx
-        r = httpx.get(url, headers={"User-Agent": "NanoClaude/1.0"},
-                      timeout=30, follow_redirects=True)
-        r.raise_for_status()
-        ct = r.headers.get("content-type", "")
-        if "html" in ct:
-            text = re.sub(r"<script[^>]*>.*?</script>", "", r.text,
-                          flags=re.DOTALL | re.IGNORECASE)
-            text = re.sub(r"<style[^>]*>.*?</style>", "", text,
-                          flags=re.DOTALL | re.IGNORECASE)
-            text = re.sub(r"<[^>]+>", " ", text)
-            text = re.sub(r"\s+", " ", text).strip()
-        else:
-            text = r.text
-        return text[:25000]
+        # Pooled client + on-disk HTTP cache; HTML is converted while streaming
+        return web.fetch_text(url, max_chars=25000)
     except ImportError:
         return "Error: httpx not installed — run: pip install httpx"
     except Exception as e:
@@ -619,14 +751,11 @@ def _webfetch(url: str, prompt: str = None) -> str:
 
 def _websearch(query: str) -> str:
     try:
-        import httpx
         url = "https://html.duckduckgo.com/html/"
-        r = httpx.get(url, params={"q": query},
-                      headers={"User-Agent": "Mozilla/5.0 (compatible)"},
-                      timeout=30, follow_redirects=True)
+        html = web.search_html(url, {"q": query}, headers={"User-Agent": "Mozilla/5.0 (compatible)"})
         titles   = re.findall(r'class="result__title"[^>]*>.*?<a[^>]*href="([^"]+)"[^>]*>(.*?)</a>',
-                               r.text, re.DOTALL)
-        snippets = re.findall(r'class="result__snippet"[^>]*>(.*?)</div>', r.text, re.DOTALL)
+                               html, re.DOTALL)
+        snippets = re.findall(r'class="result__snippet"[^>]*>(.*?)</div>', html, re.DOTALL)
         results = []
         for i, (link, title) in enumerate(titles[:8]):
             t = re.sub(r"<[^>]+>", "", title).strip()
@@ -736,126 +865,29 @@ def _notebook_edit(
             return f"Error: cell '{cell_id}' not found"
         cells.pop(idx)
         nb["cells"] = cells
-        p.write_text(json.dumps(nb, indent=1, ensure_ascii=False), encoding="utf-8")
+        atomic_write_text(p, json.dumps(nb, indent=1, ensure_ascii=False))
         return f"Deleted cell '{cell_id}' from {notebook_path}"
     else:
         return f"Error: unknown edit_mode '{edit_mode}' — use replace, insert, or delete"
 
     nb["cells"] = cells
-    p.write_text(json.dumps(nb, indent=1, ensure_ascii=False), encoding="utf-8")
+    atomic_write_text(p, json.dumps(nb, indent=1, ensure_ascii=False))
     return f"NotebookEdit({edit_mode}) applied to cell '{cell_id}' in {notebook_path}"
 
 
 # ── GetDiagnostics implementation ──────────────────────────────────────────
 
-def _detect_language(file_path: str) -> str:
-    ext = Path(file_path).suffix.lower()
-    return {
-        ".py":   "python",
-        ".js":   "javascript",
-        ".mjs":  "javascript",
-        ".cjs":  "javascript",
-        ".ts":   "typescript",
-        ".tsx":  "typescript",
-        ".sh":   "shellscript",
-        ".bash": "shellscript",
-        ".zsh":  "shellscript",
-    }.get(ext, "unknown")
-
-
-def _run_quietly(cmd: list[str], cwd: str | None = None, timeout: int = 30) -> tuple[int, str]:
-    """Run a command, return (returncode, combined_output)."""
-    try:
-        r = subprocess.run(
-            cmd, capture_output=True, text=True, timeout=timeout,
-            cwd=cwd or os.getcwd(),
-        )
-        out = (r.stdout + ("\n" + r.stderr if r.stderr else "")).strip()
-        return r.returncode, out
-    except FileNotFoundError:
-        return -1, f"(command not found: {cmd[0]})"
-    except subprocess.TimeoutExpired:
-        return -1, f"(timed out after {timeout}s)"
-    except Exception as e:
-        return -1, f"(error: {e})"
-
-
-def _get_diagnostics(file_path: str, language: str = None) -> str:
-    p = Path(file_path)
-    if not p.exists():
-        return f"Error: file not found: {file_path}"
-
-    lang = language or _detect_language(file_path)
-    abs_path = str(p.resolve())
-    results: list[str] = []
-
-    if lang == "python":
-        # Try pyright first (most comprehensive)
-        rc, out = _run_quietly(["pyright", "--outputjson", abs_path])
-        if rc != -1:
-            try:
-                data = json.loads(out)
-                diags = data.get("generalDiagnostics", [])
-                if not diags:
-                    results.append("pyright: no diagnostics")
-                else:
-                    lines = [f"pyright ({len(diags)} issue(s)):"]
-                    for d in diags[:50]:
-                        rng = d.get("range", {}).get("start", {})
-                        ln = rng.get("line", 0) + 1
-                        ch = rng.get("character", 0) + 1
-                        sev = d.get("severity", "error")
-                        msg = d.get("message", "")
-                        rule = d.get("rule", "")
-                        lines.append(f"  {ln}:{ch} [{sev}] {msg}" + (f" ({rule})" if rule else ""))
-                    results.append("\n".join(lines))
-            except json.JSONDecodeError:
-                if out:
-                    results.append(f"pyright:\n{out[:3000]}")
-        else:
-            # Try mypy
-            rc2, out2 = _run_quietly(["mypy", "--no-error-summary", abs_path])
-            if rc2 != -1:
-                results.append(f"mypy:\n{out2[:3000]}" if out2 else "mypy: no diagnostics")
-            else:
-                # Fall back to flake8
-                rc3, out3 = _run_quietly(["flake8", abs_path])
-                if rc3 != -1:
-                    results.append(f"flake8:\n{out3[:3000]}" if out3 else "flake8: no diagnostics")
-                else:
-                    # Last resort: py_compile syntax check
-                    rc4, out4 = _run_quietly(["python3", "-m", "py_compile", abs_path])
-                    if out4:
-                        results.append(f"py_compile (syntax check):\n{out4}")
-                    else:
-                        results.append("py_compile: syntax OK (no further tools available)")
-
-    elif lang in ("javascript", "typescript"):
-        # Try tsc
-        rc, out = _run_quietly(["tsc", "--noEmit", "--strict", abs_path])
-        if rc != -1:
-            results.append(f"tsc:\n{out[:3000]}" if out else "tsc: no errors")
-        else:
-            # Try eslint
-            rc2, out2 = _run_quietly(["eslint", abs_path])
-            if rc2 != -1:
-                results.append(f"eslint:\n{out2[:3000]}" if out2 else "eslint: no issues")
-            else:
-                results.append("No TypeScript/JavaScript checker found (install tsc or eslint)")
-
-    elif lang == "shellscript":
-        rc, out = _run_quietly(["shellcheck", abs_path])
-        if rc != -1:
-            results.append(f"shellcheck:\n{out[:3000]}" if out else "shellcheck: no issues")
-        else:
-            # Basic bash syntax check
-            rc2, out2 = _run_quietly(["bash", "-n", abs_path])
-            results.append(f"bash -n (syntax check):\n{out2}" if out2 else "bash -n: syntax OK")
-
-    else:
-        results.append(f"No diagnostic tool available for language: {lang or 'unknown'} (ext: {Path(file_path).suffix})")
-
-    return "\n\n".join(results) if results else "(no diagnostics output)"
+def _get_diagnostics(file_path: str = None, language: str = None, file_paths: list = None) -> str:
+    """Diagnose one file, or several in one batched checker run per language."""
+    paths = list(file_paths or [])
+    if file_path and file_path not in paths:
+        paths.insert(0, file_path)
+    if not paths:
+        return "Error: file_path or file_paths is required"
+    results = diagnose(paths, language)
+    if len(paths) == 1:
+        return results[paths[0]] or "(no diagnostics output)"
+    return "\n\n".join(f"== {fp} ==\n{results[fp]}" for fp in paths)
 
 
 # ── AskUserQuestion implementation ────────────────────────────────────────
@@ -1027,18 +1059,28 @@ def execute_tool(
 ) -> str:
     """Dispatch tool execution; ask permission for write/destructive ops.
 
-    Permission checking is done here, then delegation goes to the registry.
+    Delegates to the registry, whose "permission" middleware
+    (``_permission_middleware``) applies *permission_mode* and *ask_permission*.
     The config dict is forwarded to tool functions so they can access
     runtime context like _depth, _system_prompt, model, etc.
     """
-    cfg = config or {}
+    return _registry_execute(
+        name, inputs, config or {},
+        context={"permission_mode": permission_mode, "ask_permission": ask_permission},
+    )
+
+
+def _permission_middleware(call, next_) -> str:
+    """Registry middleware: gate write/destructive tools on the caller's permission mode.
 
-    # Normalize the tool name via registry lookup so case-insensitive names
-    # (e.g. "bash" -> "Bash") still hit the correct permission gate below.
-    from tool_registry import get_tool as _lookup
-    resolved = _lookup(name)
-    if resolved is not None:
-        name = resolved.name
+    Calls made straight through ``tool_registry.execute_tool`` carry no
+    permission_mode and are passed through unchecked.
+    """
+    permission_mode = call.context.get("permission_mode")
+    if permission_mode is None:
+        return next_(call)
+    ask_permission = call.context.get("ask_permission")
+    name, inputs = call.name, call.params
 
     def _check(desc: str) -> bool:
         """Return True if action is allowed."""
@@ -1048,14 +1090,17 @@ def execute_tool(
             return ask_permission(desc)
         return True  # headless: allow everything
 
-    # --- permission gate ---
     if name == "Write":
         if not _check(f"Write to {inputs['file_path']}"):
             return "Denied: user rejected write operation"
     elif name == "Edit":
         if not _check(f"Edit {inputs['file_path']}"):
             return "Denied: user rejected edit operation"
-    elif name == "Bash":
+    elif name == "MultiEdit":
+        targets = sorted({e.get("file_path", "") for e in inputs.get("edits") or [] if isinstance(e, dict)})
+        if not _check(f"Edit {', '.join(targets)}"):
+            return "Denied: user rejected edit operation"
+    elif name in ("Bash", "BashBackground"):
         cmd = inputs["command"]
         if permission_mode != "accept-all" and not _is_safe_bash(cmd):
             if not _check(f"Bash: {cmd}"):
@@ -1064,7 +1109,10 @@ def execute_tool(
         if not _check(f"Edit notebook {inputs['notebook_path']}"):
             return "Denied: user rejected notebook edit operation"
 
-    return _registry_execute(name, inputs, cfg)
+    return next_(call)
+
+
+add_middleware("permission", _permission_middleware, order=10)
 
 
 # ── Register built-in tools with the central registry ────────────────────
@@ -1078,7 +1126,10 @@ def _register_builtins() -> None:
         ToolDef(
             name="Read",
             schema=_schemas["Read"],
-            func=lambda p, c: _read(**p),
+            func=lambda p, c: _read(
+                p["file_path"], p.get("limit"), p.get("offset"),
+                p.get("since_last_read", False), c.get("_session_id", "default"),
+            ),
             read_only=True,
             concurrent_safe=True,
         ),
@@ -1096,12 +1147,21 @@ def _register_builtins() -> None:
             read_only=False,
             concurrent_safe=False,
         ),
+        ToolDef(
+            name="MultiEdit",
+            schema=_schemas["MultiEdit"],
+            func=lambda p, c: _multi_edit(p["edits"]),
+            read_only=False,
+            concurrent_safe=False,
+        ),
         ToolDef(
             name="Bash",
             schema=_schemas["Bash"],
-            func=lambda p, c: _bash(p["command"], p.get("timeout", 30)),
+            func=lambda p, c: _bash(p["command"], p.get("timeout", 30), c),
             read_only=False,
             concurrent_safe=False,
+            timeout=0,  # enforces its own per-command timeout
+            normalize=True,
         ),
         ToolDef(
             name="Glob",
@@ -1121,6 +1181,10 @@ def _register_builtins() -> None:
             ),
             read_only=True,
             concurrent_safe=True,
+            # Runs in-process (not isolated) so the fallback search builds and
+            # reuses the shared workspace FileIndex; it stops itself after
+            # workspace.grep.GREP_TIMEOUT and the worker is abandoned at 60 s.
+            timeout=60,
         ),
         ToolDef(
             name="WebFetch",
@@ -1128,6 +1192,7 @@ def _register_builtins() -> None:
             func=lambda p, c: _webfetch(p["url"], p.get("prompt")),
             read_only=True,
             concurrent_safe=True,
+            # No result cache: web.cache applies the page's own HTTP freshness rules
         ),
         ToolDef(
             name="WebSearch",
@@ -1135,6 +1200,7 @@ def _register_builtins() -> None:
             func=lambda p, c: _websearch(p["query"]),
             read_only=True,
             concurrent_safe=True,
+            cache_ttl=300,
         ),
         ToolDef(
             name="NotebookEdit",
@@ -1148,13 +1214,16 @@ def _register_builtins() -> None:
             ),
             read_only=False,
             concurrent_safe=False,
+            timeout=60,
+            isolate=True,
         ),
         ToolDef(
             name="GetDiagnostics",
             schema=_schemas["GetDiagnostics"],
             func=lambda p, c: _get_diagnostics(
-                p["file_path"],
+                p.get("file_path"),
                 p.get("language"),
+                p.get("file_paths"),
             ),
             read_only=True,
             concurrent_safe=True,
@@ -1169,6 +1238,7 @@ def _register_builtins() -> None:
             ),
             read_only=True,
             concurrent_safe=False,
+            timeout=0,  # waits for the user
         ),
         ToolDef(
             name="SleepTimer",
@@ -1212,12 +1282,32 @@ import mcp.tools as _mcp_tools  # noqa: F401
 # Reserved section removed: no plugin loading in dev-council.
 
 
+# ── Blob store tool (ToolResult) ─────────────────────────────────────────────
+# blob/tools.py registers ToolResult for paging through spilled tool outputs.
+import blob.tools as _blob_tools  # noqa: F401
+
+
+# ── Background shell jobs (BashBackground, BashOutput, BashKill) ───────────────
+# shell/tools.py registers the job tools; jobs run detached in their own process group.
+import shell.tools as _shell_tools  # noqa: F401
+
+
+# ── Code navigation (FindSymbol, FindReferences, SearchCode) ─────────────────
+# workspace/tools.py registers the symbol-index and code-search tools.
+import workspace.tools as _workspace_tools  # noqa: F401
+
+
+# ── Tool discovery (ToolSearch) ──────────────────────────────────────────────
+# tool_selection.py registers ToolSearch; agent.run sends a per-turn subset of schemas.
+import tool_selection as _tool_selection  # noqa: F401
+
+
 # ── Task tools (TaskCreate, TaskUpdate, TaskGet, TaskList) ─────────────────────
 # task/tools.py registers all four tools into the central registry on import.
 import task.tools as _task_tools  # noqa: F401
 
 
-# ── Checkpoint hooks (backup files before Write/Edit/NotebookEdit) ───────────
+# ── Checkpoint middleware (backup files before Write/Edit/MultiEdit/NotebookEdit) ─
 from checkpoint.hooks import install_hooks as _install_checkpoint_hooks
 _install_checkpoint_hooks()
 
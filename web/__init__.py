@@ -0,0 +1,9 @@
+"""Web access for WebFetch/WebSearch: pooled client, HTTP cache, streaming HTML-to-text."""
+from .client import fetch_text, search_html, get_client, close_client, get_fetch_stats
+from .html import HTMLTextExtractor, html_to_text
+from .cache import clear_cache
+
+__all__ = [
+    "fetch_text", "search_html", "get_client", "close_client", "get_fetch_stats",
+    "HTMLTextExtractor", "html_to_text", "clear_cache",
+]
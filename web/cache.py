@@ -0,0 +1,173 @@
+"""On-disk HTTP cache for WebFetch.
+
+Directory layout:
+    ~/.dev-council/http-cache/
+        <sha256(url)>.json   # metadata: url, status, validators, freshness
+        <sha256(url)>.body   # raw response body
+
+Freshness follows ``Cache-Control`` (``max-age`` / ``s-maxage``,
+``no-cache``, ``no-store``), then ``Expires``, then the usual heuristic of
+10% of the time since ``Last-Modified`` (capped at a day). Stale entries with
+an ``ETag`` or ``Last-Modified`` are revalidated with a conditional request,
+and a ``304`` refreshes the entry without downloading the body again.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Optional
+
+from config import CONFIG_DIR
+
+MAX_BODY_BYTES = 5 * 1024 * 1024
+MAX_ENTRIES = 500
+HEURISTIC_CAP = 24 * 3600
+
+_STORED_HEADERS = ("content-type", "etag", "last-modified", "cache-control", "expires", "date")
+
+
+def _cache_root() -> Path:
+    return CONFIG_DIR / "http-cache"
+
+
+def _key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _http_date(value: str) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def parse_cache_control(value: str) -> dict:
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip().strip('"')
+    return directives
+
+
+def freshness_lifetime(headers: dict, now: Optional[float] = None) -> float:
+    """Seconds a response stays fresh (0 = must revalidate)."""
+    now = now or time.time()
+    cc = parse_cache_control(headers.get("cache-control", ""))
+    if "no-cache" in cc or "no-store" in cc:
+        return 0.0
+    for name in ("s-maxage", "max-age"):
+        if name in cc:
+            try:
+                return max(0.0, float(cc[name]))
+            except ValueError:
+                return 0.0
+    expires = _http_date(headers.get("expires", ""))
+    if expires is not None:
+        date = _http_date(headers.get("date", "")) or now
+        return max(0.0, expires - date)
+    last_modified = _http_date(headers.get("last-modified", ""))
+    if last_modified is not None:
+        return min(HEURISTIC_CAP, max(0.0, (now - last_modified) * 0.1))
+    return 0.0
+
+
+def is_storable(status: int, headers: dict) -> bool:
+    if status != 200:
+        return False
+    cc = parse_cache_control(headers.get("cache-control", ""))
+    if "no-store" in cc:        # "private" is fine: this is a single-user cache
+        return False
+    return bool(freshness_lifetime(headers) or headers.get("etag") or headers.get("last-modified"))
+
+
+class CacheEntry:
+    def __init__(self, meta: dict, body_path: Path, meta_path: Path):
+        self.meta = meta
+        self.body_path = body_path
+        self.meta_path = meta_path
+
+    @property
+    def headers(self) -> dict:
+        return self.meta.get("headers", {})
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        now = now or time.time()
+        return now - self.meta.get("stored_at", 0) < self.meta.get("lifetime", 0)
+
+    def validators(self) -> dict:
+        h = {}
+        if self.headers.get("etag"):
+            h["If-None-Match"] = self.headers["etag"]
+        if self.headers.get("last-modified"):
+            h["If-Modified-Since"] = self.headers["last-modified"]
+        return h
+
+    def body(self) -> bytes:
+        return self.body_path.read_bytes()
+
+    def refresh(self, new_headers: dict) -> None:
+        """Apply a 304 response: merge headers and restart the freshness clock."""
+        merged = dict(self.headers)
+        merged.update({k: v for k, v in new_headers.items() if k in _STORED_HEADERS})
+        self.meta["headers"] = merged
+        self.meta["stored_at"] = time.time()
+        self.meta["lifetime"] = freshness_lifetime(merged)
+        _write_json(self.meta_path, self.meta)
+
+
+def _write_json(path: Path, data: dict) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def lookup(url: str) -> Optional[CacheEntry]:
+    root = _cache_root()
+    meta_path = root / f"{_key(url)}.json"
+    body_path = root / f"{_key(url)}.body"
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if meta.get("url") != url or not body_path.exists():
+        return None
+    return CacheEntry(meta, body_path, meta_path)
+
+
+def store(url: str, status: int, headers: dict, body: bytes) -> None:
+    if len(body) > MAX_BODY_BYTES or not is_storable(status, headers):
+        return
+    root = _cache_root()
+    root.mkdir(parents=True, exist_ok=True)
+    kept = {k: v for k, v in headers.items() if k in _STORED_HEADERS}
+    body_path = root / f"{_key(url)}.body"
+    tmp = body_path.with_suffix(".tmp-body")
+    tmp.write_bytes(body)
+    os.replace(tmp, body_path)
+    _write_json(root / f"{_key(url)}.json", {
+        "url": url,
+        "status": status,
+        "headers": kept,
+        "stored_at": time.time(),
+        "lifetime": freshness_lifetime(kept),
+    })
+    _prune(root)
+
+
+def _prune(root: Path) -> None:
+    metas = sorted(root.glob("*.json"), key=lambda p: p.stat().st_mtime)
+    for meta in metas[:-MAX_ENTRIES] if len(metas) > MAX_ENTRIES else []:
+        meta.unlink(missing_ok=True)
+        meta.with_suffix(".body").unlink(missing_ok=True)
+
+
+def clear_cache() -> None:
+    root = _cache_root()
+    if root.exists():
+        for p in root.iterdir():
+            p.unlink(missing_ok=True)
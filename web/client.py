@@ -0,0 +1,149 @@
+"""Shared, pooled HTTP client plus cached, streaming page fetch for WebFetch/WebSearch."""
+from __future__ import annotations
+
+import atexit
+import codecs
+import threading
+
+from . import cache
+from .html import HTMLTextExtractor
+
+USER_AGENT = "NanoClaude/1.0"
+FETCH_TIMEOUT = 30
+MAX_TEXT_CHARS = 25000
+
+_client = None
+_client_lock = threading.Lock()
+_stats = {"hits": 0, "revalidated": 0, "misses": 0}
+
+
+def get_client():
+    """Return the process-wide httpx.Client (keep-alive connection pool)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            import httpx
+            _client = httpx.Client(
+                headers={"User-Agent": USER_AGENT},
+                timeout=FETCH_TIMEOUT,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+        return _client
+
+
+def close_client() -> None:
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+atexit.register(close_client)
+
+
+def get_fetch_stats() -> dict:
+    return dict(_stats)
+
+
+def _charset(content_type: str) -> str:
+    for part in content_type.split(";"):
+        name, _, value = part.strip().partition("=")
+        if name.lower() == "charset" and value:
+            charset = value.strip('"')
+            try:
+                codecs.lookup(charset)
+                return charset
+            except LookupError:
+                break
+    return "utf-8"
+
+
+class _TextSink:
+    """Incrementally decode body chunks and turn them into text until *max_chars*."""
+
+    def __init__(self, content_type: str, max_chars: int):
+        self.decoder = codecs.getincrementaldecoder(_charset(content_type))(errors="replace")
+        self.parser = HTMLTextExtractor(max_chars) if "html" in content_type else None
+        self.max_chars = max_chars
+        self.plain: list[str] = []
+        self.plain_len = 0
+
+    @property
+    def done(self) -> bool:
+        return self.parser.done if self.parser is not None else self.plain_len >= self.max_chars
+
+    def feed(self, chunk: bytes, final: bool = False) -> None:
+        if self.done:
+            return
+        text = self.decoder.decode(chunk, final)
+        if self.parser is not None:
+            self.parser.feed_chunk(text)
+        else:
+            self.plain.append(text)
+            self.plain_len += len(text)
+
+    def text(self) -> str:
+        if self.parser is not None:
+            self.parser.close()
+            return self.parser.text()
+        return "".join(self.plain)[:self.max_chars]
+
+
+def _render(body: bytes, content_type: str, max_chars: int) -> str:
+    sink = _TextSink(content_type, max_chars)
+    for i in range(0, len(body), 65536):
+        sink.feed(body[i:i + 65536])
+        if sink.done:
+            break
+    sink.feed(b"", final=True)
+    return sink.text()
+
+
+def fetch_text(url: str, max_chars: int = MAX_TEXT_CHARS, headers: dict = None) -> str:
+    """GET *url* through the HTTP cache and return readable text (HTML stripped).
+
+    The body is decoded and converted while it streams in. Uncacheable
+    responses stop downloading as soon as *max_chars* of text exist; cacheable
+    ones are read to the end (up to the cache's size cap) so they can be stored.
+    Raises httpx errors (including HTTPStatusError for non-2xx responses).
+    """
+    entry = cache.lookup(url)
+    if entry is not None and entry.is_fresh():
+        _stats["hits"] += 1
+        return _render(entry.body(), entry.headers.get("content-type", ""), max_chars)
+
+    request_headers = dict(headers or {})
+    if entry is not None:
+        request_headers.update(entry.validators())
+
+    with get_client().stream("GET", url, headers=request_headers) as r:
+        if r.status_code == 304 and entry is not None:
+            _stats["revalidated"] += 1
+            entry.refresh({k.lower(): v for k, v in r.headers.items()})
+            return _render(entry.body(), entry.headers.get("content-type", ""), max_chars)
+        r.raise_for_status()
+        _stats["misses"] += 1
+        resp_headers = {k.lower(): v for k, v in r.headers.items()}
+        sink = _TextSink(resp_headers.get("content-type", ""), max_chars)
+        storable = cache.is_storable(r.status_code, resp_headers)
+        body = bytearray()
+        for chunk in r.iter_bytes():
+            sink.feed(chunk)
+            if storable:
+                body += chunk
+                if len(body) > cache.MAX_BODY_BYTES:
+                    storable = False
+                    body = bytearray()
+            if sink.done and not storable:
+                break
+        sink.feed(b"", final=True)
+        if storable:
+            cache.store(url, r.status_code, resp_headers, bytes(body))
+        return sink.text()
+
+
+def search_html(url: str, params: dict, headers: dict = None) -> str:
+    """Uncached GET returning the raw response text (used by WebSearch)."""
+    return get_client().get(url, params=params, headers=headers or {}).text
@@ -0,0 +1,103 @@
+"""Single-pass, streaming HTML-to-text extraction.
+
+The extractor is fed chunks as they arrive and stops collecting once
+``max_chars`` of text have been produced, so a huge page costs no more than
+the part that is actually returned. Script/style/head content is skipped,
+block elements become line breaks and whitespace is collapsed on the fly.
+Like a browser, the head also ends at ``<body>`` or the first block element,
+so pages that never close it still yield their text.
+"""
+from __future__ import annotations
+
+from html.parser import HTMLParser
+
+SKIP_TAGS = frozenset({"script", "style", "noscript", "template", "svg", "iframe"})
+BLOCK_TAGS = frozenset({
+    "p", "div", "br", "li", "ul", "ol", "tr", "table", "section", "article", "header",
+    "footer", "nav", "aside", "main", "h1", "h2", "h3", "h4", "h5", "h6", "pre",
+    "blockquote", "dd", "dt", "dl", "hr", "form", "figure", "figcaption", "title",
+})
+
+
+class HTMLTextExtractor(HTMLParser):
+    def __init__(self, max_chars: int = 25000):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.parts: list[str] = []
+        self.length = 0
+        self.done = False
+        self._skip_depth = 0
+        self._in_head = False
+        self._pending_space = False
+        self._pending_break = False
+
+    # ── HTMLParser callbacks ────────────────────────────────────────────────
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "head":
+            self._in_head = True
+        elif tag == "body" or (tag in BLOCK_TAGS and tag != "title"):
+            self._in_head = False
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._pending_break = True
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self._pending_break = True
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self._in_head = False
+        elif tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self._pending_break = True
+
+    def handle_data(self, data):
+        if self.done or self._skip_depth or self._in_head:
+            return
+        words = data.split()
+        if not words:
+            if data:
+                self._pending_space = True
+            return
+        if self.length:
+            if self._pending_break:
+                self._emit("\n")
+            elif self._pending_space or data[0].isspace():
+                self._emit(" ")
+        self._pending_break = False
+        self._emit(" ".join(words))
+        self._pending_space = data[-1].isspace()
+
+    # ── Output ──────────────────────────────────────────────────────────────
+
+    def _emit(self, text: str) -> None:
+        room = self.max_chars - self.length
+        if room <= 0:
+            self.done = True
+            return
+        if len(text) >= room:
+            text = text[:room]
+            self.done = True
+        self.parts.append(text)
+        self.length += len(text)
+
+    def feed_chunk(self, chunk: str) -> bool:
+        """Feed a chunk; returns False once the output limit has been reached."""
+        if not self.done:
+            self.feed(chunk)
+        return not self.done
+
+    def text(self) -> str:
+        return "".join(self.parts).strip()
+
+
+def html_to_text(html: str, max_chars: int = 25000, chunk_size: int = 65536) -> str:
+    parser = HTMLTextExtractor(max_chars)
+    for i in range(0, len(html), chunk_size):
+        if not parser.feed_chunk(html[i:i + chunk_size]):
+            break
+    return parser.text()
@@ -0,0 +1,28 @@
+"""Workspace file index (ignore-aware, incrementally refreshed) shared by Glob and prompts."""
+from .ignore import DEFAULT_IGNORED_DIRS, IgnoreMatcher, parse_gitignore
+from .index import (
+    FileIndex,
+    get_file_index,
+    find_file_index,
+    notify_changed,
+    add_change_listener,
+    clear_file_indexes,
+    project_snapshot,
+)
+from .repomap import build_repo_map, clear_repo_map_cache
+from .search import SearchIndex, clear_search_indexes, get_search_index, relevant_code
+from .symbols import (
+    Symbol,
+    SymbolIndex,
+    get_symbol_index,
+    clear_symbol_indexes,
+)
+
+__all__ = [
+    "DEFAULT_IGNORED_DIRS", "IgnoreMatcher", "parse_gitignore",
+    "FileIndex", "get_file_index", "find_file_index", "notify_changed",
+    "add_change_listener", "clear_file_indexes", "project_snapshot",
+    "Symbol", "SymbolIndex", "get_symbol_index", "clear_symbol_indexes",
+    "build_repo_map", "clear_repo_map_cache",
+    "SearchIndex", "get_search_index", "relevant_code", "clear_search_indexes",
+]
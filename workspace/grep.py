@@ -0,0 +1,212 @@
+"""Built-in content search used when ripgrep is not installed.
+
+Files come from the workspace index (so .gitignore and noise directories are
+skipped), are scanned on a thread pool in index order, and the search stops
+once the output budget is spent. Each file is memory-mapped and, where the
+pattern allows an equivalent bytes regex (``_byte_prefilter``), rejected with
+a single bytes-regex pass; only files with a possible hit are decoded and
+split into lines. Output mirrors ``rg --no-heading`` for the three Grep output modes.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from .ignore import _translate
+from .index import find_file_index
+
+MAX_OUTPUT_CHARS = 20000
+MMAP_MIN_BYTES = 64 * 1024      # smaller files are cheaper to read() than to map
+BINARY_PROBE_BYTES = 8192
+BATCH_SIZE = 64
+GREP_TIMEOUT = 30.0
+
+
+def _expand_braces(pattern: str) -> list:
+    m = re.search(r"\{([^{}]*)\}", pattern)
+    if not m:
+        return [pattern]
+    out = []
+    for alt in m.group(1).split(","):
+        out.extend(_expand_braces(pattern[:m.start()] + alt + pattern[m.end():]))
+    return out
+
+
+def compile_glob_filter(glob: Optional[str]):
+    """Return a predicate on root-relative paths with ripgrep ``--glob`` semantics.
+
+    Patterns without ``/`` match the file name at any depth; patterns with
+    ``/`` match the whole relative path. ``{a,b}`` alternation is supported and
+    a leading ``!`` excludes instead of includes.
+    """
+    if not glob:
+        return lambda rel: True
+    negate = glob.startswith("!")
+    if negate:
+        glob = glob[1:]
+    regexes = []
+    for alt in _expand_braces(glob):
+        anchored = "/" in alt
+        body = _translate(alt.lstrip("/"))
+        regexes.append((anchored, re.compile("^" + body + "$")))
+
+    def predicate(rel: str) -> bool:
+        name = rel.rsplit("/", 1)[-1]
+        hit = any(rx.match(rel if anchored else name) for anchored, rx in regexes)
+        return hit != negate
+
+    return predicate
+
+
+def _load(path: Path):
+    """Return a bytes-like view of *path* (mmap for large files) or None if binary/unreadable."""
+    try:
+        size = path.stat().st_size
+        if size == 0:
+            return None
+        with open(path, "rb") as f:
+            if size >= MMAP_MIN_BYTES:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                data = f.read()
+    except (OSError, ValueError):
+        return None
+    if b"\0" in data[:BINARY_PROBE_BYTES]:
+        if isinstance(data, mmap.mmap):
+            data.close()
+        return None
+    return data
+
+
+_NON_ASCII = re.compile(rb"[\x80-\xff]")
+_UNICODE_CLASSES = frozenset("wWdDsSbBxX0123456789")
+
+
+def _byte_prefilter(pattern: str, flags: int):
+    """Compile the whole-file bytes prefilter for *pattern*: ``(regex, ascii_data_only)``.
+
+    The prefilter may only reject files the per-line text regex cannot
+    match. ``$`` is left out (a ``\\r\\n`` line ends in ``\\r`` as bytes but not
+    after ``splitlines``), as are non-ASCII patterns (multi-byte characters,
+    Unicode case folding). Constructs that behave differently on multi-byte
+    text (``.``, ``[^...]``, ``\\w``/``\\d``/``\\s``/``\\b``, escapes) and
+    case-insensitive letters with non-ASCII case variants (k, s, i) are only
+    equivalent on ASCII data, so ``ascii_data_only`` tells the scanner to
+    trust a rejection only for ASCII files.
+    """
+    if not pattern.isascii() or "$" in pattern:
+        return None, False
+    try:
+        rx = re.compile(pattern.encode("ascii"), flags | re.MULTILINE)
+    except re.error:
+        return None, False
+    ascii_only = (flags & re.IGNORECASE) and any(c in pattern for c in "kKsSiI")
+    i = 0
+    while i < len(pattern) and not ascii_only:
+        c = pattern[i]
+        if c == "\\":
+            ascii_only = pattern[i + 1:i + 2] in _UNICODE_CLASSES and i + 1 < len(pattern)
+            i += 2
+            continue
+        ascii_only = c == "." or (c == "[" and pattern[i + 1:i + 2] == "^")
+        i += 1
+    return rx, bool(ascii_only)
+
+
+def _scan_file(path: Path, display: str, byte_rx, ascii_only: bool, text_rx,
+               output_mode: str, context: int) -> str:
+    data = _load(path)
+    if data is None:
+        return ""
+    try:
+        if byte_rx is not None and not byte_rx.search(data) and not (ascii_only and _NON_ASCII.search(data)):
+            return ""
+        text = bytes(data).decode("utf-8", errors="replace")
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+
+    lines = text.splitlines()
+    hits = [i for i, line in enumerate(lines) if text_rx.search(line)]
+    if not hits:
+        return ""
+    if output_mode == "files_with_matches":
+        return display + "\n"
+    if output_mode == "count":
+        return f"{display}:{len(hits)}\n"
+
+    out = []
+    hit_set = set(hits)
+    last = -1
+    for i in hits:
+        lo = max(0, i - context, last + 1)
+        hi = min(len(lines) - 1, i + context)
+        if last >= 0 and lo > last + 1:
+            out.append("--\n")
+        for j in range(lo, hi + 1):
+            sep = ":" if j in hit_set else "-"
+            out.append(f"{display}{sep}{j + 1}{sep}{lines[j]}\n")
+        last = max(last, hi)
+    return "".join(out)
+
+
+def search(pattern: str, path: str = None, glob: str = None,
+           output_mode: str = "files_with_matches",
+           case_insensitive: bool = False, context: int = 0,
+           max_chars: int = MAX_OUTPUT_CHARS, workers: int = None) -> str:
+    """Search *path* (file or directory, default cwd) for *pattern*."""
+    flags = re.IGNORECASE if case_insensitive else 0
+    try:
+        text_rx = re.compile(pattern, flags)
+    except re.error as e:
+        return f"Error: invalid regex: {e}"
+    # Inline (?i) counts as case-insensitive too
+    byte_rx, ascii_only = _byte_prefilter(pattern, flags | (text_rx.flags & re.IGNORECASE))
+
+    target = Path(path) if path else Path.cwd()
+    if not target.exists():
+        return f"Error: path not found: {target}"
+    if target.is_file():
+        candidates = [(target, str(target))]
+    else:
+        index, start = find_file_index(target)
+        keep = compile_glob_filter(glob)
+        offset = len(start) + 1 if start else 0
+        candidates = (
+            (index.root / rel, str(target / rel[offset:]))
+            for rel in index.walk(start)
+            if keep(rel[offset:])
+        )
+
+    context = max(0, int(context or 0)) if output_mode == "content" else 0
+    deadline = time.monotonic() + GREP_TIMEOUT
+    chunks: list[str] = []
+    used = 0
+    workers = workers or min(8, (os.cpu_count() or 2))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        exhausted = False
+        it = iter(candidates)
+        while not exhausted and used < max_chars and time.monotonic() < deadline:
+            batch = []
+            for _ in range(BATCH_SIZE):
+                try:
+                    batch.append(next(it))
+                except StopIteration:
+                    exhausted = True
+                    break
+            futures = [pool.submit(_scan_file, p, d, byte_rx, ascii_only, text_rx, output_mode, context)
+                       for p, d in batch]
+            for fut in futures:
+                result = fut.result()
+                if result and used < max_chars:
+                    chunks.append(result)
+                    used += len(result)
+    out = "".join(chunks).strip()
+    if not out:
+        return "No matches found"
+    return out[:max_chars]
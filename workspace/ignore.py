@@ -0,0 +1,186 @@
+"""Ignore rules for workspace scans: built-in noise directories plus .gitignore files.
+
+Supports the common .gitignore syntax: comments, blank lines, ``!`` negation,
+trailing ``/`` for directory-only patterns, leading/inner ``/`` anchoring,
+``*``, ``?``, ``[...]`` and ``**``. Rules from deeper .gitignore files are
+evaluated after (and override) shallower ones; the last match wins.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# Directories that are never worth indexing, even without a .gitignore.
+DEFAULT_IGNORED_DIRS = frozenset({
+    ".git", ".hg", ".svn",
+    "node_modules", "__pycache__",
+    ".venv", "venv",
+    ".mypy_cache", ".pytest_cache", ".ruff_cache", ".tox", ".nox",
+    ".next", ".gradle", ".idea",
+})
+
+
+def _translate(pattern: str) -> str:
+    """Translate a gitignore glob (without anchoring) into a regex body."""
+    out: list[str] = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**/", i):
+                out.append("(?:.*/)?")
+                i += 3
+                continue
+            if pattern.startswith("**", i):
+                out.append(".*")
+                i += 2
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = pattern.find("]", i + 1)
+            if j == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:j]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = j
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+@dataclass
+class IgnoreRule:
+    regex: re.Pattern
+    negate: bool
+    dir_only: bool
+
+
+def parse_gitignore(text: str) -> list[IgnoreRule]:
+    rules: list[IgnoreRule] = []
+    for raw in text.splitlines():
+        line = raw.rstrip("\n\r")
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        if not line.endswith("\\ "):
+            line = line.rstrip()
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        elif line.startswith("\\!") or line.startswith("\\#"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        anchored = "/" in line
+        line = line.lstrip("/")
+        body = _translate(line)
+        regex = re.compile(("^" if anchored else "^(?:.*/)?") + body + "$")
+        rules.append(IgnoreRule(regex=regex, negate=negate, dir_only=dir_only))
+    return rules
+
+
+@dataclass
+class _RuleSet:
+    base: str                      # directory of the .gitignore, relative to top ("" = top)
+    rules: list[IgnoreRule] = field(default_factory=list)
+
+
+class IgnoreMatcher:
+    """Decide whether a path under *root* is ignored.
+
+    Paths passed to :meth:`is_ignored` are relative to *root* using ``/``.
+    Rules are evaluated relative to *top*, the enclosing git work tree when
+    there is one, so .gitignore files above *root* still apply.
+    """
+
+    def __init__(self, root: Path, extra_ignored_dirs: frozenset = frozenset()):
+        self.root = root
+        self.ignored_dirs = DEFAULT_IGNORED_DIRS | extra_ignored_dirs
+        self.top = self._find_top(root)
+        rel = root.relative_to(self.top).as_posix() if root != self.top else ""
+        self._root_prefix = f"{rel}/" if rel else ""
+        self._rulesets: dict[str, _RuleSet] = {}
+        # .git/info/exclude: own ruleset, lowest precedence, never unloaded by a rescan
+        self._exclude = _RuleSet(base="")
+        self._ordered: list[_RuleSet] = [self._exclude]
+        self._load_ancestors()
+
+    @staticmethod
+    def _find_top(root: Path) -> Path:
+        probe = root
+        while True:
+            if (probe / ".git").exists():
+                return probe
+            if probe.parent == probe:
+                return root
+            probe = probe.parent
+
+    def _load_ancestors(self) -> None:
+        exclude = self.top / ".git" / "info" / "exclude"
+        if exclude.is_file():
+            try:
+                self._exclude.rules = parse_gitignore(exclude.read_text(encoding="utf-8", errors="replace"))
+            except OSError:
+                pass
+        # .gitignore files strictly above root; root's own is loaded by the scan.
+        parts = self._root_prefix.rstrip("/").split("/") if self._root_prefix else []
+        for depth in range(len(parts)):
+            base = "/".join(parts[:depth])
+            gi = (self.top / base if base else self.top) / ".gitignore"
+            if gi.is_file():
+                self._add_ruleset(base, gi)
+
+    def _add_ruleset(self, base: str, path: Path) -> None:
+        try:
+            text = path.read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            return
+        rs = self._rulesets.get(base)
+        if rs is None:
+            rs = _RuleSet(base=base)
+            self._rulesets[base] = rs
+            self._ordered.append(rs)
+            self._ordered.sort(key=lambda r: r.base.count("/") + (1 if r.base else 0))
+        rs.rules.extend(parse_gitignore(text))
+
+    def load_dir(self, rel_dir: str, gitignore: Path) -> None:
+        """Load the .gitignore found in *rel_dir* (relative to root) during a scan."""
+        self.unload_dir(rel_dir)
+        self._add_ruleset((self._root_prefix + rel_dir).rstrip("/"), gitignore)
+
+    def unload_dir(self, rel_dir: str) -> None:
+        """Drop the rules of *rel_dir*'s .gitignore (it was deleted)."""
+        base = (self._root_prefix + rel_dir).rstrip("/")
+        self._rulesets.pop(base, None)
+        self._ordered = [r for r in self._ordered if r.base != base or r is self._exclude]
+
+    def is_ignored(self, rel_path: str, is_dir: bool) -> bool:
+        name = rel_path.rsplit("/", 1)[-1]
+        if is_dir and name in self.ignored_dirs:
+            return True
+        full = self._root_prefix + rel_path
+        ignored = False
+        for rs in self._ordered:
+            if rs.base:
+                if not full.startswith(rs.base + "/"):
+                    continue
+                sub = full[len(rs.base) + 1:]
+            else:
+                sub = full
+            for rule in rs.rules:
+                if rule.dir_only and not is_dir:
+                    continue
+                if rule.regex.match(sub):
+                    ignored = not rule.negate
+        return ignored
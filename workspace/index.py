@@ -0,0 +1,264 @@
+"""Persistent, ignore-aware file index for a workspace root.
+
+Directory listings are cached per directory and revalidated lazily by
+directory mtime, at most once per ``REFRESH_INTERVAL`` seconds. A query only
+stats the directories it actually walks, and walks stop as soon as enough
+results have been produced, so ``Glob`` and project snapshots on large trees
+cost roughly in proportion to the answer rather than the repository.
+
+Walk order is depth-first with entries sorted by name, which matches
+``sorted(Path.glob(...))`` for the paths that are returned.
+"""
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .ignore import IgnoreMatcher, _translate
+
+REFRESH_INTERVAL = 1.0      # seconds between mtime revalidations of a directory
+_GLOB_CHARS = re.compile(r"[*?\[]")
+
+
+@dataclass
+class _DirListing:
+    mtime_ns: int
+    entries: list = field(default_factory=list)     # sorted [(name, is_dir)]
+    gitignore_mtime_ns: int = 0
+    checked_epoch: int = -1
+
+
+class FileIndex:
+    def __init__(self, root: Path):
+        self.root = Path(root).resolve()
+        self.matcher = IgnoreMatcher(self.root)
+        self.generation = 0             # bumped whenever any listing changes
+        self._dirs: dict[str, _DirListing] = {}
+        self._epoch = 0
+        self._last_refresh = 0.0
+        self._lock = threading.RLock()
+
+    # ── Cache maintenance ───────────────────────────────────────────────────
+
+    def _begin_query(self) -> None:
+        now = time.monotonic()
+        if now - self._last_refresh >= REFRESH_INTERVAL:
+            self._epoch += 1
+            self._last_refresh = now
+
+    def _forget(self, rel_dir: str) -> None:
+        prefix = f"{rel_dir}/" if rel_dir else ""
+        for key in [k for k in self._dirs if k == rel_dir or k.startswith(prefix)]:
+            del self._dirs[key]
+
+    def _scan(self, rel_dir: str, abs_dir: Path, mtime_ns: int) -> _DirListing:
+        entries = []
+        gitignore_mtime = 0
+        try:
+            with os.scandir(abs_dir) as it:
+                raw = list(it)
+        except OSError:
+            raw = []
+        for entry in raw:
+            if entry.name == ".gitignore":
+                try:
+                    gitignore_mtime = entry.stat().st_mtime_ns
+                    self.matcher.load_dir(rel_dir, Path(entry.path))
+                except OSError:
+                    pass
+        for entry in raw:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            if self.matcher.is_ignored(rel, is_dir):
+                continue
+            entries.append((entry.name, is_dir))
+        entries.sort()
+        self.generation += 1
+        return _DirListing(mtime_ns=mtime_ns, entries=entries,
+                           gitignore_mtime_ns=gitignore_mtime, checked_epoch=self._epoch)
+
+    def _listing(self, rel_dir: str) -> Optional[_DirListing]:
+        cached = self._dirs.get(rel_dir)
+        if cached is not None and cached.checked_epoch == self._epoch:
+            return cached
+        abs_dir = self.root / rel_dir if rel_dir else self.root
+        try:
+            mtime_ns = abs_dir.stat().st_mtime_ns
+        except OSError:
+            self._forget(rel_dir)
+            return None
+        gi_mtime = 0
+        if cached is not None and cached.gitignore_mtime_ns:
+            try:
+                gi_mtime = (abs_dir / ".gitignore").stat().st_mtime_ns
+            except OSError:
+                self.matcher.unload_dir(rel_dir)
+        if cached is not None and cached.mtime_ns == mtime_ns and gi_mtime == cached.gitignore_mtime_ns:
+            cached.checked_epoch = self._epoch
+            return cached
+        listing = self._scan(rel_dir, abs_dir, mtime_ns)
+        if cached is not None:
+            if listing.gitignore_mtime_ns != cached.gitignore_mtime_ns:
+                # Rules changed; descendants were filtered with the old ones.
+                self._forget(rel_dir)
+            else:
+                # Only this directory changed; drop subdirectories that are gone.
+                kept = {name for name, is_dir in listing.entries if is_dir}
+                for name, is_dir in cached.entries:
+                    if is_dir and name not in kept:
+                        self._forget(f"{rel_dir}/{name}" if rel_dir else name)
+        self._dirs[rel_dir] = listing
+        return listing
+
+    def notify_changed(self, path) -> None:
+        """Mark the directory containing *path* stale (call after creating/removing a file)."""
+        try:
+            rel = Path(path).resolve().relative_to(self.root).as_posix()
+        except ValueError:
+            return
+        parent = rel.rsplit("/", 1)[0] if "/" in rel else ""
+        with self._lock:
+            cached = self._dirs.get(parent)
+            if cached is not None:
+                cached.checked_epoch = -1
+
+    # ── Queries ─────────────────────────────────────────────────────────────
+
+    def walk(self, start: str = "", max_depth: Optional[int] = None,
+             include_dirs: bool = False) -> Iterator[str]:
+        """Yield root-relative ``/`` paths of non-ignored files (and dirs) under *start*."""
+        with self._lock:
+            self._begin_query()
+            listing = self._listing(start)
+        if listing is None:
+            return iter(())
+        return self._emit(listing.entries, start, 0, max_depth, include_dirs)
+
+    def _emit(self, entries, rel_dir, depth, max_depth, include_dirs) -> Iterator[str]:
+        for name, is_dir in entries:
+            rel = f"{rel_dir}/{name}" if rel_dir else name
+            if not is_dir:
+                yield rel
+                continue
+            if include_dirs:
+                yield rel
+            if max_depth is not None and depth + 1 > max_depth:
+                continue
+            with self._lock:
+                listing = self._listing(rel)
+            if listing is not None:
+                yield from self._emit(listing.entries, rel, depth + 1, max_depth, include_dirs)
+
+    def is_ignored_path(self, rel_path: str) -> bool:
+        """True if *rel_path* or any of its parent directories is ignored."""
+        parts = rel_path.split("/")
+        for i in range(1, len(parts) + 1):
+            sub = "/".join(parts[:i])
+            is_dir = i < len(parts) or (self.root / sub).is_dir()
+            if self.matcher.is_ignored(sub, is_dir):
+                return True
+        return False
+
+    def glob(self, pattern: str, start: str = "", limit: int = 500) -> Optional[list]:
+        """Return up to *limit* paths (relative to root) under *start* matching *pattern*.
+
+        *pattern* uses pathlib semantics and is relative to *start*. Returns
+        None when the pattern's literal directory prefix is itself ignored
+        (e.g. ``node_modules/pkg/*.js``) so callers can fall back to a raw glob.
+        """
+        parts = [p for p in pattern.split("/") if p not in ("", ".")]
+        literal = []
+        for part in parts:
+            if _GLOB_CHARS.search(part):
+                break
+            literal.append(part)
+        walk_root = "/".join(([start] if start else []) + literal)
+        rest = parts[len(literal):]
+        if walk_root and self.is_ignored_path(walk_root):
+            return None
+        max_depth = None if any("**" in p for p in rest) else max(len(rest) - 1, 0)
+        if not rest:
+            target = self.root / walk_root
+            return [walk_root] if walk_root and target.exists() else []
+        regex = re.compile("^" + _translate("/".join(rest)) + "$")
+        offset = len(walk_root) + 1 if walk_root else 0
+        matches = []
+        for rel in self.walk(walk_root, max_depth, include_dirs=True):
+            if regex.match(rel[offset:]):
+                matches.append(rel)
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def files(self, limit: Optional[int] = None, start: str = "") -> list:
+        """First *limit* non-ignored files in walk order."""
+        out = []
+        for rel in self.walk(start):
+            out.append(rel)
+            if limit is not None and len(out) >= limit:
+                break
+        return out
+
+
+_indexes: dict[Path, FileIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_file_index(root=None) -> FileIndex:
+    """Return the shared index for *root* (default: cwd), creating it on first use."""
+    key = Path(root or Path.cwd()).resolve()
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = FileIndex(key)
+            _indexes[key] = index
+        return index
+
+
+def find_file_index(path) -> tuple:
+    """Return ``(index, rel)`` for an existing index containing *path*, else a new one for *path*."""
+    target = Path(path).resolve()
+    with _indexes_lock:
+        for root, index in _indexes.items():
+            if target == root or root in target.parents:
+                rel = "" if target == root else target.relative_to(root).as_posix()
+                return index, rel
+    return get_file_index(target), ""
+
+
+_change_listeners: list = []
+
+
+def add_change_listener(listener) -> None:
+    """Call ``listener(path)`` whenever ``notify_changed`` reports a file change."""
+    if listener not in _change_listeners:
+        _change_listeners.append(listener)
+
+
+def notify_changed(path) -> None:
+    """Tell every index containing *path* (and registered listeners) that it changed."""
+    target = Path(path).resolve()
+    with _indexes_lock:
+        indexes = [ix for root, ix in _indexes.items() if root in target.parents]
+    for index in indexes:
+        index.notify_changed(target)
+    for listener in list(_change_listeners):
+        listener(target)
+
+
+def clear_file_indexes() -> None:
+    with _indexes_lock:
+        _indexes.clear()
+
+
+def project_snapshot(root=None, limit: int = 200) -> str:
+    """Newline-separated list of the first *limit* non-ignored files under *root*."""
+    return "\n".join(get_file_index(root).files(limit=limit))
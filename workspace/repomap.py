@@ -0,0 +1,226 @@
+"""Token-budgeted repository map for council and pipeline prompts.
+
+Files are ranked by a personalised PageRank over the cross-file reference
+graph from the symbol index (file A -> file B when A uses a name B defines),
+with the personalisation and the primary ordering coming from keyword overlap
+between the task text and each file's path and symbol names. The highest-ranked files
+are rendered with their signatures (classes, functions, methods,
+constants) while they fit the token budget, then as top-level-only or bare
+names in rank order. The result is a directory tree, two spaces per level,
+with each file's signatures nested under it::
+
+    core/
+      billing.py
+        def charge(invoice: Invoice) -> None
+      models.py
+        class Invoice
+          def total(self) -> int
+
+Tokens are estimated like ``compaction.estimate_tokens`` (chars / 3.5) and the
+map never exceeds the budget under that estimate. Maps are cached per
+(root, budget, task keywords) and reused until the symbol index or the file
+listing changes.
+"""
+from __future__ import annotations
+
+import math
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+
+from .index import get_file_index
+from .symbols import get_symbol_index
+
+CHARS_PER_TOKEN = 3.5           # same estimate as compaction.estimate_tokens
+MAX_SIGNATURES_PER_FILE = 30
+MAX_DEFINERS = 5                # names defined in more files than this are too generic to link
+MAX_LISTED_FILES = 20000
+PAGERANK_ITERATIONS = 20
+DAMPING = 0.85
+CACHE_SIZE = 32
+
+_WORD = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+_STOPWORDS = frozenset({
+    "the", "and", "for", "with", "that", "this", "from", "into", "add", "use", "make", "new",
+    "all", "are", "can", "should", "when", "will", "not", "but", "our", "your", "has", "have",
+    "def", "self", "class", "return", "import", "none", "true", "false", "file", "files", "code",
+})
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _stem(word: str) -> str:
+    return word[:-1] if len(word) > 4 and word.endswith("s") and not word.endswith("ss") else word
+
+
+def keywords(text: str) -> set:
+    """Lower-cased, crudely singularised words of *text*, splitting snake_case / camelCase / paths."""
+    return {_stem(w.lower()) for w in _WORD.findall(text or "")
+            if len(w) >= 3 and w.lower() not in _STOPWORDS}
+
+
+def _file_keywords(rel: str, symbols: list) -> set:
+    words = keywords(rel.replace("/", " ").replace(".", " "))
+    for s in symbols:
+        words |= keywords(s.name)
+    return words
+
+
+def _pagerank(nodes: list, edges: dict, personal: dict) -> dict:
+    n = len(nodes)
+    if not n:
+        return {}
+    total = sum(personal.values())
+    p = {f: personal[f] / total for f in nodes} if total else {f: 1.0 / n for f in nodes}
+    rank = dict(p)
+    out_weight = {f: sum(targets.values()) for f, targets in edges.items()}
+    for _ in range(PAGERANK_ITERATIONS):
+        nxt = {f: (1 - DAMPING) * p[f] for f in nodes}
+        dangling = sum(rank[f] for f in nodes if not out_weight.get(f))
+        for f in nodes:
+            nxt[f] += DAMPING * dangling * p[f]
+        for src, targets in edges.items():
+            share = DAMPING * rank[src] / out_weight[src]
+            for dst, w in targets.items():
+                nxt[dst] += share * w
+        rank = nxt
+    return rank
+
+
+def rank_files(entries: dict, all_files: list, task: str = "") -> list:
+    """Return *all_files* ordered by relevance to *task* (most relevant first)."""
+    task_words = keywords(task)
+    definers = defaultdict(set)
+    for rel, (symbols, _) in entries.items():
+        for s in symbols:
+            if not s.container and len(s.name) >= 3:
+                definers[s.name].add(rel)
+
+    edges: dict = {}
+    for rel, (_, refs) in entries.items():
+        targets = defaultdict(float)
+        for ident in refs:
+            owners = definers.get(ident)
+            if not owners or len(owners) > MAX_DEFINERS:
+                continue
+            weight = (10.0 if ident.lower() in task_words else 1.0) / len(owners)
+            for owner in owners:
+                if owner != rel:
+                    targets[owner] += weight
+        if targets:
+            edges[rel] = dict(targets)
+
+    kw = {}
+    for rel in all_files:
+        symbols = entries.get(rel, ([], {}))[0]
+        kw[rel] = len(task_words & _file_keywords(rel, symbols)) if task_words else 0
+    nodes = list(entries)
+    rank = _pagerank(nodes, edges, {f: kw.get(f, 0) for f in nodes})
+    kw_max = max(kw.values(), default=0) or 1
+    score = {rel: rank.get(rel, 0.0) + kw[rel] / kw_max for rel in all_files}
+    return sorted(all_files, key=lambda rel: (-score[rel], rel))
+
+
+def _render_block(rel: str, symbols: list, top_level_only: bool = False) -> list:
+    """Tree lines for *rel*: its file name, then its signatures nested one level deeper."""
+    pad = "  " * rel.count("/")
+    classes = {s.name for s in symbols if s.kind == "class" and not s.container}
+    lines = [pad + rel.rsplit("/", 1)[-1]]
+    for s in sorted(symbols, key=lambda s: s.line):
+        if not s.container:
+            if s.kind == "variable":
+                if not s.name.isupper():
+                    continue
+                lines.append(f"{pad}  {s.signature[:60]}")
+            else:
+                lines.append(f"{pad}  {s.signature}")
+        elif not top_level_only and s.container in classes and s.kind == "method":
+            lines.append(f"{pad}    {s.signature}")
+        if len(lines) > MAX_SIGNATURES_PER_FILE:
+            lines.append(f"{pad}  ...")
+            break
+    return lines
+
+
+def _new_dirs(rel: str, shown: set) -> list:
+    """``(dir, tree line)`` for the ancestor directories of *rel* not in *shown* yet."""
+    parts = rel.split("/")[:-1]
+    return [("/".join(parts[:i + 1]), "  " * i + part + "/")
+            for i, part in enumerate(parts) if "/".join(parts[:i + 1]) not in shown]
+
+
+def _tree_key(rel: str) -> tuple:
+    return tuple(rel.split("/"))
+
+
+class _Cached:
+    __slots__ = ("stamp", "text")
+
+    def __init__(self, stamp: tuple, text: str):
+        self.stamp = stamp
+        self.text = text
+
+
+_cache: "OrderedDict[tuple, _Cached]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def build_repo_map(task: str = "", token_budget: int = 4000, root=None) -> str:
+    """Ranked directory tree with signatures nested under files, at most *token_budget* tokens."""
+    root = Path(root or Path.cwd()).resolve()
+    sym_index = get_symbol_index(root)
+    file_index = get_file_index(root)
+    entries = sym_index.all_entries()
+    all_files = file_index.files(limit=MAX_LISTED_FILES)
+    key = (root, token_budget, tuple(sorted(keywords(task))))
+    stamp = (sym_index.version, file_index.generation)
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is not None and hit.stamp == stamp:
+            _cache.move_to_end(key)
+            return hit.text
+
+    # Every tree line costs its length plus a newline; the last newline is not
+    # printed, hence the one spare char.
+    budget_chars = int(token_budget * CHARS_PER_TOKEN) + 1
+    chosen: dict = {}
+    shown: set = set()
+    used = 0
+    for rel in rank_files(entries, all_files, task):
+        symbols = entries.get(rel, ([], {}))[0]
+        dirs = _new_dirs(rel, shown)
+        dir_cost = sum(len(line) + 1 for _, line in dirs)
+        full = _render_block(rel, symbols)
+        candidates = [full, _render_block(rel, symbols, top_level_only=True), full[:1]]
+        for block in candidates:
+            cost = dir_cost + sum(len(line) + 1 for line in block)
+            if used + cost <= budget_chars:
+                chosen[rel] = block
+                shown.update(d for d, _ in dirs)
+                used += cost
+                break
+        if budget_chars - used < 8:
+            break
+
+    lines: list = []
+    shown = set()
+    for rel in sorted(chosen, key=_tree_key):
+        dirs = _new_dirs(rel, shown)
+        shown.update(d for d, _ in dirs)
+        lines += [line for _, line in dirs] + chosen[rel]
+    text = "\n".join(lines)
+
+    with _cache_lock:
+        _cache[key] = _Cached(stamp, text)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return text
+
+
+def clear_repo_map_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,375 @@
+"""BM25 code search over function/class-level chunks (the SearchCode tool).
+
+Source files are split into chunks at definition boundaries from the symbol
+extractor (each chunk runs from one ``def``/``class``/``function`` to the
+next, capped at ``MAX_CHUNK_LINES``); text and config files are split into
+fixed windows. Chunks are tokenized into lower-cased identifiers plus their
+snake_case / camelCase parts, with the file path and the chunk's symbol name
+added as boosted terms, and stored in an in-memory inverted index.
+
+The per-file chunk data is persisted as JSON under
+``~/.dev-council/search-index/`` so a new session only re-tokenizes files
+whose ``(mtime_ns, size)`` changed. Refreshes follow the symbol index: a full
+stat pass at most once per ``REFRESH_INTERVAL`` plus immediate re-indexing of
+files reported through ``workspace.notify_changed``.
+"""
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from config import CONFIG_DIR
+from .index import REFRESH_INTERVAL, add_change_listener, get_file_index
+from .symbols import MAX_FILE_BYTES, PARSE_WORKERS, SUPPORTED_SUFFIXES, extract_symbols
+
+INDEX_FORMAT = 1
+MAX_CHUNK_LINES = 120
+TEXT_WINDOW_LINES = 60
+SAVE_INTERVAL = 30.0
+K1 = 1.2
+B = 0.75
+NAME_BOOST = 3          # extra term frequency for the chunk's symbol name
+PATH_BOOST = 1          # term frequency for words of the file path
+
+TEXT_SUFFIXES = frozenset({".md", ".rst", ".txt", ".toml", ".yaml", ".yml", ".cfg", ".ini",
+                           ".html", ".css", ".scss", ".sql", ".proto", ".graphql"})
+INDEXED_SUFFIXES = SUPPORTED_SUFFIXES | TEXT_SUFFIXES
+
+_IDENT = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d{2,}")
+_PART = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+
+def tokenize(text: str) -> list:
+    """Identifiers, lower-cased, each followed by its snake/camel parts."""
+    out = []
+    for ident in _IDENT.findall(text):
+        low = ident.lower()
+        if len(low) > 1:
+            out.append(low)
+        parts = _PART.findall(ident)
+        if len(parts) > 1:
+            out.extend(p.lower() for p in parts if len(p) > 1)
+    return out
+
+
+@dataclass
+class Chunk:
+    path: str
+    start: int              # 1-based, inclusive
+    end: int
+    label: str              # symbol signature or "" for preamble/text windows
+    length: int
+    terms: dict             # term -> frequency
+
+
+def _spans(lines: list, rel: str, source: str) -> list:
+    """``(start, end, (signature, name))`` chunk spans covering the file."""
+    n = len(lines)
+    if not n:
+        return []
+    if Path(rel).suffix.lower() in TEXT_SUFFIXES:
+        return [(i + 1, min(n, i + TEXT_WINDOW_LINES), ("", "")) for i in range(0, n, TEXT_WINDOW_LINES)]
+    starts = {}
+    for s in extract_symbols(source, rel):
+        if s.kind in ("class", "function", "method", "interface", "type", "enum"):
+            starts.setdefault(s.line, (s.signature, s.name))
+    bounds = sorted(starts)
+    if not bounds or bounds[0] != 1:
+        bounds.insert(0, 1)
+    spans = []
+    for i, start in enumerate(bounds):
+        end = (bounds[i + 1] - 1) if i + 1 < len(bounds) else n
+        label = starts.get(start, ("", ""))
+        while end - start + 1 > MAX_CHUNK_LINES:
+            spans.append((start, start + MAX_CHUNK_LINES - 1, label))
+            start += MAX_CHUNK_LINES
+        if end >= start:
+            spans.append((start, end, label))
+    return spans
+
+
+def chunk_file(path: Path, rel: str) -> list:
+    try:
+        source = path.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return []
+    if "\x00" in source[:4096]:
+        return []
+    lines = source.splitlines()
+    path_terms = tokenize(rel.replace("/", " ").replace(".", " "))
+    chunks = []
+    for start, end, (label, name) in _spans(lines, rel, source):
+        terms = Counter(tokenize("\n".join(lines[start - 1:end])))
+        if not terms:
+            continue
+        length = sum(terms.values())
+        for t in path_terms:
+            terms[t] += PATH_BOOST
+        for t in tokenize(name):
+            terms[t] += NAME_BOOST
+        chunks.append(Chunk(rel, start, end, label, length, dict(terms)))
+    return chunks
+
+
+def _index_dir() -> Path:
+    return CONFIG_DIR / "search-index"
+
+
+class SearchIndex:
+    """Inverted BM25 index over the chunks of one workspace root."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root).resolve()
+        self._files: dict = {}                  # rel -> (mtime_ns, size, [chunk ids])
+        self._chunks: dict = {}                 # chunk id -> Chunk
+        self._postings: dict = {}               # term -> {chunk id: tf}
+        self._next_id = 0
+        self._total_len = 0
+        self._dirty: set = set()
+        self._last_scan = 0.0
+        self._last_save = 0.0
+        self._unsaved = False
+        self._lock = threading.RLock()
+        self.indexed = 0        # files (re)tokenized so far, for tests and /status
+        self._load()
+
+    # ── Persistence ─────────────────────────────────────────────────────────
+
+    def _store_path(self) -> Path:
+        return _index_dir() / f"{hashlib.sha1(str(self.root).encode()).hexdigest()[:16]}.json"
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self._store_path().read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("format") != INDEX_FORMAT or data.get("root") != str(self.root):
+            return
+        for rel, (mtime_ns, size, chunks) in data.get("files", {}).items():
+            self._add_file(rel, mtime_ns, size,
+                           [Chunk(rel, c[0], c[1], c[2], c[3], c[4]) for c in chunks])
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._unsaved:
+                return
+            files = {
+                rel: [mtime_ns, size, [[c.start, c.end, c.label, c.length, c.terms]
+                                       for c in (self._chunks[i] for i in ids)]]
+                for rel, (mtime_ns, size, ids) in self._files.items()
+            }
+            self._unsaved = False
+            self._last_save = time.monotonic()
+        path = self._store_path()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"format": INDEX_FORMAT, "root": str(self.root), "files": files}),
+                           encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    # ── Maintenance ─────────────────────────────────────────────────────────
+
+    def _add_file(self, rel: str, mtime_ns: int, size: int, chunks: list) -> None:
+        ids = []
+        for chunk in chunks:
+            cid = self._next_id
+            self._next_id += 1
+            self._chunks[cid] = chunk
+            self._total_len += chunk.length
+            for term, tf in chunk.terms.items():
+                self._postings.setdefault(term, {})[cid] = tf
+            ids.append(cid)
+        self._files[rel] = (mtime_ns, size, ids)
+
+    def _remove_file(self, rel: str) -> None:
+        entry = self._files.pop(rel, None)
+        if entry is None:
+            return
+        for cid in entry[2]:
+            chunk = self._chunks.pop(cid)
+            self._total_len -= chunk.length
+            for term in chunk.terms:
+                posting = self._postings.get(term)
+                if posting is not None:
+                    posting.pop(cid, None)
+                    if not posting:
+                        del self._postings[term]
+
+    def notify_changed(self, path) -> None:
+        try:
+            rel = Path(path).resolve().relative_to(self.root).as_posix()
+        except ValueError:
+            return
+        if Path(rel).suffix.lower() in INDEXED_SUFFIXES:
+            with self._lock:
+                self._dirty.add(rel)
+
+    def refresh(self, force: bool = False) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if force or now - self._last_scan >= REFRESH_INTERVAL:
+                candidates = [rel for rel in get_file_index(self.root).walk()
+                              if Path(rel).suffix.lower() in INDEXED_SUFFIXES]
+                seen = set(candidates)
+                for rel in [r for r in self._files if r not in seen]:
+                    self._remove_file(rel)
+                    self._unsaved = True
+                self._last_scan = now
+            else:
+                candidates = list(self._dirty)
+            stale = []
+            for rel in candidates:
+                try:
+                    st = (self.root / rel).stat()
+                except OSError:
+                    st = None
+                if st is None or st.st_size > MAX_FILE_BYTES:
+                    if rel in self._files:
+                        self._remove_file(rel)
+                        self._unsaved = True
+                    continue
+                entry = self._files.get(rel)
+                if rel in self._dirty or entry is None or entry[:2] != (st.st_mtime_ns, st.st_size):
+                    stale.append((rel, st))
+            self._dirty.clear()
+            if stale:
+                with ThreadPoolExecutor(max_workers=PARSE_WORKERS) as pool:
+                    chunked = list(pool.map(lambda item: chunk_file(self.root / item[0], item[0]), stale))
+                for (rel, st), chunks in zip(stale, chunked):
+                    self._remove_file(rel)
+                    self._add_file(rel, st.st_mtime_ns, st.st_size, chunks)
+                self.indexed += len(stale)
+                self._unsaved = True
+            should_save = self._unsaved and (not self._last_save or now - self._last_save >= SAVE_INTERVAL)
+        if should_save:
+            self.save()
+
+    # ── Queries ─────────────────────────────────────────────────────────────
+
+    def search(self, query: str, limit: int = 10, path_prefix: str = "") -> list:
+        """Return ``[(score, Chunk, matched_terms)]`` ranked by BM25."""
+        self.refresh()
+        terms = list(dict.fromkeys(tokenize(query)))
+        prefix = path_prefix.strip("/")
+        with self._lock:
+            n = len(self._chunks)
+            if not n or not terms:
+                return []
+            avgdl = self._total_len / n or 1.0
+            scores: dict = {}
+            matched: dict = {}
+            for term in terms:
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                for cid, tf in posting.items():
+                    dl = self._chunks[cid].length
+                    scores[cid] = scores.get(cid, 0.0) + idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * dl / avgdl))
+                    matched.setdefault(cid, set()).add(term)
+            ranked = sorted(scores.items(), key=lambda kv: -kv[1])
+            results = []
+            for cid, score in ranked:
+                chunk = self._chunks[cid]
+                if prefix and not (chunk.path == prefix or chunk.path.startswith(prefix + "/")):
+                    continue
+                results.append((score, chunk, matched[cid]))
+                if len(results) >= limit:
+                    break
+            return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"files": len(self._files), "chunks": len(self._chunks), "terms": len(self._postings)}
+
+
+def snippet(root: Path, chunk: Chunk, terms: set, max_lines: int = 8) -> list:
+    """Best ``max_lines`` window of *chunk* as ``(line number, text)`` pairs."""
+    try:
+        with open(root / chunk.path, encoding="utf-8", errors="replace") as f:
+            lines = f.read().splitlines()[chunk.start - 1:chunk.end]
+    except OSError:
+        return []
+    if len(lines) <= max_lines:
+        return [(chunk.start + i, line) for i, line in enumerate(lines)]
+    hits = [sum(1 for t in set(tokenize(line)) if t in terms) for line in lines]
+    best, best_score = 0, -1
+    for i in range(0, len(lines) - max_lines + 1):
+        window = sum(hits[i:i + max_lines])
+        if window > best_score:
+            best, best_score = i, window
+    return [(chunk.start + best + i, lines[best + i]) for i in range(max_lines)]
+
+
+def format_results(root: Path, results: list, max_lines: int = 8, max_chars: Optional[int] = None) -> str:
+    blocks = []
+    used = 0
+    for rank, (score, chunk, terms) in enumerate(results, 1):
+        head = f"{rank}. {chunk.path}:{chunk.start}-{chunk.end}  (score {score:.2f})"
+        if chunk.label:
+            head += f"  {chunk.label}"
+        body = "\n".join(f"{ln:6}\t{text}" for ln, text in snippet(root, chunk, terms, max_lines))
+        block = f"{head}\n{body}" if body else head
+        if max_chars is not None and used + len(block) > max_chars:
+            break
+        blocks.append(block)
+        used += len(block) + 2
+    return "\n\n".join(blocks)
+
+
+_indexes: dict[Path, SearchIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(root=None) -> SearchIndex:
+    key = Path(root or Path.cwd()).resolve()
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = SearchIndex(key)
+            _indexes[key] = index
+        return index
+
+
+def relevant_code(query: str, root=None, limit: int = 6, max_chars: int = 6000) -> str:
+    """Top BM25 snippets for *query*, formatted for embedding in a prompt ('' if none)."""
+    index = get_search_index(root)
+    return format_results(index.root, index.search(query, limit=limit), max_lines=12, max_chars=max_chars)
+
+
+def notify_search_changed(path) -> None:
+    target = Path(path).resolve()
+    with _indexes_lock:
+        indexes = [ix for root, ix in _indexes.items() if root in target.parents]
+    for index in indexes:
+        index.notify_changed(target)
+
+
+def save_search_indexes() -> None:
+    with _indexes_lock:
+        indexes = list(_indexes.values())
+    for index in indexes:
+        index.save()
+
+
+def clear_search_indexes() -> None:
+    with _indexes_lock:
+        _indexes.clear()
+
+
+add_change_listener(notify_search_changed)
+atexit.register(save_search_indexes)
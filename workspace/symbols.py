@@ -0,0 +1,362 @@
+"""Incremental symbol index behind FindSymbol / FindReferences.
+
+Python files are parsed with ``ast`` (classes, functions, methods and
+module/class-level assignments, with signatures); other languages use a
+line-based tokenizer with per-language definition patterns. Every file also
+records the lines each identifier occurs on, which answers reference queries
+without re-reading the tree.
+
+Entries are keyed by path and invalidated by ``(mtime_ns, size)``. A refresh
+stats the indexed files (ignore-aware, via the workspace ``FileIndex``) at
+most once per ``REFRESH_INTERVAL`` and re-parses only the changed ones on a
+thread pool; files reported through ``workspace.notify_changed`` (Write, Edit,
+MultiEdit) are re-parsed on the next query regardless of the interval.
+"""
+from __future__ import annotations
+
+import ast
+import io
+import os
+import re
+import threading
+import time
+import tokenize
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from .index import REFRESH_INTERVAL, add_change_listener, get_file_index
+
+MAX_FILE_BYTES = 1024 * 1024
+MAX_SIGNATURE_CHARS = 160
+PARSE_WORKERS = min(8, (os.cpu_count() or 2))
+
+_IDENT = re.compile(r"[A-Za-z_$][\w$]*")
+
+_JS = [
+    (re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*(?P<name>[\w$]+)\s*[<(]"), "function"),
+    (re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+(?P<name>[\w$]+)"), "class"),
+    (re.compile(r"^\s*(?:export\s+)?(?:const|let|var)\s+(?P<name>[\w$]+)\s*(?::[^=]+)?=\s*"
+                r"(?:async\s+)?(?:function\b|\([^)]*\)\s*(?::[^=]+)?=>|[\w$]+\s*=>)"), "function"),
+    (re.compile(r"^\s*(?:export\s+)?interface\s+(?P<name>[\w$]+)"), "interface"),
+    (re.compile(r"^\s*(?:export\s+)?type\s+(?P<name>[\w$]+)\s*(?:<[^>]*>)?\s*="), "type"),
+    (re.compile(r"^\s*(?:export\s+)?(?:const\s+)?enum\s+(?P<name>[\w$]+)"), "enum"),
+    (re.compile(r"^\s+(?:(?:public|private|protected|static|async|readonly|get|set)\s+)*"
+                r"(?P<name>(?!if\b|for\b|while\b|switch\b|catch\b|return\b)[\w$]+)\s*\([^;]*\)\s*(?::[^{]+)?\{\s*$"), "method"),
+]
+
+_PATTERNS = {
+    ".js": _JS, ".jsx": _JS, ".mjs": _JS, ".cjs": _JS, ".ts": _JS, ".tsx": _JS,
+    ".go": [
+        (re.compile(r"^func\s+\((?P<recv>[^)]*)\)\s*(?P<name>\w+)\s*[\[(]"), "method"),
+        (re.compile(r"^func\s+(?P<name>\w+)\s*[\[(]"), "function"),
+        (re.compile(r"^type\s+(?P<name>\w+)\s+(?:struct|interface)\b"), "type"),
+        (re.compile(r"^type\s+(?P<name>\w+)\b"), "type"),
+    ],
+    ".rs": [
+        (re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:const\s+)?(?:async\s+)?(?:unsafe\s+)?fn\s+(?P<name>\w+)"), "function"),
+        (re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:struct|enum|union)\s+(?P<name>\w+)"), "type"),
+        (re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?trait\s+(?P<name>\w+)"), "interface"),
+        (re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:const|static)\s+(?P<name>[A-Z_][A-Z0-9_]*)\s*:"), "variable"),
+    ],
+    ".java": [
+        (re.compile(r"^\s*(?:(?:public|private|protected|static|final|abstract|sealed)\s+)*"
+                    r"(?:class|interface|enum|record)\s+(?P<name>\w+)"), "class"),
+        (re.compile(r"^\s+(?:(?:public|private|protected|static|final|abstract|synchronized)\s+)+"
+                    r"[\w<>\[\],\s]+?\s+(?P<name>\w+)\s*\("), "method"),
+    ],
+    ".rb": [
+        (re.compile(r"^\s*(?:class|module)\s+(?P<name>[A-Z]\w*)"), "class"),
+        (re.compile(r"^\s*def\s+(?:self\.)?(?P<name>\w+[?!=]?)"), "function"),
+    ],
+    ".c": [
+        (re.compile(r"^(?:struct|union|enum)\s+(?P<name>\w+)\s*\{"), "type"),
+        (re.compile(r"^#define\s+(?P<name>\w+)"), "variable"),
+        (re.compile(r"^(?!\s)(?!return\b)[\w\s\*]+?\b(?P<name>\w+)\s*\([^;]*\)\s*\{?\s*$"), "function"),
+    ],
+    ".sh": [
+        (re.compile(r"^\s*(?:function\s+)?(?P<name>[\w-]+)\s*\(\)\s*\{?"), "function"),
+    ],
+}
+for _ext in (".h", ".cc", ".cpp", ".hpp", ".cxx"):
+    _PATTERNS[_ext] = _PATTERNS[".c"]
+_PATTERNS[".bash"] = _PATTERNS[".sh"]
+_PATTERNS[".kt"] = _PATTERNS[".java"]
+_PATTERNS[".cs"] = _PATTERNS[".java"]
+
+SUPPORTED_SUFFIXES = frozenset({".py", *_PATTERNS})
+
+
+@dataclass
+class Symbol:
+    name: str
+    kind: str               # class, function, method, variable, interface, type, enum
+    path: str               # root-relative, "/"-separated
+    line: int               # 1-based
+    end_line: int
+    signature: str
+    container: str = ""     # enclosing class/function, dotted
+
+    @property
+    def qualname(self) -> str:
+        return f"{self.container}.{self.name}" if self.container else self.name
+
+
+@dataclass
+class _FileEntry:
+    mtime_ns: int
+    size: int
+    symbols: list = field(default_factory=list)
+    refs: dict = field(default_factory=dict)     # identifier -> tuple of line numbers
+
+
+# ── Parsers ─────────────────────────────────────────────────────────────────
+
+def _clip(text: str) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= MAX_SIGNATURE_CHARS else text[:MAX_SIGNATURE_CHARS - 3] + "..."
+
+
+def _py_signature(node, lines: list) -> str:
+    if isinstance(node, ast.ClassDef):
+        bases = [ast.unparse(b) for b in node.bases] + [ast.unparse(k) for k in node.keywords]
+        return _clip(f"class {node.name}" + (f"({', '.join(bases)})" if bases else ""))
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+        ret = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+        return _clip(f"{prefix} {node.name}({ast.unparse(node.args)}){ret}")
+    return _clip(lines[node.lineno - 1] if node.lineno <= len(lines) else "")
+
+
+def _python_symbols(source: str, rel: str) -> list:
+    tree = ast.parse(source)
+    lines = source.splitlines()
+    out = []
+
+    def visit(body, container: str, in_class: bool, top: bool):
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                out.append(Symbol(node.name, "class", rel, node.lineno, node.end_lineno or node.lineno,
+                                  _py_signature(node, lines), container))
+                visit(node.body, f"{container}.{node.name}" if container else node.name, True, False)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                out.append(Symbol(node.name, "method" if in_class else "function", rel, node.lineno,
+                                  node.end_lineno or node.lineno, _py_signature(node, lines), container))
+                visit(node.body, f"{container}.{node.name}" if container else node.name, False, False)
+            elif (top or in_class) and isinstance(node, (ast.Assign, ast.AnnAssign)):
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                for target in targets:
+                    if isinstance(target, ast.Name):
+                        out.append(Symbol(target.id, "variable", rel, node.lineno,
+                                          node.end_lineno or node.lineno, _py_signature(node, lines), container))
+            elif top and isinstance(node, (ast.If, ast.Try)):
+                # Conditional definitions at module level (TYPE_CHECKING, import fallbacks)
+                for block in (node.body, getattr(node, "orelse", []), getattr(node, "finalbody", [])):
+                    visit(block, container, in_class, top)
+
+    visit(tree.body, "", False, True)
+    return out
+
+
+def _python_refs(source: str) -> dict:
+    refs: dict = {}
+    try:
+        for tok in tokenize.generate_tokens(io.StringIO(source).readline):
+            if tok.type == tokenize.NAME:
+                refs.setdefault(tok.string, []).append(tok.start[0])
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        return _regex_refs(source)
+    return refs
+
+
+def _regex_refs(source: str) -> dict:
+    refs: dict = {}
+    for lineno, line in enumerate(source.splitlines(), 1):
+        for m in _IDENT.finditer(line):
+            refs.setdefault(m.group(), []).append(lineno)
+    return refs
+
+
+def _pattern_symbols(source: str, rel: str, patterns: list) -> list:
+    out = []
+    for lineno, line in enumerate(source.splitlines(), 1):
+        for regex, kind in patterns:
+            m = regex.match(line)
+            if m:
+                container = ""
+                recv = m.groupdict().get("recv")
+                if recv:
+                    container = recv.split()[-1].lstrip("*")
+                out.append(Symbol(m.group("name"), kind, rel, lineno, lineno, _clip(line), container))
+                break
+    return out
+
+
+_PY_FALLBACK = [
+    (re.compile(r"^\s*(?:async\s+)?def\s+(?P<name>\w+)"), "function"),
+    (re.compile(r"^\s*class\s+(?P<name>\w+)"), "class"),
+]
+
+
+def extract_symbols(source: str, rel: str) -> list:
+    """Definitions in *source*; the language is taken from *rel*'s suffix."""
+    suffix = Path(rel).suffix.lower()
+    if suffix == ".py":
+        try:
+            return _python_symbols(source, rel)
+        except (SyntaxError, ValueError, RecursionError):
+            return _pattern_symbols(source, rel, _PY_FALLBACK)
+    return _pattern_symbols(source, rel, _PATTERNS.get(suffix, []))
+
+
+def parse_file(path: Path, rel: str) -> tuple:
+    """Return ``(symbols, refs)`` for one file (empty on read/parse failure)."""
+    try:
+        source = path.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return [], {}
+    symbols = extract_symbols(source, rel)
+    refs = _python_refs(source) if path.suffix.lower() == ".py" else _regex_refs(source)
+    return symbols, {name: tuple(dict.fromkeys(lines)) for name, lines in refs.items()}
+
+
+# ── Index ───────────────────────────────────────────────────────────────────
+
+class SymbolIndex:
+    """Per-root symbol and identifier index, refreshed incrementally."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root).resolve()
+        self._files: dict[str, _FileEntry] = {}
+        self._dirty: set = set()
+        self._last_scan = 0.0
+        self._lock = threading.RLock()
+        self.parsed = 0         # files (re)parsed so far, for tests and /status
+        self.version = 0        # bumped whenever any entry is added, changed or removed
+
+    def notify_changed(self, path) -> None:
+        try:
+            rel = Path(path).resolve().relative_to(self.root).as_posix()
+        except ValueError:
+            return
+        if Path(rel).suffix.lower() in SUPPORTED_SUFFIXES:
+            with self._lock:
+                self._dirty.add(rel)
+
+    def _stat(self, rel: str):
+        try:
+            st = (self.root / rel).stat()
+        except OSError:
+            return None
+        if st.st_size > MAX_FILE_BYTES:
+            return None
+        return st
+
+    def refresh(self, force: bool = False) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if force or now - self._last_scan >= REFRESH_INTERVAL:
+                candidates = [rel for rel in get_file_index(self.root).walk()
+                              if Path(rel).suffix.lower() in SUPPORTED_SUFFIXES]
+                seen = set(candidates)
+                for rel in [r for r in self._files if r not in seen]:
+                    del self._files[rel]
+                    self.version += 1
+                self._last_scan = now
+            else:
+                candidates = list(self._dirty)
+            stale = []
+            for rel in candidates:
+                st = self._stat(rel)
+                if st is None:
+                    if self._files.pop(rel, None) is not None:
+                        self.version += 1
+                    continue
+                entry = self._files.get(rel)
+                if rel in self._dirty or entry is None or (entry.mtime_ns, entry.size) != (st.st_mtime_ns, st.st_size):
+                    stale.append((rel, st))
+            self._dirty.clear()
+            if not stale:
+                return
+            with ThreadPoolExecutor(max_workers=PARSE_WORKERS) as pool:
+                parsed = list(pool.map(lambda item: parse_file(self.root / item[0], item[0]), stale))
+            for (rel, st), (symbols, refs) in zip(stale, parsed):
+                self._files[rel] = _FileEntry(st.st_mtime_ns, st.st_size, symbols, refs)
+            self.parsed += len(stale)
+            self.version += 1
+
+    def _entries(self, path_prefix: str = "") -> list:
+        self.refresh()
+        with self._lock:
+            prefix = path_prefix.strip("/")
+            return [(rel, e) for rel, e in self._files.items()
+                    if not prefix or rel == prefix or rel.startswith(prefix + "/")]
+
+    def find_symbol(self, query: str, kind: Optional[str] = None, path_prefix: str = "",
+                    limit: int = 50) -> tuple:
+        """Return ``(symbols, exact)``: exact name/qualname matches, else case-insensitive substring matches."""
+        entries = self._entries(path_prefix)
+        everything = [s for _, e in entries for s in e.symbols if not kind or s.kind == kind]
+        exact = [s for s in everything if s.name == query or s.qualname == query
+                 or s.qualname.endswith("." + query)]
+        if exact:
+            return sorted(exact, key=lambda s: (s.path, s.line))[:limit], True
+        needle = query.lower()
+        fuzzy = [s for s in everything if needle in s.qualname.lower()]
+        fuzzy.sort(key=lambda s: (len(s.name), s.path, s.line))
+        return fuzzy[:limit], False
+
+    def find_references(self, name: str, path_prefix: str = "") -> list:
+        """Return sorted ``(path, line, is_definition)`` for every occurrence of identifier *name*."""
+        ident = name.rsplit(".", 1)[-1]
+        hits = []
+        for rel, entry in self._entries(path_prefix):
+            lines = entry.refs.get(ident)
+            if not lines:
+                continue
+            defs = {s.line for s in entry.symbols if s.name == ident}
+            hits.extend((rel, ln, ln in defs) for ln in lines)
+        return sorted(hits)
+
+    def symbols_in(self, rel: str) -> list:
+        self.refresh()
+        with self._lock:
+            entry = self._files.get(rel)
+            return list(entry.symbols) if entry else []
+
+    def all_entries(self) -> dict:
+        """Snapshot of ``{rel: (symbols, refs)}`` after a refresh (for repo maps and search)."""
+        self.refresh()
+        with self._lock:
+            return {rel: (e.symbols, e.refs) for rel, e in self._files.items()}
+
+
+_indexes: dict[Path, SymbolIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_symbol_index(root=None) -> SymbolIndex:
+    key = Path(root or Path.cwd()).resolve()
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = SymbolIndex(key)
+            _indexes[key] = index
+        return index
+
+
+def notify_symbols_changed(path) -> None:
+    target = Path(path).resolve()
+    with _indexes_lock:
+        indexes = [ix for root, ix in _indexes.items() if root in target.parents]
+    for index in indexes:
+        index.notify_changed(target)
+
+
+def clear_symbol_indexes() -> None:
+    with _indexes_lock:
+        _indexes.clear()
+
+
+add_change_listener(notify_symbols_changed)
@@ -0,0 +1,159 @@
+"""FindSymbol / FindReferences / SearchCode tools backed by the workspace indexes.
+
+Importing this module registers the tools into the central registry.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+
+from tool_registry import ToolDef, register_tool
+from .search import format_results, get_search_index
+from .symbols import get_symbol_index
+
+MAX_SYMBOL_RESULTS = 50
+MAX_REFERENCE_RESULTS = 100
+MAX_SEARCH_RESULTS = 30
+
+
+def _scope(index, path: str) -> str:
+    """Root-relative prefix for an optional *path* argument ('' = whole workspace)."""
+    if not path:
+        return ""
+    try:
+        rel = Path(path).resolve().relative_to(index.root).as_posix()
+    except ValueError:
+        return path.strip("/")
+    return "" if rel == "." else rel
+
+
+def _find_symbol(params: dict, config: dict) -> str:
+    name = (params.get("name") or "").strip()
+    if not name:
+        return "Error: name is required"
+    index = get_symbol_index()
+    symbols, exact = index.find_symbol(name, params.get("kind") or None,
+                                       _scope(index, params.get("path", "")), MAX_SYMBOL_RESULTS)
+    if not symbols:
+        return f"No symbol named '{name}' found"
+    header = (f"{len(symbols)} definition(s) of '{name}':" if exact
+              else f"No exact match for '{name}'; {len(symbols)} similar symbol(s):")
+    lines = [header]
+    for s in symbols:
+        span = f"{s.line}-{s.end_line}" if s.end_line > s.line else str(s.line)
+        lines.append(f"{s.path}:{span}  [{s.kind}] {s.qualname}  {s.signature}")
+    return "\n".join(lines)
+
+
+def _find_references(params: dict, config: dict) -> str:
+    name = (params.get("name") or "").strip()
+    if not name:
+        return "Error: name is required"
+    index = get_symbol_index()
+    hits = index.find_references(name, _scope(index, params.get("path", "")))
+    if not hits:
+        return f"No references to '{name}' found"
+    lines = [f"{len(hits)} reference(s) to '{name}'"
+             + (f" (showing first {MAX_REFERENCE_RESULTS})" if len(hits) > MAX_REFERENCE_RESULTS else "") + ":"]
+    cache: dict = {}
+    for rel, ln, is_def in hits[:MAX_REFERENCE_RESULTS]:
+        if rel not in cache:
+            try:
+                cache[rel] = (index.root / rel).read_text(encoding="utf-8", errors="replace").splitlines()
+            except OSError:
+                cache[rel] = []
+        text = cache[rel][ln - 1].strip() if ln <= len(cache[rel]) else ""
+        lines.append(f"{rel}:{ln}: {text[:200]}" + ("  (definition)" if is_def else ""))
+    return "\n".join(lines)
+
+
+def _search_code(params: dict, config: dict) -> str:
+    query = (params.get("query") or "").strip()
+    if not query:
+        return "Error: query is required"
+    try:
+        limit = max(1, min(int(params.get("limit") or 10), MAX_SEARCH_RESULTS))
+    except (TypeError, ValueError):
+        return f"Error: limit must be an integer, got {params.get('limit')!r}"
+    index = get_search_index()
+    results = index.search(query, limit=limit, path_prefix=_scope(index, params.get("path", "")))
+    if not results:
+        return f"No code matches '{query}'"
+    return format_results(index.root, results)
+
+
+_SCOPE = {"path": {"type": "string", "description": "Limit the search to this file or directory (default: whole workspace)"}}
+
+register_tool(ToolDef(
+    name="FindSymbol",
+    schema={
+        "name": "FindSymbol",
+        "description": (
+            "Find where a class, function, method or module-level variable is defined. "
+            "Returns exact file:line spans with signatures from an incrementally maintained "
+            "symbol index, so no Grep/Read round-trips are needed. Accepts plain or dotted "
+            "names (e.g. 'run' or 'Agent.run'); falls back to substring matches."
+        ),
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string", "description": "Symbol name or dotted qualified name"},
+                "kind": {
+                    "type": "string",
+                    "description": "Optional filter: class, function, method, variable, interface, type, enum",
+                },
+                **_SCOPE,
+            },
+            "required": ["name"],
+        },
+    },
+    func=_find_symbol,
+    read_only=True,
+    concurrent_safe=True,
+))
+
+register_tool(ToolDef(
+    name="FindReferences",
+    schema={
+        "name": "FindReferences",
+        "description": (
+            "List every line that uses an identifier (code tokens only for Python; "
+            "strings and comments are skipped), with definitions marked."
+        ),
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string", "description": "Identifier to look up (for 'A.b' the last part is used)"},
+                **_SCOPE,
+            },
+            "required": ["name"],
+        },
+    },
+    func=_find_references,
+    read_only=True,
+    concurrent_safe=True,
+))
+
+register_tool(ToolDef(
+    name="SearchCode",
+    schema={
+        "name": "SearchCode",
+        "description": (
+            "Ranked code search: describe what you are looking for in words or identifiers "
+            "(e.g. 'retry http request backoff') and get the best-matching functions/classes "
+            "as file:line snippets, BM25-ranked over an incrementally updated index. Use it "
+            "before speculative Grep/Read calls to locate relevant code."
+        ),
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "Words and/or identifiers describing the code"},
+                "limit": {"type": "integer", "description": f"Max results (default 10, max {MAX_SEARCH_RESULTS})"},
+                **_SCOPE,
+            },
+            "required": ["query"],
+        },
+    },
+    func=_search_code,
+    read_only=True,
+    concurrent_safe=True,
+))